@@ -0,0 +1,306 @@
+# Exhaustive analysis of every puzzle of a word width, split across processes
+
+# --------------------------------------------------------------------------------------------------
+# Imports
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+import numpy as np
+from batch import distance_rows, neighbour_cache, word_range
+from registry import CLASSIC, EXTENDED
+from solver import UNREACHABLE
+from tables import read_tables, write_tables
+
+# --------------------------------------------------------------------------------------------------
+# Logic Rules
+
+'''
+Works out, for every (start, target) pair of a width up to 16 bits (2**32 pairs at 16):
+    distribution         how many pairs need each number of moves, UNREACHABLE counted at 255
+    hardest pairs        the longest optimal solution, how many pairs need it and up to HARDEST_KEPT of them
+    target eccentricity  for each target, the most moves any start needs to reach it
+    start eccentricity   for each start, the most moves it needs to reach any target
+Unreachable pairs don't count towards eccentricity
+
+The starts are split into SHARDS shards, each worked out by a ProcessPoolExecutor worker a block of starts at a time
+(batch.distance_rows gives a whole block's distances to every target as one array)
+Workers write their results into one shared memory block, a slot per shard, and return only the shard's number,
+so no lists of results are ever pickled between processes
+
+The parent copies each finished shard out of shared memory into its own table file (see tables.py) in the output directory,
+    shard-0000.bmgt ... one per shard, a few tens of kB each at 16 bits
+    summary.bmgt        every target's and start's eccentricity, written when all shards are done
+    summary.json        the distribution and hardest pairs
+A shard's file is its checkpoint: running again with the same output directory skips every shard already written,
+so an interrupted run picks up where it stopped, and run.json makes sure it is the same analysis
+
+    python analysis.py --width 16 --output analysis-16
+'''
+
+SHARDS = 64
+BLOCK_STARTS = 64 # starts worked out together, 64 x 65536 distances at 16 bits
+HARDEST_KEPT = 64
+
+# --------------------------------------------------------------------------------------------------
+# Shared Memory Slots
+
+def _slot_layout(width, shard_starts):
+    '''
+    Returns ([(name, dtype, count)], slot bytes) for one shard's results in shared memory, every field 8 byte aligned
+    '''
+
+    fields = [
+        ('histogram', np.uint64, 256),
+        ('info', np.uint64, 4), # first start, stop, hardest distance, pairs at the hardest distance
+        ('hardest', np.uint32, 2 * HARDEST_KEPT), # start, target pairs
+        ('target_eccentricity', np.uint8, 1 << width),
+        ('start_eccentricity', np.uint8, shard_starts),
+    ]
+    size = 0
+    for name, dtype, count in fields:
+        size += -size % 8 + np.dtype(dtype).itemsize * count
+    return fields, size + -size % 8
+
+def _slot(buffer, shard, width, shard_starts):
+    '''
+    Numpy views of one shard's slot in the shared memory block
+    '''
+
+    fields, size = _slot_layout(width, shard_starts)
+    offset = shard * size
+    views = {}
+    for name, dtype, count in fields:
+        offset += -offset % 8
+        views[name] = np.ndarray(count, dtype=dtype, buffer=buffer, offset=offset)
+        offset += np.dtype(dtype).itemsize * count
+    return views
+
+# --------------------------------------------------------------------------------------------------
+# Workers
+
+_worker = {}
+
+def _start_worker(memory_name, width, move_set, shard_starts):
+    '''
+    Runs once in each worker process, attaching to the shared memory block
+    '''
+
+    _worker['memory'] = shared_memory.SharedMemory(name=memory_name)
+    _worker['settings'] = (width, move_set, shard_starts)
+    _worker['neighbours'] = None
+
+def _analyse_shard(shard):
+    '''
+    Works out one shard's results straight into its shared memory slot, returns the shard number
+    '''
+
+    width, move_set, shard_starts = _worker['settings']
+    if _worker['neighbours'] is None:
+        _worker['neighbours'] = neighbour_cache(word_range(width), width, move_set)
+    slot = _slot(_worker['memory'].buf, shard, width, shard_starts)
+    first = shard * shard_starts
+    stop = min(first + shard_starts, 1 << width)
+
+    histogram = np.zeros(256, dtype=np.uint64)
+    target_eccentricity = np.zeros(1 << width, dtype=np.uint8)
+    start_eccentricity = np.zeros(shard_starts, dtype=np.uint8)
+    hardest_distance = hardest_count = 0
+    hardest = []
+
+    for block in range(first, stop, BLOCK_STARTS):
+        distances = distance_rows(block, min(block + BLOCK_STARTS, stop), width, move_set, _worker['neighbours'])
+        histogram += np.bincount(distances.ravel(), minlength=256).astype(np.uint64)
+        reached = np.where(distances == UNREACHABLE, 0, distances)
+        np.maximum(target_eccentricity, reached.max(axis=0), out=target_eccentricity)
+        start_eccentricity[block - first:block - first + len(distances)] = reached.max(axis=1)
+
+        longest = int(reached.max())
+        if longest > hardest_distance:
+            hardest_distance, hardest_count, hardest = longest, 0, []
+        if longest == hardest_distance:
+            found = reached == longest
+            hardest_count += int(np.count_nonzero(found))
+            if len(hardest) < HARDEST_KEPT:
+                rows, targets = np.nonzero(found) # only while examples are still wanted
+                hardest.extend(zip((rows[:HARDEST_KEPT] + block).tolist(), targets[:HARDEST_KEPT].tolist()))
+                del hardest[HARDEST_KEPT:]
+
+    slot['histogram'][:] = histogram
+    slot['info'][:] = (first, stop, hardest_distance, hardest_count)
+    slot['hardest'][:] = 0
+    slot['hardest'][:2 * len(hardest)] = [word for pair in hardest for word in pair]
+    slot['target_eccentricity'][:] = target_eccentricity
+    slot['start_eccentricity'][:] = start_eccentricity
+    return shard
+
+# --------------------------------------------------------------------------------------------------
+# Shard Files
+
+def _shard_path(output, shard):
+    return os.path.join(output, f'shard-{shard:04d}.bmgt')
+
+def _write_shard(output, shard, slot, width):
+    '''
+    Copies a finished shard out of shared memory into its file, only the used part of each field is kept
+    '''
+
+    first, stop, _, _ = slot['info'].tolist()
+    kept = min(HARDEST_KEPT, int(slot['info'][3]))
+    write_tables(_shard_path(output, shard), width, {
+        'histogram': slot['histogram'].copy(),
+        'info': slot['info'].copy(),
+        'hardest': slot['hardest'][:2 * kept].astype(np.uint16), # words are up to 16 bits
+        'target_eccentricity': slot['target_eccentricity'].copy(),
+        'start_eccentricity': slot['start_eccentricity'][:stop - first].copy(),
+    })
+
+def _read_shard(output, shard, width):
+    '''
+    Returns a shard file's tables, or None if it hasn't been written or is damaged
+    '''
+
+    try:
+        return read_tables(_shard_path(output, shard), width)
+    except (OSError, ValueError):
+        return None
+
+def _check_run(output, settings):
+    '''
+    Makes sure the output directory holds the same analysis, or starts one there
+    '''
+
+    path = os.path.join(output, 'run.json')
+    os.makedirs(output, exist_ok=True)
+    if os.path.exists(path):
+        with open(path) as file:
+            if json.load(file) != settings:
+                raise ValueError(f'{output} holds a different analysis, use another output directory')
+        return
+    with open(path, 'w') as file:
+        json.dump(settings, file)
+
+# --------------------------------------------------------------------------------------------------
+# Analysis
+
+def analyse(width=16, move_set=CLASSIC, output=None, workers=None, shards=SHARDS, progress=None):
+    '''
+    Analyses every puzzle of a width, resuming from any shards already in output, and returns the summary
+    progress(done, total) is called as each shard is checkpointed
+    '''
+
+    if not 1 <= width <= 16:
+        raise ValueError(f'analysis goes up to 16 bits, got {width}')
+    states = 1 << width
+    shards = max(1, min(shards, states))
+    shard_starts = -(-states // shards)
+    shards = -(-states // shard_starts) # no empty shards at small widths
+    output = output or f'analysis-{width}'
+    _check_run(output, {'width': width, 'moves': list(move_set), 'shards': shards})
+
+    todo = [shard for shard in range(shards) if _read_shard(output, shard, width) is None]
+    if progress:
+        progress(shards - len(todo), shards)
+    if todo:
+        memory = shared_memory.SharedMemory(create=True, size=_slot_layout(width, shard_starts)[1] * shards)
+        try:
+            pool = ProcessPoolExecutor(workers, initializer=_start_worker, initargs=(memory.name, width, tuple(move_set), shard_starts))
+            try:
+                done = shards - len(todo)
+                for future in as_completed([pool.submit(_analyse_shard, shard) for shard in todo]):
+                    shard = future.result()
+                    _write_shard(output, shard, _slot(memory.buf, shard, width, shard_starts), width)
+                    done += 1
+                    if progress:
+                        progress(done, shards)
+            finally:
+                pool.shutdown(cancel_futures=True) # on an interrupt the shards already written are kept
+        finally:
+            memory.close()
+            memory.unlink()
+
+    return summarise(output, width, shards, move_set)
+
+def summarise(output, width, shards, move_set=CLASSIC):
+    '''
+    Merges every shard file into summary.bmgt and summary.json, and returns the summary
+    '''
+
+    histogram = np.zeros(256, dtype=np.uint64)
+    target_eccentricity = np.zeros(1 << width, dtype=np.uint8)
+    start_eccentricity = []
+    hardest_distance = hardest_count = 0
+    hardest = []
+    for shard in range(shards):
+        tables = _read_shard(output, shard, width)
+        if tables is None:
+            raise ValueError(f'shard {shard} of {output} is missing, run the analysis again to finish it')
+        histogram += np.asarray(tables['histogram'])
+        np.maximum(target_eccentricity, np.asarray(tables['target_eccentricity']), out=target_eccentricity)
+        start_eccentricity.append(np.asarray(tables['start_eccentricity']))
+        _, _, distance, count = tables['info'].tolist()
+        if distance > hardest_distance:
+            hardest_distance, hardest_count, hardest = distance, 0, []
+        if distance == hardest_distance:
+            hardest_count += count
+            pairs = tables['hardest'].tolist()
+            hardest.extend(zip(pairs[::2], pairs[1::2]))
+    start_eccentricity = np.concatenate(start_eccentricity)
+
+    write_tables(os.path.join(output, 'summary.bmgt'), width, {
+        'histogram': histogram,
+        'target_eccentricity': target_eccentricity,
+        'start_eccentricity': start_eccentricity,
+    })
+    summary = {
+        'width': width,
+        'moves': list(move_set),
+        'pairs': int(histogram.sum()),
+        'distribution': {str(distance): int(count) for distance, count in enumerate(histogram.tolist()) if count and distance != UNREACHABLE},
+        'unreachable': int(histogram[UNREACHABLE]),
+        'hardest': {
+            'moves': hardest_distance,
+            'pairs': hardest_count,
+            'examples': [[format(start, f'0{width}b'), format(target, f'0{width}b')] for start, target in hardest[:HARDEST_KEPT]],
+        },
+        'target_eccentricity': {str(moves): count for moves, count in enumerate(np.bincount(target_eccentricity).tolist()) if count},
+        'start_eccentricity': {str(moves): count for moves, count in enumerate(np.bincount(start_eccentricity).tolist()) if count},
+    }
+    with open(os.path.join(output, 'summary.json'), 'w') as file:
+        json.dump(summary, file, indent=2)
+    return summary
+
+# --------------------------------------------------------------------------------------------------
+# Command Line
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Analyses every puzzle of a word width across processes')
+    parser.add_argument('--width', type=int, default=16, help='word width, up to 16 (default 16)')
+    parser.add_argument('--extended', action='store_true', help='use the extended move set')
+    parser.add_argument('--output', help='directory for the shard files, analysis-<width> by default, reused to resume')
+    parser.add_argument('--workers', type=int, help='worker processes, one per cpu by default')
+    parser.add_argument('--shards', type=int, default=SHARDS, help=f'pieces the starts are split into (default {SHARDS})')
+    args = parser.parse_args(argv)
+
+    began = time.perf_counter()
+
+    def progress(done, total):
+        print(f'\r{done}/{total} shards ({time.perf_counter() - began:.1f} s)', end='', file=sys.stderr, flush=True)
+
+    try:
+        summary = analyse(args.width, EXTENDED if args.extended else CLASSIC, args.output, args.workers, args.shards, progress)
+    except ValueError as error:
+        parser.error(str(error))
+    except KeyboardInterrupt:
+        print('\ninterrupted, run the same command again to carry on', file=sys.stderr)
+        return 130
+    print(file=sys.stderr)
+    print(json.dumps({key: value for key, value in summary.items() if key != 'moves'}, indent=2))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,133 @@
+# Frame timed animations for the Bitwise Manipulation Game
+
+# --------------------------------------------------------------------------------------------------
+# Logic Rules
+
+'''
+Animations never sleep, they are moved along by the time each frame took (CLOCK.tick's return value)
+so the main loop keeps its frame rate and keeps handling clicks and keys while something animates
+
+Tween     runs from 0 to 1 over a duration in milliseconds, then calls its on_complete
+Timeline  plays tweens one after another, extra tweens queue up behind the playing one
+          speed scales every duration: 2 is twice as fast, INSTANT finishes each tween on its first update
+          cancel() drops everything without completing it, finish() completes everything straight away
+
+Nothing here imports pygame, the gui decides what a tween's progress looks like
+'''
+
+INSTANT = float('inf')
+
+# --------------------------------------------------------------------------------------------------
+# Tweens
+
+def linear(progress):
+    return progress
+
+class Tween:
+    '''
+    A value running from 0 to 1 over duration milliseconds
+    data is anything the owner wants to keep with the tween, e.g. the move being animated
+    '''
+
+    def __init__(self, duration, on_complete=None, data=None, easing=linear):
+        self.duration = duration
+        self.on_complete = on_complete
+        self.data = data
+        self.easing = easing
+        self.elapsed = 0.0
+        self.done = False
+
+    @property
+    def progress(self):
+        '''
+        Eased progress between 0 and 1
+        '''
+
+        if self.duration <= 0:
+            return 1.0
+        return self.easing(min(1.0, self.elapsed / self.duration))
+
+    def update(self, dt):
+        '''
+        Moves the tween on by dt milliseconds, returns the milliseconds left over once it finishes
+        '''
+
+        self.elapsed += dt
+        if self.elapsed < self.duration:
+            return None
+        return self.complete(self.elapsed - self.duration)
+
+    def complete(self, leftover=0.0):
+        self.elapsed = self.duration
+        if not self.done:
+            self.done = True
+            if self.on_complete is not None:
+                self.on_complete(self)
+        return leftover
+
+# --------------------------------------------------------------------------------------------------
+# Timelines
+
+class Timeline:
+    '''
+    Plays a queue of tweens in order, at a given speed
+    '''
+
+    def __init__(self, speed=1.0):
+        self.speed = speed
+        self.queue = []
+
+    @property
+    def busy(self):
+        return bool(self.queue)
+
+    @property
+    def current(self):
+        '''
+        The tween playing right now, or None
+        '''
+
+        if self.queue:
+            return self.queue[0]
+        return None
+
+    def play(self, tween):
+        '''
+        Queues a tween behind anything already playing
+        '''
+
+        self.queue.append(tween)
+        return tween
+
+    def update(self, dt):
+        '''
+        Moves the playing tween on by dt milliseconds of real time, starting the next one with any time left over
+        '''
+
+        if self.speed == INSTANT:
+            self.finish()
+            return
+        dt *= self.speed
+        while self.queue and dt is not None:
+            tween = self.queue[0]
+            dt = tween.update(dt)
+            if dt is not None:
+                if self.queue and self.queue[0] is tween: # on_complete may have cancelled the queue already
+                    self.queue.pop(0)
+                if not dt:
+                    break
+
+    def finish(self):
+        '''
+        Completes every queued tween straight away, in order
+        '''
+
+        while self.queue:
+            self.queue.pop(0).complete()
+
+    def cancel(self):
+        '''
+        Drops every queued tween without completing it
+        '''
+
+        self.queue.clear()
@@ -0,0 +1,319 @@
+# Vectorised Shifts and Mask operations, for grading and generating puzzles in bulk
+
+# --------------------------------------------------------------------------------------------------
+# Imports
+
+import argparse
+import sys
+import time
+import numpy as np
+from operations import Word, _parse_mask
+from registry import CLASSIC, EXTENDED, LUT_WIDTH_LIMIT, OPERATIONS, get_operation
+from solver import UNREACHABLE, closed_form_distance, has_closed_form
+
+# --------------------------------------------------------------------------------------------------
+# Logic Rules
+
+'''
+Array versions of the operations.py functions, each call handles a whole array with no python loop
+Values come in as numpy integer arrays or any buffer (bytes, bytearray, memoryview, array.array)
+    uint8/int8 arrays are bytes, uint16/int16 are 16 bit words and so on
+    signed arrays are read as their Two's Complement bit patterns
+Results are returned with the same dtype as the input, bit for bit what the string functions give
+apply_operation() runs any move in registry.py the same way, XOR, NOT and rotates included
+
+cross_check(width) tests the solver's closed form against breadth first search for every (start, target) pair,
+one start at a time with every target in one array, which is fast enough for all 2**32 pairs of 16 bit words
+The search finds neighbours by running each move with every possible mask, not by the rules the closed form uses
+    python batch.py 8 16    checks both widths, --extended checks the extended move set as well
+'''
+
+_UNSIGNED = {8: np.uint8, 16: np.uint16, 32: np.uint32, 64: np.uint64}
+
+# --------------------------------------------------------------------------------------------------
+# Utility Functions
+
+def as_words(values, width=None):
+    '''
+    Returns values as an unsigned numpy array of the given width, without copying where possible
+    The width defaults to the item size of an array, plain buffers are read as bytes unless a width is given
+    '''
+
+    if width is not None and width not in _UNSIGNED:
+        raise ValueError(f'batch width must be one of {sorted(_UNSIGNED)}, got {width}')
+    if not isinstance(values, np.ndarray):
+        try:
+            values = np.frombuffer(values, dtype=_UNSIGNED[width or 8])
+        except TypeError: # not a buffer, e.g. a list of ints
+            values = np.asarray(values)
+    if values.dtype.kind not in 'iu':
+        raise TypeError(f'expected an integer array, got {values.dtype}')
+
+    if width is None:
+        width = values.dtype.itemsize * 8
+    if width not in _UNSIGNED:
+        raise ValueError(f'batch width must be one of {sorted(_UNSIGNED)}, got {width}')
+
+    unsigned = np.dtype(_UNSIGNED[width])
+    if values.dtype.itemsize == unsigned.itemsize:
+        return values.view(unsigned) # reinterprets signed bytes as unsigned, no copy
+    return values.astype(unsigned) # wraps into range like the scalar functions do
+
+def _restore(result, values):
+    '''
+    Gives the result the same dtype as the input array, so signed in means signed out
+    '''
+
+    if isinstance(values, np.ndarray) and values.dtype.itemsize == result.dtype.itemsize:
+        return result.view(values.dtype)
+    return result
+
+def _mask_words(mask, width):
+    '''
+    Converts a mask (binary string, int, Word or array) into words of the given width
+    '''
+
+    dtype = _UNSIGNED[width]
+    if isinstance(mask, str):
+        return dtype(_parse_mask(mask, width))
+    if isinstance(mask, (int, Word)):
+        return dtype(int(mask) & ((1 << width) - 1))
+    return as_words(mask, width)
+
+def to_binary_strings(values, width=None):
+    '''
+    Formats an array of words as a list of binary strings
+    '''
+
+    words = as_words(values, width)
+    width = words.dtype.itemsize * 8
+    return [format(value, f'0{width}b') for value in words.tolist()]
+
+# --------------------------------------------------------------------------------------------------
+# Binary Stuff
+
+def byte_to_denary(values, width=None):
+    '''
+    Converts an array of Two's Complement words to denary, returned as a signed array
+    '''
+
+    words = as_words(values, width)
+    return words.view(words.dtype.str.replace('u', 'i'))
+
+# --------------------------------------------------------------------------------------------------
+# Shifting
+
+def logical_shift_mul(values, shift_num, width=None):
+    '''
+    Performs logical shift multiplication (left lshift) on every word
+    '''
+
+    words = as_words(values, width)
+    if shift_num >= words.dtype.itemsize * 8: # numpy doesn't define shifts past the word
+        return _restore(np.zeros_like(words), values)
+    return _restore(np.left_shift(words, words.dtype.type(shift_num)), values)
+
+def logical_shift_div(values, shift_num, width=None):
+    '''
+    Performs logical shift division (right lshift) on every word
+    '''
+
+    words = as_words(values, width)
+    if shift_num >= words.dtype.itemsize * 8:
+        return _restore(np.zeros_like(words), values)
+    return _restore(np.right_shift(words, words.dtype.type(shift_num)), values)
+
+def arithmetic_shift_div(values, shift_num, width=None):
+    '''
+    Performs arithmetic shift division (right ashift) on every word, keeping the original sign bit
+    '''
+
+    words = as_words(values, width)
+    dtype = words.dtype.type
+    sign = dtype(1 << (words.dtype.itemsize * 8 - 1))
+    if shift_num >= words.dtype.itemsize * 8:
+        shifted = np.zeros_like(words)
+    else:
+        shifted = np.right_shift(words, dtype(shift_num))
+    return _restore((shifted & (sign - dtype(1))) | (words & sign), values)
+
+# --------------------------------------------------------------------------------------------------
+# Masking
+
+def and_mask(values, mask, width=None):
+    '''
+    AND masks every word with a mask, or with a matching array of masks
+    '''
+
+    words = as_words(values, width)
+    return _restore(words & _mask_words(mask, words.dtype.itemsize * 8), values)
+
+def or_mask(values, mask, width=None):
+    '''
+    OR masks every word with a mask, or with a matching array of masks
+    '''
+
+    words = as_words(values, width)
+    return _restore(words | _mask_words(mask, words.dtype.itemsize * 8), values)
+
+# --------------------------------------------------------------------------------------------------
+# Any Registered Move
+
+def apply_operation(name, values, operand=1, width=None):
+    '''
+    Performs any move in registry.py on every word, e.g. apply_operation('rotate_left', words, 3)
+    Step moves on bytes and 16 bit words are one lookup in the move's table, anything else runs the
+    move's own function on the whole array at once
+    '''
+
+    operation = get_operation(name)
+    words = as_words(values, width)
+    width = words.dtype.itemsize * 8
+    if operation.takes_mask:
+        return _restore(operation.function(words, _mask_words(operand, width), width), values)
+    if operand < 0:
+        raise ValueError(f'{name} cannot be done a negative number of times, got {operand}')
+    operand = operation.normalise(int(operand), width)
+    if width <= LUT_WIDTH_LIMIT:
+        table = np.frombuffer(operation.table(width, operand), dtype=_UNSIGNED[width], count=1 << width)
+        return _restore(table[words], values)
+    return _restore(operation.function(words, operand, width).astype(words.dtype, copy=False), values)
+
+# --------------------------------------------------------------------------------------------------
+# Checking the Solver
+
+def _neighbours(state, words, width, move_set):
+    '''
+    Every word one move from state, as an array of bools, by running each move with every mask
+    '''
+
+    found = np.zeros(len(words), dtype=bool)
+    state = words.dtype.type(state)
+    for name in move_set:
+        operation = OPERATIONS[name]
+        found[operation.function(state, words if operation.takes_mask else 1, width)] = True
+    found[state] = False # staying put is not a move
+    return found
+
+def _search(start, words, width, move_set, neighbours):
+    '''
+    Breadth first search from start in the same order as solver._build_tables, returns (distances, next hops) arrays
+    '''
+
+    distances = np.full(len(words), UNREACHABLE, dtype=np.uint8)
+    next_hops = words.copy() # a word one move away is its own next hop
+    distances[start] = 0
+    seen = np.zeros(len(words), dtype=bool)
+    seen[start] = True
+    frontier = [start]
+    depth = 0
+    while frontier and not seen.all():
+        depth += 1
+        new_frontier = []
+        for state in frontier:
+            fresh = neighbours(state) & ~seen
+            if not fresh.any():
+                continue
+            seen |= fresh
+            distances[fresh] = depth
+            if depth > 1:
+                next_hops[fresh] = next_hops[state]
+            new_frontier.extend(np.flatnonzero(fresh).tolist())
+            if seen.all():
+                break
+        frontier = new_frontier
+    return distances, next_hops
+
+def neighbour_cache(words, width, move_set):
+    '''
+    Returns a neighbours(state) function that remembers a few hundred states' neighbours
+    '''
+
+    cache = {}
+
+    def neighbours(state):
+        found = cache.get(state)
+        if found is None:
+            found = _neighbours(state, words, width, move_set)
+            if len(cache) < 256: # mostly word 0, the next hop of every 2 move pair
+                cache[state] = found
+        return found
+
+    return neighbours
+
+def word_range(width):
+    '''
+    Every word of a width up to 16 bits, as a numpy array
+    '''
+
+    if width > 16:
+        raise ValueError(f'whole word ranges go up to 16 bits, got {width}')
+    return np.arange(1 << width, dtype=_UNSIGNED[8 if width <= 8 else 16])
+
+def distance_rows(first, stop, width, move_set=CLASSIC, neighbours=None):
+    '''
+    Fewest moves from each start in range(first, stop) to every word, as a (stop - first) x 2**width uint8 array
+    Move sets with a closed form work out every row at once, others search from each start, UNREACHABLE where there is no way
+    '''
+
+    words = word_range(width)
+    if has_closed_form(move_set):
+        starts = words[first:stop, np.newaxis] # one row per start against a row of every target
+        return closed_form_distance(starts, words, width, move_set).astype(np.uint8)
+    neighbours = neighbours or neighbour_cache(words, width, move_set)
+    return np.stack([_search(start, words, width, move_set, neighbours)[0] for start in range(first, stop)])
+
+def cross_check(width, move_set=CLASSIC):
+    '''
+    Compares the solver's closed form with breadth first search for every (start, target) pair of a width:
+    the distances, the next hops, and that the move the solver picks for each 1 move pair really makes it
+    Returns the number of pairs checked, raises AssertionError at the first difference
+    '''
+
+    if not has_closed_form(move_set):
+        raise ValueError('the move set has no closed form, it needs AND and OR or XOR')
+    if width > 16:
+        raise ValueError(f'cross checks go up to 16 bits, got {width}')
+
+    words = word_range(width)
+    neighbours = neighbour_cache(words, width, move_set)
+    for start in range(len(words)):
+        searched, searched_hops = _search(start, words, width, move_set, neighbours)
+        word = words[start]
+        closed = closed_form_distance(word, words, width, move_set)
+        if not np.array_equal(closed, searched):
+            target = int(np.flatnonzero(closed != searched)[0])
+            raise AssertionError(f'{start:0{width}b} to {target:0{width}b}: closed form {closed[target]} moves, search {searched[target]}')
+        hops = np.where(closed == 2, 0, words) # the target itself, or 0 on the way to it
+        if not np.array_equal(hops, searched_hops):
+            target = int(np.flatnonzero(hops != searched_hops)[0])
+            raise AssertionError(f'{start:0{width}b} to {target:0{width}b}: closed form goes via {hops[target]}, search via {searched_hops[target]}')
+
+        left = closed == 1
+        for name in move_set: # the solver picks the first move in the move set that reaches the target
+            operation = OPERATIONS[name]
+            picked = left & operation.reaches(word, words, width)
+            operand = operation.mask_for(word, words, width) if operation.takes_mask else 1
+            wrong = picked & (operation.function(word, operand, width) != words)
+            if wrong.any():
+                raise AssertionError(f'{name} does not take {start:0{width}b} to {int(np.flatnonzero(wrong)[0]):0{width}b}')
+            left &= ~picked
+        if left.any():
+            raise AssertionError(f'no move takes {start:0{width}b} to {int(np.flatnonzero(left)[0]):0{width}b}')
+    return len(words) ** 2
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Checks the solver's closed form against breadth first search")
+    parser.add_argument('widths', nargs='*', type=int, default=[8, 16], help='word widths to check (default 8 16)')
+    parser.add_argument('--extended', action='store_true', help='check the extended move set as well')
+    args = parser.parse_args(argv)
+
+    for move_set in (CLASSIC, EXTENDED) if args.extended else (CLASSIC,):
+        for width in args.widths:
+            began = time.perf_counter()
+            pairs = cross_check(width, move_set)
+            print(f"{'extended' if move_set is EXTENDED else 'classic'} {width} bit: all {pairs:,} pairs match ({time.perf_counter() - began:.1f} s)")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,197 @@
+# Benchmark suite for operations.py and the solve path
+
+# --------------------------------------------------------------------------------------------------
+# Imports
+
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+from operations import and_mask, arithmetic_shift_div, binary_generator, byte_to_denary, logical_shift_div, logical_shift_mul, or_mask, packing_check, solve_in_one, zero_packing
+
+try:
+    from operations import Byte, word_type
+    from solver import solution_messages, solve
+except ImportError: # an operations.py from before the word types, only the string functions are measured
+    word_type = None
+
+# --------------------------------------------------------------------------------------------------
+# Logic Rules
+
+'''
+Each benchmark is a list of argument tuples covering every input it cares about
+(all 256 bytes, every shift count from 0 to 8, every mask), called in a tight loop
+
+One sample is one call repeated BATCH times, timed with perf_counter_ns and divided by BATCH,
+and every call is sampled on each sweep, so the samples spread across inputs as well as runs
+    ops/sec        total calls / total time across all samples
+    p50, p90, p99  per call latency percentiles across every input's samples, in nanoseconds
+    by shift       the shift benchmarks' p50 for each shift count, as shifts cost more the further they go
+Repeating each call keeps the timer's own cost out of sub-microsecond results
+
+The pair benchmarks take a fixed sample of PAIRS (start, target) pairs, like the masks, rather than all 65536,
+so a whole run stays a few seconds
+
+Results are saved as json, and --compare flags any benchmark whose ops/sec dropped past a threshold
+    python benchmark.py --output before.json
+    python benchmark.py --compare before.json
+Only the string functions are imported unconditionally, so this file also runs next to an older operations.py
+(one without the word types and solver) to measure the baseline, those benchmarks are left out there
+'''
+
+SHIFT_COUNTS = range(9)
+BATCH = 20 # repeats of one call timed together
+PAIRS = 1024 # (start, target) pairs sampled for the solve benchmarks
+BYTES = [format(value, '08b') for value in range(256)]
+
+# --------------------------------------------------------------------------------------------------
+# Benchmarks
+
+def _benchmarks():
+    '''
+    Returns a dict of name -> (function, list of argument tuples, (label, argument index) to break results down by or None)
+    '''
+
+    rng = random.Random(0) # same mask sample every run
+    masks = rng.sample(BYTES, 16)
+    pairs = rng.sample([(start, target) for start in BYTES for target in BYTES], PAIRS)
+    short = [binary[value % 8:] for value, binary in enumerate(BYTES)] # 1 to 8 bits long
+
+    shifts = [(binary, shift) for binary in BYTES for shift in SHIFT_COUNTS]
+    by_shift = ('shift', 1)
+    benchmarks = {
+        'zero_packing': (zero_packing, [(binary, 8) for binary in short], None),
+        'packing_check': (packing_check, [(binary,) for binary in short], None),
+        'logical_shift_mul': (logical_shift_mul, shifts, by_shift),
+        'logical_shift_div': (logical_shift_div, shifts, by_shift),
+        'arithmetic_shift_div': (arithmetic_shift_div, shifts, by_shift),
+        'and_mask': (and_mask, [(binary, mask) for binary in BYTES for mask in masks], None),
+        'or_mask': (or_mask, [(binary, mask) for binary in BYTES for mask in masks], None),
+        'byte_to_denary': (byte_to_denary, [(binary,) for binary in BYTES], None),
+        'binary_generator': (binary_generator, [()] * 256, None),
+        'solve_in_one': (solve_in_one, [(target, start) for start, target in pairs], None),
+    }
+    if word_type is not None:
+        Word64 = word_type(64)
+        words = [(Byte.from_string(start), Byte.from_string(target)) for start, target in pairs]
+        wide = [(Word64(rng.getrandbits(64)), Word64(rng.getrandbits(64))) for _ in range(256)]
+        benchmarks['solve'] = (solve, words, None)
+        benchmarks['solve_64'] = (solve, wide, None)
+        benchmarks['solution_messages'] = (solution_messages, words, None)
+    return benchmarks
+
+def _percentile(ordered, fraction):
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+def run_benchmark(function, calls, min_time=0.2, breakdown=None):
+    '''
+    Sweeps function over calls, BATCH repeats of each, until min_time seconds and at least one sweep have passed
+    breakdown is (label, argument index), giving the p50 for each value of that argument as well
+    '''
+
+    timer = time.perf_counter_ns
+    repeats = range(BATCH)
+    samples = []
+    groups = {}
+    total = 0
+    while not samples or total < min_time * 1e9:
+        for args in calls:
+            start = timer()
+            for _ in repeats:
+                function(*args)
+            elapsed = timer() - start
+            total += elapsed
+            samples.append(elapsed / BATCH)
+            if breakdown is not None:
+                groups.setdefault(args[breakdown[1]], []).append(elapsed / BATCH)
+
+    samples.sort()
+    result = {
+        'calls': len(samples) * BATCH,
+        'ops_per_sec': len(samples) * BATCH / (total / 1e9),
+        'p50_ns': _percentile(samples, 0.50),
+        'p90_ns': _percentile(samples, 0.90),
+        'p99_ns': _percentile(samples, 0.99),
+    }
+    if breakdown is not None:
+        result[f'p50_ns_by_{breakdown[0]}'] = {str(value): _percentile(sorted(times), 0.50) for value, times in groups.items()}
+    return result
+
+def run_suite(names=None, min_time=0.2):
+    '''
+    Runs every benchmark (or just those named) and returns the results with machine details
+    '''
+
+    results = {}
+    for name, (function, calls, breakdown) in _benchmarks().items():
+        if names and name not in names:
+            continue
+        results[name] = run_benchmark(function, calls, min_time, breakdown)
+    return {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'machine': platform.machine(),
+        'timestamp': time.time(),
+        'results': results,
+    }
+
+# --------------------------------------------------------------------------------------------------
+# Reporting
+
+def compare(current, baseline, threshold=0.10):
+    '''
+    Returns a list of (name, ratio) for benchmarks whose ops/sec fell more than threshold below the baseline
+    '''
+
+    regressions = []
+    for name, result in current['results'].items():
+        old = baseline['results'].get(name)
+        if old is None:
+            continue
+        ratio = result['ops_per_sec'] / old['ops_per_sec']
+        if ratio < 1 - threshold:
+            regressions.append((name, ratio))
+    return regressions
+
+def print_results(results, baseline=None):
+    print(f"{'benchmark':<22}{'ops/sec':>14}{'p50 ns':>10}{'p90 ns':>10}{'p99 ns':>10}" + ('   vs baseline' if baseline else ''))
+    for name, result in results['results'].items():
+        line = f"{name:<22}{result['ops_per_sec']:>14,.0f}{result['p50_ns']:>10.0f}{result['p90_ns']:>10.0f}{result['p99_ns']:>10.0f}"
+        if baseline and name in baseline['results']:
+            line += f"   {result['ops_per_sec'] / baseline['results'][name]['ops_per_sec']:>6.2f}x"
+        print(line)
+        for key, by_value in result.items():
+            if key.startswith('p50_ns_by_'):
+                print(f"{'  p50 by ' + key[len('p50_ns_by_'):]:<22}" + '  '.join(f'{value}: {ns:.0f}' for value, ns in by_value.items()))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmarks operations.py and the solver')
+    parser.add_argument('names', nargs='*', help='benchmarks to run, all of them by default')
+    parser.add_argument('--output', help='save results as json to this file')
+    parser.add_argument('--compare', metavar='BASELINE', help='json results to compare against')
+    parser.add_argument('--threshold', type=float, default=0.10, help='slowdown that counts as a regression (default 0.10)')
+    parser.add_argument('--min-time', type=float, default=0.2, help='seconds to spend on each benchmark (default 0.2)')
+    args = parser.parse_args(argv)
+
+    results = run_suite(args.names, args.min_time)
+    baseline = None
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+    print_results(results, baseline)
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=2)
+
+    if baseline:
+        regressions = compare(results, baseline, args.threshold)
+        for name, ratio in regressions:
+            print(f'REGRESSION {name}: {ratio:.2f}x baseline ops/sec')
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
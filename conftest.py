@@ -0,0 +1,31 @@
+# Shared pytest setup for the Bitwise Manipulation Game's tests
+
+# --------------------------------------------------------------------------------------------------
+# Imports
+
+import pytest
+
+# --------------------------------------------------------------------------------------------------
+# Logic Rules
+
+'''
+Tests marked slow take minutes, e.g. checking every 16 bit puzzle, so they only run when asked for
+    python -m pytest --slow
+'''
+
+# --------------------------------------------------------------------------------------------------
+# Hooks
+
+def pytest_addoption(parser):
+    parser.addoption('--slow', action='store_true', help='also run the tests marked slow')
+
+def pytest_configure(config):
+    config.addinivalue_line('markers', 'slow: takes minutes, only run with --slow')
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption('--slow'):
+        return
+    skip = pytest.mark.skip(reason='slow, run with --slow')
+    for item in items:
+        if 'slow' in item.keywords:
+            item.add_marker(skip)
@@ -0,0 +1,245 @@
+# Headless game engine for the Bitwise Manipulation Game
+
+# --------------------------------------------------------------------------------------------------
+# Imports
+
+import random
+from operations import DEFAULT_WIDTH, word_type
+from puzzles import puzzle_of_difficulty, random_puzzle
+from registry import CLASSIC, get_operation
+from solver import Move, TABLE_WIDTH_LIMIT, hint, move_message, solution_messages
+
+# --------------------------------------------------------------------------------------------------
+# Logic Rules
+
+'''
+A GameSession holds everything about one game and knows nothing about pygame,
+so bots, graders and load tests can play thousands of games a second without a display
+
+States:
+    IDLE     nothing generated yet, only generate() is allowed
+    PLAYING  moves can be applied, the session moves to SOLVED as soon as current == target
+    SOLVED   the quickest solution is available, generate() starts a new game
+
+Moves are solver.Move tuples, the same ones the solver returns:
+    Move('logical_shift_mul', 1), Move('logical_shift_div', 1), Move('arithmetic_shift_div', 1)
+    Move('and_mask', mask), Move('or_mask', mask) - mask is a word, a binary string or an int
+A session only allows the moves in its move set (see registry.py), the classic five by default,
+every step move is done once per move and every move is looked up in the registry, none are special cased here
+
+The gui's mode buttons map onto select(), its arrows onto shift() and its mask box onto submit_mask()
+With arithmetic_shift_mul in the move set the left arrow shifts arithmetically in arithmetic shift mode,
+and with xor_mask in it the mask box can XOR
+
+hint() gives the moves left and the best next move from the current word, two solver table lookups,
+worked out once per position and reused until a move changes it, so showing it every frame costs nothing
+'''
+
+IDLE = 'idle'
+PLAYING = 'playing'
+SOLVED = 'solved'
+
+ARITHMETIC_SHIFT = 'arithmetic_shift'
+LOGICAL_SHIFT = 'logical_shift'
+OR_MASK = 'or_mask'
+AND_MASK = 'and_mask'
+XOR_MASK = 'xor_mask'
+MODES = (ARITHMETIC_SHIFT, LOGICAL_SHIFT, OR_MASK, AND_MASK, XOR_MASK) # new modes go on the end, sessions.py stores the index
+MASK_MODES = (OR_MASK, AND_MASK, XOR_MASK)
+
+# --------------------------------------------------------------------------------------------------
+# Game Session
+
+class GameSession:
+    '''
+    One game: start, current and target words, the step count and the selected mode
+    '''
+
+    def __init__(self, width=DEFAULT_WIDTH, difficulty=None, rng=random, move_set=CLASSIC):
+        self.word = word_type(width)
+        self.width = width
+        self.difficulty = difficulty # optimal solution length of generated puzzles, None for any
+        self.rng = rng
+        self.move_set = tuple(move_set)
+        self.state = IDLE
+        self.start = self.current = self.target = None
+        self.steps = 0
+        self.mode = None
+        self.history = []
+        self._hint = self._solution = (None, None) # (position, answer) caches
+
+    # ----------------------------------------------------------------------------------------------
+    # Starting Games
+
+    def generate(self):
+        '''
+        Starts a new game with a random puzzle
+        '''
+
+        if self.difficulty is None or self.width > TABLE_WIDTH_LIMIT: # wider words have no difficulty index, any puzzle will do
+            start, target = random_puzzle(self.width, self.rng, self.move_set)
+        else:
+            start, target = puzzle_of_difficulty(self.difficulty, self.width, self.rng, self.move_set)
+        self.new_game(start, target)
+
+    def new_game(self, start, target):
+        '''
+        Starts a new game between two given words
+        '''
+
+        self.start = self.current = start
+        self.target = target
+        self.steps = 0
+        self.mode = None
+        self.history = []
+        self.state = SOLVED if start == target else PLAYING
+
+    # ----------------------------------------------------------------------------------------------
+    # Playing
+
+    def select(self, mode):
+        '''
+        Selects one of the modes, or clears the selection with None
+        '''
+
+        if mode is not None and mode not in MODES:
+            raise ValueError(f'unknown mode {mode!r}')
+        if mode in MASK_MODES and mode not in self.move_set:
+            raise ValueError(f'{mode} is not one of this game\'s moves')
+        if mode is not None and self.state != PLAYING:
+            raise ValueError(f'cannot select a mode while {self.state}')
+        self.mode = mode
+
+    def apply(self, move):
+        '''
+        Applies one move to the current word, counts the step and returns the new current word
+        '''
+
+        if self.state != PLAYING:
+            raise ValueError(f'cannot apply a move while {self.state}')
+
+        operation, operand = move
+        registered = get_operation(operation)
+        if operation not in self.move_set:
+            raise ValueError(f'{operation} is not one of this game\'s moves')
+        if registered.takes_mask:
+            value = self._mask(operand).value
+        elif operand != 1:
+            raise ValueError(f'{operation} is done once per move, got {operand}')
+        else:
+            value = 1
+        after = self.word(registered.function(self.current.value, value, self.width))
+
+        self.current = after
+        self.steps += 1
+        self.history.append(Move(operation, operand))
+        if after == self.target: # end game condition
+            self.state = SOLVED
+            self.mode = None
+        return after
+
+    def _mask(self, operand):
+        if operand.__class__ is self.word:
+            return operand
+        if isinstance(operand, str):
+            if not input_valid(operand):
+                raise ValueError(f'mask {operand!r} is not binary')
+            return self.word.from_mask(operand)
+        return self.word(operand)
+
+    def shift_move(self, direction):
+        '''
+        Returns the move an arrow makes in the selected shift mode, direction is 'left' or 'right'
+        The left arrow is a logical shift <== unless the move set has an arithmetic one, the right arrow depends on the mode
+        '''
+
+        if self.mode not in (ARITHMETIC_SHIFT, LOGICAL_SHIFT):
+            raise ValueError('select a shift mode before shifting')
+        if direction == 'left':
+            if self.mode == ARITHMETIC_SHIFT and 'arithmetic_shift_mul' in self.move_set:
+                return Move('arithmetic_shift_mul', 1)
+            return Move('logical_shift_mul', 1)
+        if direction == 'right':
+            if self.mode == LOGICAL_SHIFT:
+                return Move('logical_shift_div', 1)
+            return Move('arithmetic_shift_div', 1)
+        raise ValueError(f'unknown direction {direction!r}')
+
+    def shift(self, direction):
+        '''
+        Arrow click: applies the shift for the selected mode
+        '''
+
+        return self.apply(self.shift_move(direction))
+
+    def submit_mask(self, mask):
+        '''
+        Mask box: applies the typed mask with the selected mask mode, invalid input is ignored like in the gui
+        Returns True if the mask was applied
+        '''
+
+        if self.mode not in MASK_MODES:
+            raise ValueError('select a mask mode before masking')
+        if not input_valid(mask):
+            return False
+        self.apply(Move(self.mode, mask))
+        return True
+
+    # ----------------------------------------------------------------------------------------------
+    # Reading State
+
+    @property
+    def solved(self):
+        return self.state == SOLVED
+
+    @property
+    def denary(self):
+        '''
+        Two's Complement denary value of the current word, '' before the first game
+        '''
+
+        if self.current is None:
+            return ''
+        return self.current.denary
+
+    def solution_messages(self):
+        '''
+        Lines describing the quickest solution from start to target
+        '''
+
+        position = (self.start, self.target)
+        if self._solution[0] != position:
+            self._solution = (position, solution_messages(self.start, self.target, self.move_set))
+        return self._solution[1]
+
+    def hint(self):
+        '''
+        Returns (moves left, best next move) from the current word to the target, (0, None) once solved
+        '''
+
+        if self.current is None:
+            raise ValueError('there is no game to hint at yet')
+        position = (self.current, self.target)
+        if self._hint[0] != position:
+            self._hint = (position, hint(self.current, self.target, self.move_set))
+        return self._hint[1]
+
+    def hint_messages(self):
+        '''
+        Lines describing the hint, for the solution panel
+        '''
+
+        moves_left, move = self.hint()
+        if move is None:
+            return ['Already solved']
+        return [f"{moves_left} move{'s' if moves_left != 1 else ''} left", 'Best next move:', move_message(move)]
+
+def input_valid(inp):
+    '''
+    Checks if mask input is valid - only contains 1s or 0s
+    '''
+
+    for chr in inp:
+        if chr != '1' and chr != '0':
+            return False
+    return True
@@ -3,9 +3,21 @@
 # ----------------------------------------------------------------------------------------------------------------------------------------------------------------------------
 # Imports
 import sys
+import time
+STARTUP_MARKS = [('start', time.perf_counter())] # before the slow imports, so they show up in the startup report
+import argparse
+import io
+import random
 import pygame
 from operations import *
-import time
+from engine import *
+from registry import CLASSIC, EXTENDED, get_operation
+from animation import INSTANT, Timeline, Tween
+from rendering import TEXT_CACHE, DirtyRenderer
+from scenes import Scene, SceneManager
+from profiler import FrameProfiler
+from replay import Recorder, Replayer
+from widgets import Button, Label, TextField, WidgetLayer
 
 # ----------------------------------------------------------------------------------------------------------------------------------------------------------------------------
 # Utility Functions
@@ -15,326 +27,427 @@ def draw_text(text, font, color, surface, x, y):
     Outputs text at the specified location, with (x,y) being the centre of the text object, using the required parameters
     '''
 
-    text_obj = font.render(text, 1, color)
+    text_obj = TEXT_CACHE.render(text, font, color) # only renders text it hasn't seen recently
     text_rect = text_obj.get_rect()
     text_rect.center = (x, y)
     surface.blit(text_obj, text_rect)    
 
-def input_valid(inp):
+def word_text(word):
     '''
-    Checks if mask input is valid - only contains 1s or 0s
+    Text for an output box, empty before the first game
     '''
 
-    for chr in inp:
-        if chr != '1' and chr != '0': 
-            return False 
-    return True
+    if word is None:
+        return ''
+    return str(word)
 
-def draw_rect_transparent(surface, colour, rect):
+def shift_animation_text(tween):
     '''
-    Draws transparent rectangles on given surface
+    Animation for shifts and other step moves, a row of the move's symbol under the current binary that grows until the move happens
     '''
 
-    shape_surf = pygame.Surface(pygame.Rect(rect).size, pygame.SRCALPHA) # makes a surface from rectangles of given rectangles, with alpha property
-    pygame.draw.rect(shape_surf, colour, shape_surf.get_rect()) # draws rectangle using surface
-    surface.blit(shape_surf, rect) 
+    if tween is None:
+        return ''
+    arrow = get_operation(tween.data.operation).symbol # < or > for shifts and rotates, ~ for NOT
+    return arrow * min(8, int(tween.progress * 9))
 
-def animation_left(shift_string, box):
+def get_font(name):
     '''
-    Animation for left shifts
+    Returns one of the game fonts ('text', 'title' or 'help'), loading it the first time it is asked for
+    The ttf file is only read from disk once, every size is made from the same bytes
     '''
 
-    time.sleep(.2)
-    if len(shift_string) < 9:
-        draw_text(shift_string, help_text_font, (0, 0, 0), SCREEN, box.centerx, box.centery + 40) # outputs animated string
-        shift_string += '<' # extends string if string animation not complete
-    else:
-        shift_string = ''
-    return shift_string
+    global _font_data
+    loaded = _fonts.get(name)
+    if loaded is None:
+        if _font_data is None:
+            with open(FONT_FILE, 'rb') as file:
+                _font_data = file.read()
+        loaded = _fonts[name] = pygame.font.Font(io.BytesIO(_font_data), FONT_SIZES[name])
+    return loaded
 
-def animation_right(shift_string, box):
+def reset_fonts():
     '''
-    Animation for right shifts
+    Forgets the loaded fonts so they load again on next use, cached text was rendered with the old fonts so it is dropped
     '''
 
-    time.sleep(0.2)
-    if len(shift_string) < 9:
-        draw_text(shift_string, help_text_font, (0, 0, 0), SCREEN, box.centerx, box.centery + 40) # outputs animated string
-        shift_string += '>' # extends string if string animation not complete
-    else:
-        shift_string = ''
-    return shift_string
+    global _help_surface
+    _fonts.clear()
+    TEXT_CACHE.clear()
+    _help_surface = None # drawn with the old fonts
 
 # ----------------------------------------------------------------------------------------------------------------------------------------------------------------------------
-# Help Screen Function
+# Help Screen
+
+HELP_LINES = [
+    ('Bitwise Manipulation Game', 'title', 50),
+    ('Change your current binary into the target binary with as few steps as possible', 'help', 140),
+    ('You can use logical shift, arithmetic shift, AND masking or OR masking to reach the target', 'help', 190),
+    ('To start the game, click the generate button and your binaries will appear', 'help', 270),
+    ('To perform a mask, select the type of mask and click the input box next to it and type the mask in', 'help', 320),
+    ('and hit enter to submit it', 'help', 370),
+    ('To perform a shift, select the mode then use the right and left arrows to shift', 'help', 450),
+    ('Switch between logical and arithmetic shift by reselecting the mode', 'help', 500),
+    ('Once you reach the target binary, the quickest solution will be shown, press H for a hint', 'help', 580),
+    ('To play again click the generate button and receive new binaries', 'help', 630),
+    ('Press TAB for instant shifts, + and - to change shift speed and ESC to cancel shifts', 'help', 680),
+    ('Press ESC to return to the game', 'help', 730),
+]
+
+_help_surface = None
+
+def help_surface():
+    '''
+    Returns the whole help screen, drawn once and kept until fonts are reloaded
+    '''
 
-def help_screen():
+    global _help_surface
+    if _help_surface is None:
+        _help_surface = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+        _help_surface.fill((20, 90, 115))
+        for text, kind, y in HELP_LINES: # drawing all messages
+            draw_text(text, get_font(kind), (255, 255, 255), _help_surface, SCREEN_WIDTH/2, y)
+    return _help_surface
+
+class HelpScene(Scene):
     '''
     Help GUI for user instructions and explanation
     '''
 
-    while True:
-
-        # drawing all messages
-        draw_text('Bitwise Manipulation Game', help_title_font, (255, 255, 255), SCREEN, SCREEN_WIDTH/2, 50)
-        draw_text('Change your current binary into the target binary with as few steps as possible', help_text_font, (255, 255, 255), SCREEN, SCREEN_WIDTH/2, 140)
-        draw_text('You can use logical shift, arithmetic shift, AND masking or OR masking to reach the target', help_text_font, (255, 255, 255), SCREEN, SCREEN_WIDTH/2, 190)
-        draw_text('To start the game, click the generate button and your binaries will appear', help_text_font, (255, 255, 255), SCREEN, SCREEN_WIDTH/2, 270)
-        draw_text('To perform a mask, select the type of mask and click the input box next to it and type the mask in', help_text_font, (255, 255, 255), SCREEN, SCREEN_WIDTH/2, 320)
-        draw_text('and hit enter to submit it', help_text_font, (255, 255, 255), SCREEN, SCREEN_WIDTH/2, 370)
-        draw_text('To perform a shift, select the mode then use the right and left arrows to shift', help_text_font, (255, 255, 255), SCREEN, SCREEN_WIDTH/2, 450)
-        draw_text('Switch between logical and arithmetic shift by reselecting the mode', help_text_font, (255, 255, 255), SCREEN, SCREEN_WIDTH/2, 500)
-        draw_text('Once you reach the target binary, the quickest solution will be shown', help_text_font, (255, 255, 255), SCREEN, SCREEN_WIDTH/2, 580)
-        draw_text('To play again click the generate button and receive new binaries', help_text_font, (255, 255, 255), SCREEN, SCREEN_WIDTH/2, 630)
-        draw_text('Press ESC to return to the game', help_text_font, (255, 255, 255), SCREEN, SCREEN_WIDTH/2, 730)
-        
-        # event loop
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT: 
-                pygame.quit()
-                sys.exit()
-
-            # escape to main window
-            if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_ESCAPE:
-                    main()
-
-        CLOCK.tick(30)
-        pygame.display.update()
-        SCREEN.fill((20, 90, 115))
+    def enter(self, manager):
+        super().enter(manager)
+        self.resume()
+
+    def resume(self):
+        SCREEN.blit(help_surface(), (0, 0))
+        pygame.display.update() # the help screen never changes, so this is its only draw
+
+    def handle_event(self, event):
+
+        # escape back to the game underneath
+        if event.type == pygame.KEYDOWN:
+            if event.key == pygame.K_ESCAPE:
+                self.manager.pop()
+
+# ----------------------------------------------------------------------------------------------------------------------------------------------------------------------------
+# Game Screen
+
+class GameScene(Scene):
+    '''
+    Main GUI screen, draws the game session and turns clicks and keys into session calls
+    '''
+
+    def __init__(self, width=None, difficulty=None, rng=random):
+
+        # game state lives in the session, the gui only keeps what it is showing
+        if width is None: # the gui's own settings, replays bring the ones they were recorded with
+            width, difficulty = WORD_WIDTH, PUZZLE_DIFFICULTY
+        self.session = GameSession(width, difficulty, rng, MOVE_SET)
+        self.show_hint = False
+        self.shifts = Timeline(ANIMATION_SPEED) # shift moves waiting for their animations to finish
+        self.renderer = DirtyRenderer(SCREEN, bg_image)
+
+        # widgets over the background's buttons and boxes, made once and updated as the game changes
+        widgets = self.widgets = WidgetLayer(get_font)
+        for name, rect, mode in (('arithmetic_shift', pygame.Rect(767, 37, 224, 43), ARITHMETIC_SHIFT), ('logical_shift', pygame.Rect(767, 88, 224, 43), LOGICAL_SHIFT),
+                                 ('or_mask', pygame.Rect(706, 161, 168, 53), OR_MASK), ('and_mask', pygame.Rect(706, 222, 168, 53), AND_MASK)):
+            widgets.add(Button(name, rect, lambda x, y, mode=mode: self.select_mode(mode)))
+        widgets.add(Button('generate', pygame.Rect(277, 701, 230, 56), self.generate))
+        widgets.add(Button('help', pygame.Rect(137, 697, 66, 66), self.open_help))
+        widgets.add(Button('left_arrow', LEFT_ARROW, lambda x, y: self.shift('left')))
+        widgets.add(Button('right_arrow', RIGHT_ARROW, lambda x, y: self.shift('right')))
+        self.mask_field = widgets.add(TextField('mask_input', pygame.Rect(897, 165, 354, 107), 'text', self.submit_mask))
+
+        # output boxes
+        current_bin_box = pygame.Rect(258, 425, 300, 50)
+        solution_output_box = pygame.Rect(767, 403, 428, 207)
+        widgets.add(Label('target', pygame.Rect(258, 267, 300, 50), 'text'))
+        widgets.add(Label('current', current_bin_box, 'text'))
+        widgets.add(Label('shift', current_bin_box.move(0, 40), 'help'))
+        widgets.add(Label('denary', pygame.Rect(1096, 59, 153, 78), 'text'))
+        widgets.add(Label('steps', pygame.Rect(1032, 630, 163, 135), 'title'))
+        widgets.add(Label('solution', solution_output_box, 'help', center=(solution_output_box.centerx, solution_output_box.top + 40), spacing=40))
+
+    def enter(self, manager):
+        super().enter(manager)
+        self.renderer.invalidate() # display background image
+        self.widgets.invalidate()
+
+    def resume(self):
+        self.renderer.invalidate() # coming back from another screen, so everything is redrawn
+        self.widgets.invalidate()
+
+    def queue_move(self, move):
+        '''
+        Animates a step move then applies it, moves made mid animation queue up behind it
+        '''
+
+        if len(self.shifts.queue) < MAX_QUEUED_SHIFTS:
+            self.shifts.play(Tween(SHIFT_ANIMATION_MS, self.finish_shift, move))
+
+    def finish_shift(self, tween):
+        session = self.session
+        if session.state == PLAYING:
+            session.apply(tween.data)
+        if session.state != PLAYING: # solved, so any queued shifts have nothing left to do
+            self.shifts.cancel()
+
+    def submit_mask(self, mask):
+        '''
+        Mask box submitted, masks straight away or, while shifts are still animating, right after them
+        so moves always happen in the order they were made, invalid input is ignored
+        '''
+
+        session = self.session
+        if not self.shifts.busy:
+            session.submit_mask(mask)
+        elif session.mode in MASK_MODES and input_valid(mask):
+            self.shifts.play(Tween(0, self.finish_shift, Move(session.mode, mask))) # no animation, just its turn in the queue
+
+    # ----------------------------------------------------------------------------------------------
+    # Input
+
+    def click(self, mx, my):
+        '''
+        Handles a left click at (mx, my)
+        '''
+
+        self.widgets.click(mx, my) # only the widgets filed in the click's grid cell are looked at
+
+    def generate(self, x, y):
+        '''
+        Generate selected, begin game
+        '''
+
+        self.mask_field.focused = False
+        self.mask_field.set('')
+        self.shifts.cancel()
+        self.session.generate()
+
+    def open_help(self, x, y):
+        '''
+        Help selected, opens the help screen on top of the game
+        '''
+
+        self.session.select(None)
+        self.mask_field.focused = False
+        self.shifts.cancel()
+        self.manager.push(HelpScene())
+
+    def select_mode(self, mode):
+        if self.session.state == PLAYING:
+            self.session.select(mode)
+            self.mask_field.focused = False
+
+    def shift(self, direction):
+        '''
+        Arrow clicked, shifts left or right in whichever shift mode is selected
+        '''
+
+        session = self.session
+        if session.state == PLAYING and session.mode in (ARITHMETIC_SHIFT, LOGICAL_SHIFT):
+            self.queue_move(session.shift_move(direction))
+
+    def handle_event(self, event):
+        shifts = self.shifts
+        typing = self.mask_field.focused and self.session.mode in MASK_MODES # a focused box with no mask mode takes no keys
+
+        # click input check, clicking the mask box focuses it
+        if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+            self.click(*event.pos)
+
+        # animation keys, while not typing a mask
+        if event.type == pygame.KEYDOWN and not typing:
+            if event.key == pygame.K_ESCAPE:
+                shifts.cancel() # drops the playing and queued shifts
+            elif event.key == pygame.K_h:
+                self.show_hint = not self.show_hint
+            elif event.key == pygame.K_TAB:
+                shifts.speed = ANIMATION_SPEED if shifts.speed == INSTANT else INSTANT
+            elif event.key in (pygame.K_EQUALS, pygame.K_PLUS, pygame.K_KP_PLUS) and shifts.speed != INSTANT:
+                shifts.speed = min(8, shifts.speed * 2)
+            elif event.key in (pygame.K_MINUS, pygame.K_KP_MINUS) and shifts.speed != INSTANT:
+                shifts.speed = max(0.25, shifts.speed / 2)
+            elif self.session.state == PLAYING:
+                self.move_key(event.key)
+
+        # mask input, RETURN submits it
+        if typing and event.type == pygame.KEYDOWN:
+            self.mask_field.key(event)
+
+    def move_key(self, key):
+        '''
+        Keys for the moves the background has no buttons for, each only works when the move set has the move
+            X  XOR mask mode    N  NOT    [ and ]  rotate left and right
+        '''
+
+        move_set = self.session.move_set
+        if key == pygame.K_x and XOR_MASK in move_set:
+            self.session.select(XOR_MASK)
+            self.mask_field.focused = False
+        elif key in MOVE_KEYS and MOVE_KEYS[key] in move_set:
+            self.queue_move(Move(MOVE_KEYS[key], 1))
+
+    # ----------------------------------------------------------------------------------------------
+    # Output
+
+    def update(self, dt):
+        self.shifts.update(dt) # moves animations on by the real time the last frame took
+
+    def draw(self):
+        session = self.session
+        widgets = self.widgets
+
+        # outputing strings and digits, setting a label to what it already shows does nothing
+        widgets['target'].set(word_text(session.target))
+        widgets['current'].set(word_text(session.current))
+        widgets['steps'].set(str(session.steps))
+        widgets['denary'].set(str(session.denary))
+        widgets['shift'].set(shift_animation_text(self.shifts.current))
+
+        # if game over, outputs the optimal solution, looked up from the precomputed solver tables
+        # while playing, the hint can be shown there instead, it is only looked up again after a move
+        if session.solved:
+            messages = session.solution_messages()
+        elif self.show_hint and session.state == PLAYING:
+            messages = session.hint_messages()
+        else:
+            messages = ()
+        widgets['solution'].set_lines(messages)
+
+        widgets.draw(self.renderer) # only the widgets that changed are redrawn
+        self.renderer.flip() # updates only the changed parts of the display
+
+# ----------------------------------------------------------------------------------------------------------------------------------------------------------------------------
+# Startup
+
+def mark(stage):
+    '''
+    Records how long startup has taken when it reaches stage
+    '''
+
+    STARTUP_MARKS.append((stage, time.perf_counter()))
+
+def startup():
+    '''
+    Initialises only the display and font subsystems (no audio, joystick etc), opens the window
+    and converts the background to the display's pixel format once so blitting it never converts again
+    Fonts are not loaded here, get_font loads each one when it is first drawn
+    '''
+
+    global CLOCK, SCREEN, bg_image
+    pygame.display.init()
+    pygame.font.init()
+    mark('pygame init')
+    SCREEN = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    pygame.display.set_caption('Bitwise Manipulation Game | Sunain Syed')
+    mark('display')
+    bg_image = pygame.image.load(BACKGROUND_FILE).convert() # the image is fully opaque, so no alpha is needed
+    mark('assets')
+    CLOCK = pygame.time.Clock()
+
+def startup_report():
+    '''
+    Lines giving the time each startup stage took and the total, in milliseconds
+    For a per module breakdown of the imports run python -X importtime gui.py
+    '''
+
+    lines = []
+    start = previous = STARTUP_MARKS[0][1]
+    for stage, moment in STARTUP_MARKS[1:]:
+        lines.append(f'{stage:<14}{(moment - previous) * 1000:>9.1f} ms')
+        previous = moment
+    lines.append(f"{'total':<14}{(previous - start) * 1000:>9.1f} ms")
+    return lines
 
 # ----------------------------------------------------------------------------------------------------------------------------------------------------------------------------
 # Main Function
 
-def main():
+def main(argv=None):
     '''
-    Main GUI function
+    Runs the game screen until the window is closed
     '''
-    
-    # button hitboxes
-    a_shift_button = pygame.Rect(767, 37, 224, 43)
-    l_shift_button = pygame.Rect(767, 88, 224, 43)
-    or_mask_button = pygame.Rect(706, 161, 168, 53)
-    and_mask_button = pygame.Rect(706, 222, 168, 53)
-    generate_button = pygame.Rect(277, 701, 230, 56)
-    help_button_box = pygame.Rect(137, 697, 66, 66)
-    mask_input_box = pygame.Rect(897, 165, 354, 107)
-
-    # booleans
-    a_shift_selected, l_shift_selected, or_mask_selected, and_mask_selected, mask_input_selected, game_active, solved, animate_left, animate_right = False, False, False, False, False, False, False, False, False
-
-    # output boxes
-    denary_output_box = pygame.Rect(1096, 59, 153, 78)
-    solution_output_box = pygame.Rect(767, 403, 428, 207)
-    steps_output_box = pygame.Rect(1032, 630, 163, 135)
-    target_bin_box = pygame.Rect(258, 267, 300, 50)
-    current_bin_box = pygame.Rect(258, 425, 300, 50)
-
-    # arrow boxes
-    left_triangle_boxes = [pygame.Rect(748, 36, 10, 96), pygame.Rect(738, 46, 10, 77), pygame.Rect(728, 54, 10, 59), pygame.Rect(718, 63, 10, 43), pygame.Rect(705, 77, 13, 15)]
-    right_triangle_boxes = [pygame.Rect(1001, 36, 10, 96), pygame.Rect(1011, 46, 10, 77), pygame.Rect(1021, 54, 10, 59), pygame.Rect(1031, 63, 10, 43), pygame.Rect(1041, 77, 13, 15)]
-
-    # output strings/digits
-    input_str = ''
-    current_binary = ''
-    target_binary = ''
-    steps = 0
-    denary = ''
-    shift_string = ''
-
-    click = False
-    while True:
-
-        # drawing invisible output and hitboxes
-        draw_rect_transparent(SCREEN, (0, 0, 0, 0), a_shift_button)
-        draw_rect_transparent(SCREEN, (0, 0, 0, 0), l_shift_button)
-        draw_rect_transparent(SCREEN, (0, 0, 0, 0), or_mask_button)
-        draw_rect_transparent(SCREEN, (0, 0, 0, 0), and_mask_button)
-        draw_rect_transparent(SCREEN, (0, 0, 0, 0), denary_output_box)
-        draw_rect_transparent(SCREEN, (0, 0, 0, 0), mask_input_box)
-        draw_rect_transparent(SCREEN, (0, 0, 0, 0), solution_output_box)
-        draw_rect_transparent(SCREEN, (0, 0, 0, 0), steps_output_box)
-        draw_rect_transparent(SCREEN, (0, 0, 0, 0), target_bin_box)
-        draw_rect_transparent(SCREEN, (0, 0, 0, 0), current_bin_box)
-        draw_rect_transparent(SCREEN, (0, 0, 0, 0), help_button_box)
-        draw_rect_transparent(SCREEN, (0, 0, 0, 0), generate_button)
-
-        # drawing left shift invisble hitboxes
-        draw_rect_transparent(SCREEN, (255, 255, 255, 0), left_triangle_boxes[0])
-        draw_rect_transparent(SCREEN, (255, 255, 255, 0), left_triangle_boxes[1])
-        draw_rect_transparent(SCREEN, (255, 255, 255, 0), left_triangle_boxes[2])
-        draw_rect_transparent(SCREEN, (255, 255, 255, 0), left_triangle_boxes[3])
-        draw_rect_transparent(SCREEN, (255, 255, 255, 0), left_triangle_boxes[4])
-
-        # drawing right shift invisible hitboxes
-        draw_rect_transparent(SCREEN, (255, 255, 255, 0), right_triangle_boxes[0])
-        draw_rect_transparent(SCREEN, (255, 255, 255, 0), right_triangle_boxes[1])
-        draw_rect_transparent(SCREEN, (255, 255, 255, 0), right_triangle_boxes[2])
-        draw_rect_transparent(SCREEN, (255, 255, 255, 0), right_triangle_boxes[3])
-        draw_rect_transparent(SCREEN, (255, 255, 255, 0), right_triangle_boxes[4])
-
-        mx, my = pygame.mouse.get_pos() # gets mouse position
-
-        # outputing strings and digits
-        draw_text(input_str, font, (0, 0, 0), SCREEN, mask_input_box.centerx, mask_input_box.centery)
-        draw_text(target_binary, font, (0, 0, 0), SCREEN, target_bin_box.centerx, target_bin_box.centery)
-        draw_text(current_binary, font, (0, 0, 0), SCREEN, current_bin_box.centerx, current_bin_box.centery)
-        draw_text(str(steps), help_title_font, (0, 0, 0), SCREEN, steps_output_box.centerx, steps_output_box.centery)
-        draw_text(denary, font, (0, 0, 0), SCREEN, denary_output_box.centerx, denary_output_box.centery)
-        denary = str(byte_to_denary(current_binary))
-
-        # end game condition
-        if current_binary == target_binary and len(current_binary) > 0:
-            solved = True
-            game_active = False
-
-        # generate selected, begin game
-        if generate_button.collidepoint(mx, my):
-            if click:
-                input_str = ''
-                current_binary = binary_generator()
-                target_binary = binary_generator()
-                if current_binary == target_binary: # recreates current binary if already equal to
-                    current_binary = binary_generator()
-                start_binary = current_binary
-                game_active = True
-                solved = False
-                steps = 0
-
-        # if help selected, open help gui
-        if help_button_box.collidepoint(mx, my):
-            if click:
-                a_shift_selected, l_shift_selected, or_mask_selected, and_mask_selected, mask_input_selected = False, False, False, False, False
-                help_screen()
-
-        # if game over
-        if solved:
-            
-            game_active = False
-            a_shift_selected, l_shift_selected, or_mask_selected, and_mask_selected, mask_input_selected = False, False, False, False, False
-
-            # possible optimal solution messages
-            solution_messages = [
-                ['Logical left shift', f'{start_binary} ==> {target_binary}'],
-                ['Logical right shift', f'{start_binary} ==> {target_binary}'],
-                ['Arithmetic right shift', f'{start_binary} ==> {target_binary}'],
-                [f'AND mask with {target_binary}', f'{start_binary} ==> {target_binary}'],
-                [f'OR mask with {target_binary}', f'{start_binary} ==> {target_binary}'],
-                ['AND mask with 00000000', f'{start_binary} ==> 00000000', f'OR mask with {target_binary}', f'00000000 ==> {target_binary}']
-            ]
-
-            # outputs appropriate message
-            x = 40
-            messages = solution_messages[solve_in_one(target_binary, start_binary)]
-            for message in messages:
-                draw_text(message, help_text_font, (0, 0, 0), SCREEN, solution_output_box.centerx, solution_output_box.top + x)
-                x += 40
-
-        # if game ongoing
-        if game_active:
-
-            # setting booleans for box clicks
-            if a_shift_button.collidepoint(mx, my):
-                if click:
-                    a_shift_selected, l_shift_selected, or_mask_selected, and_mask_selected, mask_input_selected = True, False, False, False, False
-
-            if l_shift_button.collidepoint(mx, my):
-                if click:
-                    a_shift_selected, l_shift_selected, or_mask_selected, and_mask_selected, mask_input_selected = False, True, False, False, False
-            
-            if or_mask_button.collidepoint(mx, my):
-                if click:
-                    a_shift_selected, l_shift_selected, or_mask_selected, and_mask_selected, mask_input_selected = False, False, True, False, False
-
-            if and_mask_button.collidepoint(mx, my):
-                if click:
-                    a_shift_selected, l_shift_selected, or_mask_selected, and_mask_selected, mask_input_selected = False, False, False, True, False
-
-            # checking left or right shift clicks
-            if a_shift_selected or l_shift_selected:
-
-                for box in left_triangle_boxes:
-                    if box.collidepoint(mx, my):
-                        if click:
-                            animate_left = True
-                            
-                for box in right_triangle_boxes:
-                    if box.collidepoint(mx, my):
-                        if click:
-                            animate_right = True
-
-            # animating for left shift, and shifting binary
-            if animate_left:
-                shift_string = animation_left(shift_string, current_bin_box)
-                if len(shift_string) > 8:
-                    current_binary = logical_shift_mul(current_binary, 1)
-                    steps += 1
-                    animate_left = False
-            
-            # animating for right shift, and shifting binary
-            if animate_right:
-                shift_string = animation_right(shift_string, current_bin_box)
-                if len(shift_string) > 8:
-                    if l_shift_selected:
-                        current_binary = logical_shift_div(current_binary, 1)
-                    elif a_shift_selected:
-                        current_binary = arithmetic_shift_div(current_binary, 1)
-                    steps += 1
-                    animate_right = False
-
-        # event loop
-        click = False
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT: 
-                pygame.quit()
-                sys.exit()
-            
-            # click input check
-            if event.type == pygame.MOUSEBUTTONDOWN:
-                if event.button == 1:
-                    click = True   
-
-                # check if input box selected
-                if pygame.MOUSEBUTTONDOWN and mask_input_box.collidepoint(mx, my):
-                    mask_input_selected = True
-                    input_str = ''
-            
-            # mask input
-            if or_mask_selected or and_mask_selected:
-                if mask_input_selected:
-                    if event.type == pygame.KEYDOWN:
-                        if event.key == pygame.K_BACKSPACE:
-                            input_str = input_str[:-1] # deleting
-                        elif event.key == pygame.K_RETURN: # submitting mask input
-                            mask_input_selected = False 
-                            valid_input = input_valid(input_str) # input validity check
-                            if valid_input: # performs mask
-                                if or_mask_selected:
-                                    current_binary = or_mask(current_binary, input_str) 
-                                elif and_mask_selected:
-                                    current_binary = and_mask(current_binary, input_str)
-                                steps += 1
-                            input_str = '' # resets mask input                            
-                        else:
-                            input_str += event.unicode # adds input to string
-
-        CLOCK.tick(30)
-        pygame.display.update()
-        SCREEN.blit(bg_image, (0, 0)) # display background image
+
+    parser = argparse.ArgumentParser(description='Bitwise Manipulation Game')
+    parser.add_argument('--startup-report', action='store_true', help='print how long startup took up to the first frame, then quit')
+    parser.add_argument('--profile', action='store_true', help='time every frame and show the overlay (F3 toggles it)')
+    parser.add_argument('--profile-output', metavar='FILE', help='time every frame and write the samples to a .csv or .jsonl file')
+    parser.add_argument('--record', metavar='FILE', help='save the seed, input and frame times of this game to FILE')
+    parser.add_argument('--replay', metavar='FILE', help='play a recorded game back as fast as possible and check it ends the same way')
+    args = parser.parse_args(argv)
+
+    startup()
+    profiler = None
+    if args.profile or args.profile_output:
+        profiler = FrameProfiler(FPS, args.profile_output, visible=args.profile)
+
+    # recordings and replays stand in for the clock and event queue
+    clock = recorder = replayer = get_events = None
+    if args.replay:
+        replayer = clock = Replayer(args.replay)
+        game = GameScene(replayer.width, replayer.difficulty, random.Random(replayer.seed))
+        get_events = replayer.get_events
+    else:
+        seed = random.getrandbits(64)
+        game = GameScene(rng=random.Random(seed))
+        if args.record:
+            recorder = clock = Recorder(args.record, CLOCK, seed, game.session.width, game.session.difficulty)
+            get_events = recorder.get_events
+
+    manager = SceneManager(clock or CLOCK, FPS, profiler)
+    manager.push(game)
+    if profiler is not None:
+        profiler.instrument(TEXT_CACHE, 'render', 'text')
+        profiler.instrument(pygame.display, 'update', 'display')
+        for name in ('generate', 'apply', 'submit_mask', 'solution_messages'):
+            profiler.instrument(game.session, name, 'operations')
+
+    status = 0
+    try:
+        if args.startup_report:
+            manager.run(frames=1)
+            mark('first frame')
+            print('\n'.join(startup_report()))
+        elif replayer is not None:
+            start = time.perf_counter()
+            manager.run(get_events)
+            elapsed = time.perf_counter() - start
+            print(f'replayed {replayer.frame} frames in {elapsed:.3f} s ({replayer.frame / elapsed:.0f} frames/s)')
+            problem = replayer.verify(game.session)
+            print(problem or 'final state matches the recording')
+            status = 1 if problem else 0
+        else:
+            manager.run(get_events)
+    finally:
+        if recorder is not None:
+            recorder.close(game.session)
+        if profiler is not None:
+            profiler.close()
+    pygame.quit()
+    sys.exit(status)
 
 # ----------------------------------------------------------------------------------------------------------------------------------------------------------------------------
 # Constants
 
-pygame.init()
-CLOCK = pygame.time.Clock()
 SCREEN_WIDTH = 1413
 SCREEN_HEIGHT = 796
-SCREEN = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-pygame.display.set_caption('Bitwise Manipulation Game | Sunain Syed')
-bg_image = pygame.image.load('bg_image.png')
-font = pygame.font.Font('agency-fb-bold.ttf', 60)
-help_title_font = pygame.font.Font('agency-fb-bold.ttf', 80)
-help_text_font = pygame.font.Font('agency-fb-bold.ttf', 40)
+WORD_WIDTH = DEFAULT_WIDTH # bits per binary, the output boxes are sized for 8
+PUZZLE_DIFFICULTY = None # moves in the quickest solution of generated puzzles, None for any
+FPS = 30
+SHIFT_ANIMATION_MS = 1800 # how long a shift animates for at normal speed
+ANIMATION_SPEED = 1.0 # 2 is twice as fast, INSTANT skips shift animations
+MAX_QUEUED_SHIFTS = 8
+MOVE_SET = CLASSIC # EXTENDED adds XOR, NOT, rotates and arithmetic left shift, played with the keys in GameScene.move_key
+LEFT_ARROW = ((758, 36), (758, 132), (705, 84)) # corners of the background's shift arrows, clicks are tested against the triangles
+RIGHT_ARROW = ((1001, 36), (1001, 132), (1054, 84))
+MOVE_KEYS = {pygame.K_n: 'not', pygame.K_LEFTBRACKET: 'rotate_left', pygame.K_RIGHTBRACKET: 'rotate_right'}
+BACKGROUND_FILE = 'bg_image.png'
+FONT_FILE = 'agency-fb-bold.ttf'
+FONT_SIZES = {'text': 60, 'title': 80, 'help': 40}
+CLOCK = SCREEN = bg_image = None # set by startup(), importing gui opens no window
+_fonts = {}
+_font_data = None
+mark('imports')
 
 # ----------------------------------------------------------------------------------------------------------------------------------------------------------------------------
 # Runs Program
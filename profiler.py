@@ -0,0 +1,191 @@
+# Per frame instrumentation for the Bitwise Manipulation Game gui
+
+# --------------------------------------------------------------------------------------------------
+# Imports
+
+import csv
+import json
+import time
+from collections import deque
+import pygame
+
+# --------------------------------------------------------------------------------------------------
+# Logic Rules
+
+'''
+A FrameProfiler records where each frame's time goes, in milliseconds:
+    events      handling the frame's events
+    update      moving animations on
+    draw        drawing the screen, including the text and display time below
+    text        rendering text (TextCache.render, cache hits included)
+    operations  game session calls - generating, applying moves, looking up solutions
+    display     pygame.display.update
+    frame       the whole frame, including the wait for the clock
+plus the fps pygame's clock measured against the fps the game asked for
+
+events, update and draw are timed by the SceneManager, the rest by wrapping the functions with instrument()
+Wrapped functions only count once when they call each other (submit_mask calling apply, draw_text calling render),
+and nothing is wrapped or timed unless a profiler is made, so normal play pays nothing for this
+
+F3 shows and hides an overlay with averages over the last second of frames
+The overlay is drawn between frames, so its own cost stays out of the samples
+Samples can also be streamed to a file, csv or jsonl depending on its extension, one row per frame
+'''
+
+SECTIONS = ('events', 'update', 'draw', 'text', 'operations', 'display')
+FIELDS = ('frame', 'frame_ms') + tuple(f'{section}_ms' for section in SECTIONS) + ('fps', 'target_fps')
+TOGGLE_KEY = pygame.K_F3
+PANEL_SIZE = (190, 140)
+
+# --------------------------------------------------------------------------------------------------
+# Profiler
+
+class FrameProfiler:
+    '''
+    Collects per frame section timings, draws them as an overlay and optionally streams them to a file
+    '''
+
+    def __init__(self, target_fps, output=None, visible=True, history=30):
+        self.target_fps = target_fps
+        self.visible = visible
+        self.samples = deque(maxlen=history) # most recent frames, for the overlay
+        self.frame = 0
+        self.current = None
+        self._frame_start = None
+        self._depth = dict.fromkeys(SECTIONS, 0)
+        self._patched = []
+        self._font = None
+        self._panel = None
+        self._panel_time = 0
+        self._file = self._writer = None
+        if output is not None:
+            self._open(output)
+
+    # ----------------------------------------------------------------------------------------------
+    # Timing
+
+    def start_frame(self):
+        self.current = dict.fromkeys(SECTIONS, 0.0)
+        self._frame_start = time.perf_counter()
+
+    def add(self, section, seconds):
+        self.current[section] += seconds * 1000
+
+    def end_frame(self, clock):
+        '''
+        Finishes the frame once the clock has ticked, recording it and streaming it out
+        '''
+
+        sample = {'frame': self.frame, 'frame_ms': (time.perf_counter() - self._frame_start) * 1000}
+        for section in SECTIONS:
+            sample[f'{section}_ms'] = self.current[section]
+        sample['fps'] = clock.get_fps()
+        sample['target_fps'] = self.target_fps
+        self.samples.append(sample)
+        self.frame += 1
+        self.current = None
+        if self._writer is not None:
+            self._writer(sample)
+
+    def instrument(self, owner, name, section):
+        '''
+        Replaces owner.name with a wrapper that adds its running time to section, undone by close()
+        '''
+
+        function = getattr(owner, name)
+        depth = self._depth
+        timer = time.perf_counter
+
+        def timed(*args, **kwargs):
+            if depth[section] or self.current is None: # already timed by an outer call
+                return function(*args, **kwargs)
+            depth[section] += 1
+            start = timer()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                depth[section] -= 1
+                self.current[section] += (timer() - start) * 1000
+
+        self._patched.append((owner, name, vars(owner).get(name))) # None when name comes from owner's class
+        setattr(owner, name, timed)
+        return timed
+
+    # ----------------------------------------------------------------------------------------------
+    # Output
+
+    def _open(self, path):
+        self._file = open(path, 'w', newline='')
+        if path.endswith('.jsonl'):
+            self._writer = lambda sample: self._file.write(json.dumps(sample) + '\n')
+        else:
+            writer = csv.DictWriter(self._file, FIELDS)
+            writer.writeheader()
+            self._writer = writer.writerow
+
+    def averages(self):
+        '''
+        Mean of every field over the recent frames
+        '''
+
+        if not self.samples:
+            return {}
+        return {field: sum(sample[field] for sample in self.samples) / len(self.samples) for field in FIELDS[1:]}
+
+    def overlay_lines(self):
+        average = self.averages()
+        if not average:
+            return []
+        lines = [f"fps {self.samples[-1]['fps']:.1f} / {self.target_fps}", f"frame {average['frame_ms']:.2f} ms"]
+        for section in SECTIONS:
+            lines.append(f"{section} {average[f'{section}_ms']:.2f} ms")
+        return lines
+
+    def handle_event(self, event):
+        '''
+        Returns True if the event was the overlay toggle, which the scenes never see
+        '''
+
+        if event.type == pygame.KEYDOWN and event.key == TOGGLE_KEY:
+            self.visible = not self.visible
+            return True
+        return False
+
+    def draw_overlay(self, surface):
+        '''
+        Draws the overlay panel in the top left corner, its text only changes a few times a second so it stays readable
+        Scenes redraw only what changed, so the panel is blitted every frame to stay on top
+        '''
+
+        now = time.perf_counter()
+        if self._panel is None or now - self._panel_time > 0.25:
+            if self._font is None:
+                self._font = pygame.font.Font(None, 22) # pygame's default font, so the game's fonts and text cache are untouched
+            lines = self.overlay_lines()
+            texts = [self._font.render(line, True, (255, 255, 255)) for line in lines]
+            panel = pygame.Surface(PANEL_SIZE) # fixed size, so a shorter line never leaves old pixels behind
+            panel.fill((0, 0, 0))
+            y = 6
+            for text in texts:
+                panel.blit(text, (6, y))
+                y += text.get_height()
+            self._panel = panel
+            self._panel_time = now
+        rect = surface.blit(self._panel, (0, 0))
+        pygame.display.update(rect)
+        return rect
+
+    def close(self):
+        '''
+        Puts back every instrumented function and closes the output file
+        '''
+
+        for owner, name, original in reversed(self._patched):
+            if original is None:
+                delattr(owner, name)
+            else:
+                setattr(owner, name, original)
+        self._patched.clear()
+        if self._file is not None:
+            self._file.close()
+            self._file = self._writer = None
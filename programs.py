@@ -0,0 +1,240 @@
+# Move sequences as programs, with a peephole optimiser and lookup tables
+
+# --------------------------------------------------------------------------------------------------
+# Imports
+
+from array import array
+from operations import DEFAULT_WIDTH, word_type
+from registry import LUT_WIDTH_LIMIT, get_operation, move_table, run_moves
+from solver import Move
+
+# --------------------------------------------------------------------------------------------------
+# Logic Rules
+
+'''
+A Program is a sequence of moves run one after another on a word, e.g. a player's move history
+Moves are solver.Move tuples of any operation in registry.py, but step moves can be done any number of times
+    Move('logical_shift_mul', n), Move('rotate_left', n), Move('not', n), ...
+    Move('and_mask', mask), Move('or_mask', mask), Move('xor_mask', mask) - mask is a word, a mask string or an int
+
+optimise() rewrites a program into a shorter one with the same result for every input, one move at a time:
+    moves that change nothing are dropped          shift by 0, AND all 1s, OR all 0s
+    moves before one that gives a constant         AND 0, OR all 1s, shifting every bit out
+    logical shifts the same way add up             <== 2, <== 3  ==>  <== 5
+    a logical shift undone by the opposite one     <== 3, ==> 3  ==>  AND 00011111
+    any run of ANDs and ORs is one AND then one OR, and just the OR when the AND only clears bits the OR sets
+        (value & A) | O, so OR 1100, AND 0101 ==> AND 0001, OR 0100
+    XORs add up, and a NOT next to one is XOR with all 1s    XOR 1100, NOT  ==>  XOR 0011
+    rotates add up, whichever way they turn                 rotate left 3, rotate right 1  ==>  rotate left 2
+Arithmetic shifts keep the original sign bit, so two of them are not one longer arithmetic shift and are never fused
+
+A program's redundant moves are the ones optimise() removes, which is how moves are scored
+Running a program over lots of values uses its lookup table, every input's output for the width,
+built once and cached, so any number of values costs one table lookup each (bytes.translate for bytes)
+Building a table costs about one run per entry, so run_many only builds it for batches of at least
+2**width values and runs smaller batches move by move (a 16 bit table takes ~80 ms)
+'''
+
+SHIFTS = ('logical_shift_mul', 'logical_shift_div', 'arithmetic_shift_div', 'arithmetic_shift_mul')
+MASKS = ('and_mask', 'or_mask')
+ROTATES = ('rotate_left', 'rotate_right')
+
+# --------------------------------------------------------------------------------------------------
+# Running Moves
+
+def _operand(move, width):
+    '''
+    Returns the move with an int operand, mask strings are packed with zeros like the gui's mask box
+    '''
+
+    operation, operand = move
+    registered = get_operation(operation)
+    if not registered.takes_mask:
+        if operand < 0:
+            raise ValueError(f'{operation} cannot be done a negative number of times, got {operand}')
+        return Move(operation, registered.normalise(int(operand), width)) # e.g. shifting further changes nothing more
+    if isinstance(operand, str):
+        return Move(operation, word_type(width).from_mask(operand).value)
+    return Move(operation, int(operand) & ((1 << width) - 1))
+
+# --------------------------------------------------------------------------------------------------
+# Peephole Optimiser
+
+def _mask_moves(keep, forced, mask):
+    '''
+    Fewest moves giving (value & keep) | forced
+    '''
+
+    if keep | forced == mask: # the AND only clears bits the OR sets again
+        return [Move('or_mask', forced)] if forced else []
+    moves = [Move('and_mask', keep & ~forced)]
+    if forced:
+        moves.append(Move('or_mask', forced))
+    return moves
+
+def _fuse(first, second, width):
+    '''
+    Returns moves doing first then second, or None if they do not combine
+    '''
+
+    mask = (1 << width) - 1
+    (operation, operand), (next_operation, next_operand) = first, second
+
+    if operation in MASKS and next_operation in MASKS:
+        keep, forced = (operand, 0) if operation == 'and_mask' else (mask, operand)
+        if next_operation == 'and_mask':
+            keep &= next_operand
+            forced &= next_operand
+        else:
+            forced |= next_operand
+        return _mask_moves(keep, forced, mask)
+
+    if {operation, next_operation} <= {'xor_mask', 'not'}:
+        flips = (operand if operation == 'xor_mask' else mask) ^ (next_operand if next_operation == 'xor_mask' else mask)
+        return [Move('xor_mask', flips)]
+    if operation in ROTATES and next_operation in ROTATES:
+        if operation == next_operation:
+            return [Move(operation, (operand + next_operand) % width)]
+        return [Move(operation, (operand - next_operand) % width)]
+
+    if operation == next_operation and operation in ('logical_shift_mul', 'logical_shift_div'):
+        return [Move(operation, operand + next_operand)]
+    if operand == next_operand and {operation, next_operation} == {'logical_shift_mul', 'logical_shift_div'}:
+        if operation == 'logical_shift_mul':
+            return [Move('and_mask', mask >> operand)] # bits shifted out the top are lost
+        return [Move('and_mask', (mask << operand) & mask)] # bits shifted out the bottom are lost
+    return None
+
+def _simplify(move, width):
+    '''
+    Rewrites a single move that shifts every bit out as the mask it amounts to, None if the move does nothing
+    '''
+
+    operation, operand = move
+    if not get_operation(operation).takes_mask:
+        if operand == 0:
+            return None
+        if operation in SHIFTS and operand >= width:
+            if operation.startswith('arithmetic'):
+                return _simplify(Move('and_mask', 1 << (width - 1)), width) # only the sign bit survives
+            return Move('and_mask', 0)
+    elif operation == 'and_mask' and operand == (1 << width) - 1:
+        return None
+    elif operation in ('or_mask', 'xor_mask') and operand == 0:
+        return None
+    return move
+
+def _push(moves, move, width):
+    '''
+    Adds move to the end of the optimised moves, fusing it into the moves before it where possible
+    '''
+
+    move = _simplify(move, width)
+    if move is None:
+        return
+    operation, operand = move
+    if (operation == 'and_mask' and operand == 0) or (operation == 'or_mask' and operand == (1 << width) - 1):
+        moves.clear() # the result is the same whatever came before
+    if moves:
+        fused = _fuse(moves[-1], move, width)
+        if fused is not None and fused != [moves[-1], move]:
+            moves.pop()
+            for fused_move in fused:
+                _push(moves, fused_move, width)
+            return
+    moves.append(move)
+
+# --------------------------------------------------------------------------------------------------
+# Programs
+
+class Program:
+    '''
+    An immutable sequence of moves for words of one width, callable on a word or an int
+    '''
+
+    __slots__ = ('moves', 'width')
+
+    def __init__(self, moves=(), width=DEFAULT_WIDTH):
+        object.__setattr__(self, 'moves', tuple(_operand(move, width) for move in moves))
+        object.__setattr__(self, 'width', width)
+
+    def __setattr__(self, name, value):
+        raise AttributeError('programs are immutable')
+
+    def __len__(self):
+        return len(self.moves)
+
+    def __iter__(self):
+        return iter(self.moves)
+
+    def __eq__(self, other):
+        if other.__class__ is self.__class__:
+            return self.moves == other.moves and self.width == other.width
+        return NotImplemented
+
+    def __hash__(self):
+        return hash((self.moves, self.width))
+
+    def __repr__(self):
+        return f'Program({list(self.moves)!r}, width={self.width})'
+
+    def __call__(self, value):
+        '''
+        Runs the program on a word, giving a word, or on an int, giving an int
+        '''
+
+        if isinstance(value, int):
+            return run_moves(self.moves, value, self.width)
+        return value.__class__(run_moves(self.moves, value.value, self.width))
+
+    def optimise(self):
+        '''
+        Returns the shortest program the peephole rules find with the same result for every input
+        '''
+
+        moves = []
+        for move in self.moves:
+            _push(moves, move, self.width)
+        return Program(moves, self.width)
+
+    @property
+    def redundant(self):
+        '''
+        Number of moves the optimiser removes
+        '''
+
+        return len(self.moves) - len(self.optimise().moves)
+
+    def table(self):
+        '''
+        Returns the program's output for every input, indexed by input value, built once per program and cached
+        '''
+
+        if self.width > LUT_WIDTH_LIMIT:
+            raise ValueError(f'lookup tables go up to {LUT_WIDTH_LIMIT} bits, got {self.width}')
+        return move_table(self.moves, self.width)
+
+    def run_many(self, values):
+        '''
+        Runs the program on many int values, bytes in give bytes out for 8 bit programs
+        Batches too small to pay for the lookup table are run move by move instead
+        '''
+
+        width = self.width
+        if width > LUT_WIDTH_LIMIT:
+            return [run_moves(self.moves, value, width) for value in values]
+        bytes_in = width <= 8 and isinstance(values, (bytes, bytearray))
+        if len(values) < 1 << width: # measured break even is 0.7 to 0.85 * 2**width values for 8 and 16 bits
+            outputs = [run_moves(self.moves, value, width) for value in values]
+            return values.__class__(outputs) if bytes_in else array('B' if width <= 8 else 'H', outputs)
+        table = self.table()
+        if bytes_in:
+            return values.translate(table)
+        return array('B' if width <= 8 else 'H', map(table.__getitem__, values))
+
+def compile_moves(moves, width=DEFAULT_WIDTH):
+    '''
+    Returns the optimised program for a sequence of moves
+    '''
+
+    return Program(moves, width).optimise()
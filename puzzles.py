@@ -0,0 +1,295 @@
+# Puzzle generation by difficulty
+
+# --------------------------------------------------------------------------------------------------
+# Imports
+
+import hashlib
+import random
+from array import array
+from operator import itemgetter
+from operations import DEFAULT_WIDTH, word_type
+from registry import CLASSIC, move_set_key, on_register
+from solver import TABLE_WIDTH_LIMIT, has_closed_form, solver_tables
+from tables import load_or_build
+
+try:
+    import numpy as np # optional, batches are drawn and checked as whole arrays when it is there
+except ImportError:
+    np = None
+
+# --------------------------------------------------------------------------------------------------
+# Logic Rules
+
+'''
+A puzzle's difficulty is the optimal number of moves from its start to its target
+
+The solver's distance table is turned around into a reverse reachability index:
+for every target, the starts that are exactly k moves away from it
+Each difficulty keeps its pairs in one pool, grouped by target:
+    starts_k[i], targets_k[i]        the i-th puzzle of difficulty k
+    offsets_k[target]                where target's starts begin in the pool
+so a puzzle of difficulty k is one random index into the pool, with no rejection sampling
+
+The index is cached on disk next to the solver tables, and only exists for widths the solver tabulates
+Each move set (see registry.py) has its own index, pairs its moves can't solve are in no pool
+Wider puzzles of any difficulty are drawn straight from getrandbits, with the target offset from the start so they never match
+
+A PuzzleGenerator is a seeded source of puzzles, so a seed always gives the same puzzles
+    stream(n) is another generator whose seed is derived from this one's, for independent workers or tests
+    batch(count) fills a pair of arrays with count puzzles at once, millions at a time
+Batches are cut from single blocks of random bytes: words, or 64 bit draws modulo the pool size for picks from the index,
+numpy (when installed) does the picking and the start == target checks over whole arrays
+The draws are the same either way, so a seed gives the same batch with or without numpy
+A move set with no closed form can't solve every pair, so even difficulty None picks from its index
+'''
+
+# --------------------------------------------------------------------------------------------------
+# Reverse Reachability Index
+
+def _build_index(width, move_set):
+    '''
+    Groups every (start, target) pair by its distance, then by target
+    '''
+
+    distances = solver_tables(width, move_set)[0]
+    states = 1 << width
+    depth = max(distance for distance in distances if distance != 0xFF) + 1
+    item = 'B' if width <= 8 else 'H'
+    starts = [array(item) for _ in range(depth)]
+    targets = [array(item) for _ in range(depth)]
+    offsets = [array('I') for _ in range(depth)]
+
+    for target in range(states):
+        for k in range(depth):
+            offsets[k].append(len(starts[k]))
+        for start in range(states):
+            k = distances[start * states + target]
+            if k < depth:
+                starts[k].append(start)
+                targets[k].append(target)
+    for k in range(depth):
+        offsets[k].append(len(starts[k]))
+
+    index = {}
+    for k in range(depth):
+        index[f'starts_{k}'] = starts[k]
+        index[f'targets_{k}'] = targets[k]
+        index[f'offsets_{k}'] = offsets[k]
+    return index
+
+_INDEXES = {}
+on_register(_INDEXES.clear)
+
+def difficulty_index(width=DEFAULT_WIDTH, move_set=CLASSIC):
+    '''
+    Returns the reverse reachability index for a width and move set, loading or building it on first use
+    '''
+
+    if width > TABLE_WIDTH_LIMIT:
+        raise ValueError(f'difficulty is only indexed up to {TABLE_WIDTH_LIMIT} bits, got {width}')
+    key = move_set_key(move_set)
+    index = _INDEXES.get((width, key))
+    if index is None:
+        kind = f'puzzles-{key}' if key else 'puzzles'
+        index = _INDEXES[width, key] = load_or_build(kind, width, lambda: _build_index(width, move_set))
+    return index
+
+def max_difficulty(width=DEFAULT_WIDTH, move_set=CLASSIC):
+    '''
+    Longest optimal solution of any puzzle at this width
+    '''
+
+    index = difficulty_index(width, move_set)
+    return sum(1 for name in index if name.startswith('starts_')) - 1
+
+def puzzle_count(k, width=DEFAULT_WIDTH, move_set=CLASSIC):
+    '''
+    Number of (start, target) pairs whose optimal solution is exactly k moves
+    '''
+
+    starts = difficulty_index(width, move_set).get(f'starts_{k}')
+    return len(starts) if starts is not None else 0
+
+def starts_at_distance(target, k, width=DEFAULT_WIDTH, move_set=CLASSIC):
+    '''
+    Returns every start whose optimal solution to target is exactly k moves
+    '''
+
+    index = difficulty_index(width, move_set)
+    if f'starts_{k}' not in index:
+        return []
+    cls = word_type(width)
+    offsets = index[f'offsets_{k}']
+    target = target.value
+    return [cls(start) for start in index[f'starts_{k}'][offsets[target]:offsets[target + 1]]]
+
+# --------------------------------------------------------------------------------------------------
+# Generating Puzzles
+
+def puzzle_of_difficulty(k, width=DEFAULT_WIDTH, rng=random, move_set=CLASSIC):
+    '''
+    Returns a random (start, target) pair of words whose optimal solution is exactly k moves
+    '''
+
+    count = puzzle_count(k, width, move_set)
+    if not count:
+        raise ValueError(f'there are no {width} bit puzzles of difficulty {k}, the hardest is {max_difficulty(width, move_set)}')
+    index = difficulty_index(width, move_set)
+    cls = word_type(width)
+    i = rng.randrange(count)
+    return cls(index[f'starts_{k}'][i]), cls(index[f'targets_{k}'][i])
+
+def random_puzzle(width=DEFAULT_WIDTH, rng=random, move_set=CLASSIC):
+    '''
+    Returns a random unsolved (start, target) pair, every solvable pair with start != target equally likely
+    '''
+
+    if width > TABLE_WIDTH_LIMIT:
+        cls = word_type(width)
+        mask = cls.MASK
+        start = rng.getrandbits(width)
+        return cls(start), cls((start + 1 + rng.randrange(mask)) & mask) # any target except the start
+
+    counts = [puzzle_count(k, width, move_set) for k in range(1, max_difficulty(width, move_set) + 1)]
+    i = rng.randrange(sum(counts))
+    for k, count in enumerate(counts, 1):
+        if i < count:
+            index = difficulty_index(width, move_set)
+            cls = word_type(width)
+            return cls(index[f'starts_{k}'][i]), cls(index[f'targets_{k}'][i])
+        i -= count
+
+# --------------------------------------------------------------------------------------------------
+# Bulk Generation
+
+_ARRAY_TYPES = ((8, 'B'), (16, 'H'), (32, 'I'), (64, 'Q'))
+
+def _array_type(width):
+    for bits, item in _ARRAY_TYPES:
+        if width <= bits:
+            return bits, item
+    raise ValueError(f'batches hold words of up to 64 bits, got {width}')
+
+def _random_array(rng, count, item):
+    '''
+    count random items of an array type from one rng.randbytes() call, the same with or without numpy
+    '''
+
+    words = array(item)
+    words.frombytes(rng.randbytes(count * words.itemsize))
+    return words
+
+class PuzzleGenerator:
+    '''
+    Seeded puzzle source, difficulty None gives any unsolved puzzle and k gives puzzles exactly k moves long
+    '''
+
+    def __init__(self, seed=None, width=DEFAULT_WIDTH, difficulty=None, move_set=CLASSIC):
+        if seed is None:
+            seed = random.SystemRandom().getrandbits(64) # kept in self.seed so the run can be repeated
+        if difficulty is not None:
+            if difficulty < 1:
+                raise ValueError(f'puzzles need at least 1 move, got difficulty {difficulty}')
+            if not puzzle_count(difficulty, width, move_set):
+                raise ValueError(f'there are no {width} bit puzzles of difficulty {difficulty}, the hardest is {max_difficulty(width, move_set)}')
+        self.seed = seed
+        self.width = width
+        self.difficulty = difficulty
+        self.move_set = move_set
+        self.rng = random.Random(seed)
+        self._pool = None
+
+    def stream(self, n):
+        '''
+        Returns the n-th independent generator derived from this one's seed, the same n always gives the same stream
+        '''
+
+        digest = hashlib.blake2b(f'{self.seed}/{n}'.encode(), digest_size=8).digest()
+        return PuzzleGenerator(int.from_bytes(digest, 'little'), self.width, self.difficulty, self.move_set)
+
+    def puzzle(self):
+        '''
+        Returns one (start, target) pair of words
+        '''
+
+        if self.difficulty is None:
+            return random_puzzle(self.width, self.rng, self.move_set)
+        return puzzle_of_difficulty(self.difficulty, self.width, self.rng, self.move_set)
+
+    def __iter__(self):
+        while True:
+            yield self.puzzle()
+
+    def batch(self, count):
+        '''
+        Returns count puzzles as two arrays of ints, starts and targets, with starts[i] != targets[i]
+        '''
+
+        if self.difficulty is not None or (self.width <= TABLE_WIDTH_LIMIT and not has_closed_form(self.move_set)):
+            return self._indexed_batch(count) # only the index knows which pairs these moves can solve
+
+        bits, item = _array_type(self.width)
+        starts = self._words(count, item)
+        targets = self._words(count, item)
+        if np is not None:
+            start_words = np.frombuffer(starts, f'u{bits // 8}')
+            target_words = np.frombuffer(targets, f'u{bits // 8}') # writes go through to targets
+            clashes = np.flatnonzero(start_words == target_words)
+            while len(clashes): # redrawing only the clashes keeps every unsolved pair equally likely
+                target_words[clashes] = np.frombuffer(self._words(len(clashes), item), f'u{bits // 8}')
+                clashes = clashes[start_words[clashes] == target_words[clashes]]
+        else:
+            clashes = [i for i, (start, target) in enumerate(zip(starts, targets)) if start == target]
+            while clashes: # the same draws in the same order as above, so a seed gives the same batch either way
+                for i, target in zip(clashes, self._words(len(clashes), item)):
+                    targets[i] = target
+                clashes = [i for i in clashes if starts[i] == targets[i]]
+        return starts, targets
+
+    def _words(self, count, item):
+        '''
+        count random words in an array, whole bytes at a time, cut down to the width when it doesn't fill the items
+        '''
+
+        words = _random_array(self.rng, count, item)
+        if self.width < 8 * words.itemsize:
+            mask = (1 << self.width) - 1 # the low bits of random bytes are random words of the width
+            if np is not None:
+                np.frombuffer(words, f'u{words.itemsize}')[:] &= mask
+            else:
+                words = array(item, [word & mask for word in words])
+        return words
+
+    def _pools(self):
+        '''
+        The (starts, targets) pool this generator picks from, the difficulty's or every difficulty's one after another
+        '''
+
+        if self._pool is None:
+            index = difficulty_index(self.width, self.move_set)
+            if self.difficulty is not None:
+                self._pool = index[f'starts_{self.difficulty}'], index[f'targets_{self.difficulty}']
+            else:
+                item = _array_type(self.width)[1]
+                ks = range(1, max_difficulty(self.width, self.move_set) + 1) # the same order random_puzzle() counts in
+                self._pool = tuple(array(item, b''.join(bytes(index[f'{name}_{k}']) for k in ks)) for name in ('starts', 'targets'))
+        return self._pool
+
+    def _indexed_batch(self, count):
+        '''
+        count random picks from the index pool, every index drawn from one block of random bytes
+        '''
+
+        starts, targets = self._pools()
+        item = _array_type(self.width)[1]
+        n = len(starts)
+        draws = _random_array(self.rng, count, 'Q')
+        if np is not None:
+            picks = np.frombuffer(draws, np.uint64) % np.uint64(n) # a bias of at most n / 2**64, far below sampling noise
+            dtype = np.uint8 if item == 'B' else np.uint16
+            return tuple(array(item, np.frombuffer(pool, dtype)[picks].tobytes()) for pool in (starts, targets))
+        picks = [draw % n for draw in draws]
+        if count < 2: # itemgetter only returns a tuple for two or more picks
+            return array(item, [starts[i] for i in picks]), array(item, [targets[i] for i in picks])
+        pick = itemgetter(*picks)
+        return array(item, pick(starts)), array(item, pick(targets))
@@ -0,0 +1,312 @@
+# Registry of the moves the Bitwise Manipulation Game knows about
+
+# --------------------------------------------------------------------------------------------------
+# Imports
+
+import hashlib
+from array import array
+from functools import lru_cache
+
+# --------------------------------------------------------------------------------------------------
+# Logic Rules
+
+'''
+Every move is declared once here, as an Operation, and everything else (engine, solver, programs, batch tools, gui)
+looks moves up by name instead of knowing them itself
+
+An operation's function takes (value, operand, width) and only uses <<, >>, &, |, ^ and ints,
+so the same function works on one int and on a whole numpy array of words at once
+    step operations  operand is how many times to do it, the game's moves always do it once
+                     shifts, rotates, NOT
+    mask operations  operand is the mask
+                     AND, OR, XOR
+Each operation is compiled to lookup tables the first time they are asked for, one entry per input word,
+and a step operation's table is its whole effect, so running it on many words is a table lookup
+
+The solver needs every word one move reaches, whether one move gets from a word to another and the mask it takes,
+an operation can declare quicker ways to find those and otherwise they are found by trying every mask
+    reachable(state)        AND reaches the subsets of the word, OR the supersets
+    reaches(start, after)   AND when after only has 1s start has, like the functions it works on whole arrays too
+    mask_for(start, after)  the mask that does it, after for AND and OR, start ^ after for XOR
+
+A move set is a tuple of operation names, in the order the solver prefers them when two moves are equally good
+    CLASSIC   the game's five moves
+    EXTENDED  the five plus XOR, NOT, rotates and arithmetic left shift
+Tables cached on disk are named by move_set_key(), a hash of each operation's fingerprint (its functions' bytecode),
+so replacing an operation with one that behaves differently gives new tables instead of serving the old ones
+register() also clears every in-memory cache hooked up with on_register()
+Arithmetic shifts keep the original sign bit in place, both ways, as arithmetic_shift_div always has
+'''
+
+LUT_WIDTH_LIMIT = 16 # widest words that get lookup tables, 65536 entries
+
+# --------------------------------------------------------------------------------------------------
+# Operations
+
+class Operation:
+    '''
+    One move: its function and how it is shown, plus optional quicker ways for the solver to reason about it
+    '''
+
+    __slots__ = ('name', 'function', 'label', 'symbol', 'takes_mask', 'normalise', 'reaches', 'mask_for', 'fingerprint', '_reachable', '_declared')
+
+    def __init__(self, name, function, label, symbol='', takes_mask=False, normalise=None, reachable=None, reaches=None, mask_for=None):
+        self.name = name
+        self.function = function
+        self.label = label # solution panel text, {} is replaced by the mask
+        self.symbol = symbol # the gui's animation arrow
+        self.takes_mask = takes_mask
+        self.normalise = normalise or _clamp
+        self._reachable = reachable
+        self._declared = reaches is not None
+
+        # reaches(start, after, width) - True if one move takes start to after, works on numpy arrays when declared
+        # mask_for(start, after, width) - the mask that move takes, only meaningful when reaches() is True
+        if not takes_mask:
+            self.reaches = lambda start, after, width: function(start, 1, width) == after
+        else:
+            self.reaches = reaches or (lambda start, after, width: self.operand_between(start, after, width) is not None)
+        self.mask_for = mask_for or self.operand_between
+        self.fingerprint = _fingerprint(name, takes_mask, function, reachable)
+
+    def __call__(self, value, operand, width):
+        return self.function(value, operand, width)
+
+    def __repr__(self):
+        return f'Operation({self.name!r})'
+
+    def table(self, width, operand=1):
+        '''
+        Returns this operation's output for every input word, bytes up to 8 bits and an array('H') up to 16
+        '''
+
+        if width > LUT_WIDTH_LIMIT:
+            raise ValueError(f'lookup tables go up to {LUT_WIDTH_LIMIT} bits, got {width}')
+        return move_table(((self.name, operand),), width)
+
+    def reachable(self, state, width):
+        '''
+        Every word this operation reaches from state in one move, as a 2**width bit integer
+        '''
+
+        if not self.takes_mask:
+            return 1 << self.function(state, 1, width)
+        if self._reachable is not None:
+            return self._reachable(state, width)
+        bits = 0
+        for mask in range(1 << width):
+            bits |= 1 << self.function(state, mask, width)
+        return bits
+
+    def operand_between(self, start, after, width):
+        '''
+        Returns the operand of a single move of this operation from start to after, or None if there isn't one
+        '''
+
+        if not self.takes_mask:
+            return 1 if self.function(start, 1, width) == after else None
+        if self._declared:
+            return self.mask_for(start, after, width) if self.reaches(start, after, width) else None
+        for mask in range(1 << width):
+            if self.function(start, mask, width) == after:
+                return mask
+        return None
+
+OPERATIONS = {}
+_CACHE_CLEARERS = []
+
+def register(operation):
+    '''
+    Adds an operation to the registry, replacing any operation with the same name
+    '''
+
+    OPERATIONS[operation.name] = operation
+    move_table.cache_clear() # tables of any earlier operation with the name are stale
+    for clear in _CACHE_CLEARERS:
+        clear()
+    return operation
+
+def on_register(clear):
+    '''
+    Calls clear() whenever an operation is registered, for caches built from the registry's operations
+    '''
+
+    _CACHE_CLEARERS.append(clear)
+
+def get_operation(name):
+    operation = OPERATIONS.get(name)
+    if operation is None:
+        raise ValueError(f'unknown move {name!r}')
+    return operation
+
+def run_moves(moves, value, width):
+    '''
+    Runs a sequence of (name, operand) moves on an int value
+    '''
+
+    for name, operand in moves:
+        value = OPERATIONS[name].function(value, operand, width)
+    return value
+
+@lru_cache(maxsize=512)
+def move_table(moves, width):
+    '''
+    Every input's output of a tuple of (name, operand) moves, bytes up to 8 bits so bytes.translate can use it,
+    an array('H') up to 16, built once and cached
+    '''
+
+    outputs = [run_moves(moves, value, width) for value in range(1 << width)]
+    if width <= 8:
+        return bytes(outputs).ljust(256, b'\0') # bytes.translate needs all 256 entries
+    return array('H', outputs)
+
+def move_set_key(move_set):
+    '''
+    Short name for a move set, used to keep its solver tables apart from other move sets' on disk
+    The game's own five moves, unreplaced, are '', anything else a hash of the operations' fingerprints
+    '''
+
+    fingerprints = [get_operation(name).fingerprint for name in sorted(move_set)]
+    if fingerprints == _CLASSIC_FINGERPRINTS:
+        return ''
+    return hashlib.blake2b(','.join(fingerprints).encode(), digest_size=4).hexdigest()
+
+def _hash_code(code, digest):
+    digest.update(code.co_code)
+    digest.update(repr(code.co_names).encode())
+    for constant in code.co_consts:
+        if hasattr(constant, 'co_code'): # a nested function or comprehension
+            _hash_code(constant, digest)
+        elif isinstance(constant, frozenset):
+            digest.update(repr(sorted(map(repr, constant))).encode()) # set order changes between runs
+        else:
+            digest.update(repr(constant).encode())
+
+def _fingerprint(name, takes_mask, *functions):
+    '''
+    Hex digest of what an operation does: its name and the bytecode of its function and reachable()
+    The same code gives the same fingerprint in every run, so it can name files on disk
+    '''
+
+    digest = hashlib.blake2b(f'{name}:{takes_mask}'.encode(), digest_size=8)
+    for function in functions:
+        code = getattr(function, '__code__', None)
+        if code is not None:
+            _hash_code(code, digest)
+        elif function is not None: # a builtin or other callable, known by name only
+            digest.update(getattr(function, '__qualname__', type(function).__qualname__).encode())
+    return digest.hexdigest()
+
+# --------------------------------------------------------------------------------------------------
+# Operand Handling
+
+def _clamp(operand, width):
+    return min(operand, width) # shifting further changes nothing more
+
+def _wrap(operand, width):
+    return operand % width # rotating by the width is a full turn
+
+def _parity(operand, width):
+    return operand & 1 # NOT twice changes nothing
+
+# --------------------------------------------------------------------------------------------------
+# Built In Operations
+
+def logical_shift_mul(value, places, width):
+    if places >= width:
+        return value & 0 # keeps arrays arrays, numpy doesn't define shifts past the word
+    return (value << places) & ((1 << width) - 1)
+
+def logical_shift_div(value, places, width):
+    if places >= width:
+        return value & 0
+    return value >> places
+
+def arithmetic_shift_div(value, places, width):
+    sign = 1 << (width - 1)
+    if places >= width:
+        return value & sign
+    return (value >> places) & (sign - 1) | value & sign
+
+def arithmetic_shift_mul(value, places, width):
+    sign = 1 << (width - 1)
+    if places >= width:
+        return value & sign
+    return (value << places) & (sign - 1) | value & sign
+
+def rotate_left(value, places, width):
+    places %= width
+    if not places:
+        return value
+    return ((value << places) | (value >> (width - places))) & ((1 << width) - 1)
+
+def rotate_right(value, places, width):
+    places %= width
+    if not places:
+        return value
+    return ((value >> places) | (value << (width - places))) & ((1 << width) - 1)
+
+def not_word(value, times, width):
+    if times & 1:
+        return value ^ ((1 << width) - 1)
+    return value
+
+def and_mask(value, mask, width):
+    return value & mask
+
+def or_mask(value, mask, width):
+    return value | mask
+
+def xor_mask(value, mask, width):
+    return value ^ mask
+
+def _subsets(state, width):
+    '''
+    AND with every mask reaches exactly the words whose 1s are a subset of state's 1s
+    '''
+
+    bits = 0
+    sub = state
+    while True:
+        bits |= 1 << sub
+        if not sub:
+            return bits
+        sub = (sub - 1) & state
+
+def _supersets(state, width):
+    '''
+    OR with every mask reaches exactly the words whose 1s are a superset of state's 1s
+    '''
+
+    bits = 0
+    free = ~state & ((1 << width) - 1)
+    sub = free
+    while True:
+        bits |= 1 << (state | sub)
+        if not sub:
+            return bits
+        sub = (sub - 1) & free
+
+def _everything(state, width):
+    return (1 << (1 << width)) - 1 # XOR reaches every word
+
+def _mask_is_after(start, after, width):
+    return after
+
+register(Operation('logical_shift_mul', logical_shift_mul, 'Logical left shift', '<'))
+register(Operation('logical_shift_div', logical_shift_div, 'Logical right shift', '>'))
+register(Operation('arithmetic_shift_div', arithmetic_shift_div, 'Arithmetic right shift', '>'))
+register(Operation('arithmetic_shift_mul', arithmetic_shift_mul, 'Arithmetic left shift', '<'))
+register(Operation('rotate_left', rotate_left, 'Rotate left', '<', normalise=_wrap))
+register(Operation('rotate_right', rotate_right, 'Rotate right', '>', normalise=_wrap))
+register(Operation('not', not_word, 'NOT', '~', normalise=_parity))
+register(Operation('and_mask', and_mask, 'AND mask with {}', takes_mask=True, reachable=_subsets,
+                   reaches=lambda start, after, width: after & ~start == 0, mask_for=_mask_is_after))
+register(Operation('or_mask', or_mask, 'OR mask with {}', takes_mask=True, reachable=_supersets,
+                   reaches=lambda start, after, width: start & ~after == 0, mask_for=_mask_is_after))
+register(Operation('xor_mask', xor_mask, 'XOR mask with {}', takes_mask=True, reachable=_everything,
+                   reaches=lambda start, after, width: after == after, mask_for=lambda start, after, width: start ^ after))
+
+CLASSIC = ('or_mask', 'and_mask', 'arithmetic_shift_div', 'logical_shift_div', 'logical_shift_mul')
+EXTENDED = CLASSIC + ('xor_mask', 'not', 'rotate_left', 'rotate_right', 'arithmetic_shift_mul')
+_CLASSIC_FINGERPRINTS = [OPERATIONS[name].fingerprint for name in sorted(CLASSIC)] # the built in five, keyed ''
@@ -0,0 +1,157 @@
+# Dirty rectangle rendering for the Bitwise Manipulation Game
+
+# --------------------------------------------------------------------------------------------------
+# Imports
+
+from collections import OrderedDict
+import pygame
+
+# --------------------------------------------------------------------------------------------------
+# Logic Rules
+
+'''
+The background image never changes, only a handful of text regions on top of it do
+(binary boxes, denary box, steps counter, mask input, solution panel, shift animation)
+
+Each frame the gui hands every region its current content, and the renderer only touches regions whose content changed:
+    1. the damaged area is the union of where the region's old text was and where its new text goes
+    2. the background is copied back over the damaged area
+    3. every region overlapping the damaged area is re-blitted, clipped to it, so neighbours never lose pixels
+    4. flip() passes just the damaged rects to pygame.display.update
+When nothing changes a frame draws nothing and updates nothing
+
+Rendering text is the slow part of drawing it, so rendered text surfaces are kept in a bounded LRU cache
+shared by every screen, keyed by text, font and colour (each font object is one face at one size)
+Unchanged text then only costs a blit, the cache only needs clearing when fonts are reloaded
+'''
+
+# --------------------------------------------------------------------------------------------------
+# Text Cache
+
+class TextCache:
+    '''
+    Least recently used cache of rendered text surfaces, with hit and miss counters
+    '''
+
+    def __init__(self, max_size=256):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._surfaces = OrderedDict()
+
+    def render(self, text, font, colour):
+        '''
+        Returns font.render(text, 1, colour), rendering only the first time it is asked for
+        The surface is shared, so callers must only blit it and never draw on it
+        '''
+
+        key = (text, font, colour)
+        text_obj = self._surfaces.get(key)
+        if text_obj is not None:
+            self.hits += 1
+            self._surfaces.move_to_end(key)
+            return text_obj
+
+        self.misses += 1
+        text_obj = self._surfaces[key] = font.render(text, 1, colour)
+        if len(self._surfaces) > self.max_size:
+            self._surfaces.popitem(last=False) # drops the least recently used surface
+        return text_obj
+
+    def clear(self):
+        '''
+        Forgets every surface, needed whenever fonts are reloaded
+        '''
+
+        self._surfaces.clear()
+
+    def stats(self):
+        return {'size': len(self._surfaces), 'max_size': self.max_size, 'hits': self.hits, 'misses': self.misses}
+
+TEXT_CACHE = TextCache()
+
+# --------------------------------------------------------------------------------------------------
+# Renderer
+
+class DirtyRenderer:
+    '''
+    Draws named text regions over a fixed background, redrawing and flipping only what changed
+    '''
+
+    def __init__(self, surface, background, text_cache=TEXT_CACHE):
+        self.surface = surface
+        self.background = background
+        self.text_cache = text_cache
+        self._regions = {} # name -> (content, bounding rect, [(text surface, rect)])
+        self._dirty = []
+
+    def invalidate(self):
+        '''
+        Redraws the whole background, every region is drawn again the next time it is given content
+        '''
+
+        self.surface.blit(self.background, (0, 0))
+        self._regions.clear()
+        self._dirty = [self.surface.get_rect()]
+
+    def text(self, name, text, font, colour, center):
+        '''
+        Shows a single line of text centred on center
+        '''
+
+        self.lines(name, (text,), font, colour, center, 0)
+
+    def lines(self, name, lines, font, colour, center, spacing):
+        '''
+        Shows lines of text, the first centred on center and each next one spacing pixels lower
+        '''
+
+        content = (tuple(lines), font, colour, center, spacing)
+        region = self._regions.get(name)
+        if region is not None and region[0] == content:
+            return # unchanged, nothing to draw
+
+        blits = []
+        x, y = center
+        for line in lines:
+            if line:
+                text_obj = self.text_cache.render(line, font, colour)
+                blits.append((text_obj, text_obj.get_rect(center=(x, y))))
+            y += spacing
+        bounds = blits[0][1].unionall([rect for _, rect in blits[1:]]) if blits else None
+        self._regions[name] = (content, bounds, blits)
+
+        damage = [rect for rect in (region and region[1], bounds) if rect is not None]
+        if damage:
+            self._repair(damage[0].unionall(damage[1:]))
+
+    def clear(self, name):
+        '''
+        Takes a region off the screen, restoring the background under it
+        '''
+
+        region = self._regions.pop(name, None)
+        if region is not None and region[1] is not None:
+            self._repair(region[1])
+
+    def _repair(self, damage):
+        '''
+        Restores the background over damage and redraws every region that overlaps it
+        '''
+
+        self.surface.blit(self.background, damage, damage)
+        self.surface.set_clip(damage)
+        for _, bounds, blits in self._regions.values():
+            if bounds is not None and bounds.colliderect(damage):
+                self.surface.blits(blits, doreturn=False)
+        self.surface.set_clip(None)
+        self._dirty.append(damage)
+
+    def flip(self):
+        '''
+        Pushes only the damaged rects to the display
+        '''
+
+        if self._dirty:
+            pygame.display.update(self._dirty)
+            self._dirty = []
@@ -0,0 +1,189 @@
+# Input recording and replay for the Bitwise Manipulation Game gui
+
+# --------------------------------------------------------------------------------------------------
+# Imports
+
+import struct
+import time
+import pygame
+from engine import IDLE, PLAYING, SOLVED
+
+# --------------------------------------------------------------------------------------------------
+# Logic Rules
+
+'''
+Everything a game does follows from three things: the seed of its random number generator,
+the events it was handed and how many milliseconds each frame took (animations move on by frame time)
+A Recorder saves those as it plays, and a Replayer hands them back so the same game plays out again
+
+Both stand in for the clock and the event source of a SceneManager:
+    recorder = Recorder(path, CLOCK, seed, width, difficulty)
+    SceneManager(recorder, FPS).run(recorder.get_events)
+A Replayer's tick returns each recorded frame time straight away, so replays run as fast as the cpu allows
+with no frame cap, and the animations still finish on exactly the same frames they did when recorded
+
+Log format, little endian:
+    header   magic 'BMGR', version, seed (8 bytes), word width (2 bytes), difficulty (1 byte, -1 for any)
+    records  one tag byte then its fields
+        'M'  mouse button down: button (1 byte), x, y (2 bytes each)
+        'K'  key down: key (4 bytes), length of its text (1 byte), its text as utf-8
+        'Q'  window closed
+        'F'  end of a frame: milliseconds it took (2 bytes)
+        'E'  end of the log: session state (1 byte), steps (4 bytes), then start, current and target words
+Only the events the game reacts to are kept, so a minute of play is a few kilobytes
+'''
+
+MAGIC = b'BMGR'
+VERSION = 1
+HEADER = struct.Struct('<4sBQHb')
+MOUSE = struct.Struct('<Bhh')
+KEY = struct.Struct('<iB')
+FRAME = struct.Struct('<H')
+END = struct.Struct('<BI')
+STATES = (IDLE, PLAYING, SOLVED)
+
+# --------------------------------------------------------------------------------------------------
+# Utility Functions
+
+def session_state(session):
+    '''
+    The parts of a game session a replay has to reproduce, as plain values
+    '''
+
+    words = [word.value if word is not None else 0 for word in (session.start, session.current, session.target)]
+    return (session.state, session.steps, *words)
+
+def _word_size(width):
+    return (width + 7) // 8
+
+# --------------------------------------------------------------------------------------------------
+# Recording
+
+class Recorder:
+    '''
+    Wraps a pygame clock and the event queue, logging events, frame times and the final state to path
+    '''
+
+    def __init__(self, path, clock, seed, width, difficulty=None):
+        self.clock = clock
+        self.width = width
+        self._file = open(path, 'wb')
+        self._file.write(HEADER.pack(MAGIC, VERSION, seed, width, -1 if difficulty is None else difficulty))
+
+    def get_events(self):
+        events = pygame.event.get()
+        write = self._file.write
+        for event in events:
+            if event.type == pygame.MOUSEBUTTONDOWN:
+                write(b'M' + MOUSE.pack(event.button, *event.pos))
+            elif event.type == pygame.KEYDOWN:
+                text = event.unicode.encode('utf-8')[:255]
+                write(b'K' + KEY.pack(event.key, len(text)) + text)
+            elif event.type == pygame.QUIT:
+                write(b'Q')
+        return events
+
+    def tick(self, fps=0):
+        dt = self.clock.tick(fps)
+        self._file.write(b'F' + FRAME.pack(min(dt, 0xFFFF)))
+        return dt
+
+    def get_fps(self):
+        return self.clock.get_fps()
+
+    def close(self, session):
+        '''
+        Writes the session's final state, for the replay to check against, and closes the log
+        '''
+
+        state, steps, *words = session_state(session)
+        size = _word_size(self.width)
+        self._file.write(b'E' + END.pack(STATES.index(state), steps) + b''.join(word.to_bytes(size, 'little') for word in words))
+        self._file.close()
+
+# --------------------------------------------------------------------------------------------------
+# Replaying
+
+class Replayer:
+    '''
+    Reads a log and plays it back as a clock and event source, one recorded frame per tick
+    '''
+
+    def __init__(self, path):
+        with open(path, 'rb') as file:
+            data = file.read()
+        magic, version, self.seed, self.width, difficulty = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f'{path} is not a version {VERSION} replay log')
+        self.difficulty = None if difficulty < 0 else difficulty
+        self.frames, self.final = self._parse(data, HEADER.size)
+        self.frame = 0
+        self._started = None
+
+    def _parse(self, data, offset):
+        '''
+        Splits the records into a list of (events, milliseconds) frames, and the final state if the log has one
+        '''
+
+        frames = []
+        events = []
+        final = None
+        while offset < len(data):
+            tag = data[offset:offset + 1]
+            offset += 1
+            if tag == b'M':
+                button, x, y = MOUSE.unpack_from(data, offset)
+                offset += MOUSE.size
+                events.append(pygame.event.Event(pygame.MOUSEBUTTONDOWN, button=button, pos=(x, y)))
+            elif tag == b'K':
+                key, length = KEY.unpack_from(data, offset)
+                offset += KEY.size
+                text = data[offset:offset + length].decode('utf-8')
+                offset += length
+                events.append(pygame.event.Event(pygame.KEYDOWN, key=key, unicode=text, mod=0))
+            elif tag == b'Q':
+                events.append(pygame.event.Event(pygame.QUIT))
+            elif tag == b'F':
+                frames.append((events, FRAME.unpack_from(data, offset)[0]))
+                offset += FRAME.size
+                events = []
+            elif tag == b'E':
+                state, steps = END.unpack_from(data, offset)
+                offset += END.size
+                size = _word_size(self.width)
+                words = [int.from_bytes(data[offset + i * size:offset + (i + 1) * size], 'little') for i in range(3)]
+                final = (STATES[state], steps, *words)
+                break
+            else:
+                raise ValueError(f'corrupt replay log, unknown record {tag!r} at byte {offset - 1}')
+        if events: # the frame the window was closed on never ticked
+            frames.append((events, 0))
+        return frames, final
+
+    def get_events(self):
+        if self._started is None:
+            self._started = time.perf_counter()
+        if self.frame >= len(self.frames):
+            return [pygame.event.Event(pygame.QUIT)] # log ran out, stop the game
+        return self.frames[self.frame][0]
+
+    def tick(self, fps=0):
+        dt = self.frames[self.frame][1]
+        self.frame += 1
+        return dt
+
+    def get_fps(self):
+        elapsed = time.perf_counter() - self._started if self._started is not None else 0
+        return self.frame / elapsed if elapsed else 0.0
+
+    def verify(self, session):
+        '''
+        Returns None if the session ended where the recording did, or a message saying how it differs
+        '''
+
+        if self.final is None:
+            return 'the log has no final state to check against'
+        replayed = session_state(session)
+        if replayed != self.final:
+            return f'replay ended as {replayed}, recording ended as {self.final}'
+        return None
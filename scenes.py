@@ -0,0 +1,156 @@
+# Scene stack for switching between gui screens
+
+# --------------------------------------------------------------------------------------------------
+# Imports
+
+import time
+import pygame
+
+# --------------------------------------------------------------------------------------------------
+# Logic Rules
+
+'''
+Each screen is a Scene, and the SceneManager runs the one on top of its stack
+Opening a screen pushes it and closing it pops it, so the screen underneath resumes exactly as it was left
+(a game in progress survives a trip to the help screen) and nothing ever recurses, however often screens switch
+
+Every frame the manager:
+    1. hands each event to the top scene's handle_event, and stops on pygame.QUIT
+    2. calls update(dt) with the milliseconds the last frame took
+    3. calls draw(), which is responsible for updating the display
+    4. waits on the clock to keep the frame rate
+With a profiler every step is timed as well, see profiler.py
+'''
+
+# --------------------------------------------------------------------------------------------------
+# Scenes
+
+class Scene:
+    '''
+    Base class for screens, every hook does nothing by default
+    '''
+
+    def enter(self, manager):
+        '''
+        Called when the scene is pushed
+        '''
+
+        self.manager = manager
+
+    def resume(self):
+        '''
+        Called when the scene above this one is popped, e.g. to redraw the whole screen
+        '''
+
+    def exit(self):
+        '''
+        Called when the scene is popped
+        '''
+
+    def handle_event(self, event):
+        pass
+
+    def update(self, dt):
+        pass
+
+    def draw(self):
+        pass
+
+class SceneManager:
+    '''
+    Runs a stack of scenes, only the top one gets events, updates and draws
+    '''
+
+    def __init__(self, clock, fps, profiler=None):
+        self.clock = clock
+        self.fps = fps
+        self.profiler = profiler # a profiler.FrameProfiler to time every frame, or None
+        self.stack = []
+        self.running = False
+
+    @property
+    def top(self):
+        if self.stack:
+            return self.stack[-1]
+        return None
+
+    def push(self, scene):
+        self.stack.append(scene)
+        scene.enter(self)
+
+    def pop(self):
+        scene = self.stack.pop()
+        scene.exit()
+        if self.stack:
+            self.stack[-1].resume()
+        return scene
+
+    def quit(self):
+        self.running = False
+
+    def run(self, get_events=None, frames=None):
+        '''
+        Runs frames until the stack is empty or a pygame.QUIT event arrives, or for a given number of frames
+        get_events defaults to pygame.event.get, replays can hand in their own event source
+        '''
+
+        get_events = get_events or pygame.event.get
+        if self.profiler is not None:
+            return self._run_profiled(get_events, frames)
+        self.running = True
+        dt = 0
+        while self.running and self.stack and frames != 0:
+            for event in get_events():
+                if event.type == pygame.QUIT:
+                    self.running = False
+                    break
+                self.top.handle_event(event)
+                if not self.stack:
+                    break
+            if not self.running or not self.stack:
+                break
+            self.top.update(dt)
+            self.top.draw()
+            dt = self.clock.tick(self.fps) # milliseconds since the last frame
+            if frames is not None:
+                frames -= 1
+
+    def _run_profiled(self, get_events, frames):
+        '''
+        The same loop as run, timing each step with the profiler and drawing its overlay between frames
+        Kept separate so unprofiled frames pay nothing for it
+        '''
+
+        profiler = self.profiler
+        timer = time.perf_counter
+        self.running = True
+        dt = 0
+        while self.running and self.stack and frames != 0:
+            profiler.start_frame()
+            start = timer()
+            for event in get_events():
+                if event.type == pygame.QUIT:
+                    self.running = False
+                    break
+                if profiler.handle_event(event):
+                    if not profiler.visible:
+                        self.top.resume() # redraws the screen the overlay was covering
+                    continue
+                self.top.handle_event(event)
+                if not self.stack:
+                    break
+            if not self.running or not self.stack:
+                break
+            profiler.add('events', timer() - start)
+            start = timer()
+            self.top.update(dt)
+            profiler.add('update', timer() - start)
+            start = timer()
+            self.top.draw()
+            profiler.add('draw', timer() - start)
+            dt = self.clock.tick(self.fps)
+            profiler.end_frame(self.clock)
+            if profiler.visible:
+                profiler.draw_overlay(pygame.display.get_surface())
+            if frames is not None:
+                frames -= 1
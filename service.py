@@ -0,0 +1,433 @@
+# Local HTTP/JSON service for solving and grading Bitwise Manipulation Game moves
+
+# --------------------------------------------------------------------------------------------------
+# Imports
+
+import argparse
+import asyncio
+import json
+import os
+import signal
+from http import HTTPStatus
+from string import hexdigits
+from engine import MODES
+from operations import DEFAULT_WIDTH, word_type
+from programs import Program
+from registry import get_operation
+from sessions import SessionLimitError, SessionStore
+from solver import Move, closed_form_distance, move_between
+
+try:
+    import numpy as np # optional, solves are batched into array passes when it is there
+except ImportError:
+    np = None
+
+# --------------------------------------------------------------------------------------------------
+# Logic Rules
+
+'''
+A small asyncio HTTP/1.1 server so many clients (e.g. classroom dashboards) can use the game logic at once
+Every endpoint takes a POST with a json body, binaries are strings as in operations.py, width defaults to 8:
+    /apply   {"binary": "10111000", "moves": [["logical_shift_div", 1], ["and_mask", "1111"]]}
+             ==> {"binary": "00001100", "denary": 12}
+    /denary  {"binary": "10111000"}  ==> {"denary": -72}
+    /solve   {"start": "10111000", "target": "01011100"}
+             ==> {"distance": 1, "moves": [["logical_shift_div", 1]]}
+    GET /health ==> {"status": "ok"}
+Bad input gets a 400 with {"error": message}
+
+Games are hosted too, kept in a sessions.SessionStore, and take the same actions the gui does:
+    POST /games                    starts a game ==> {"id": "...", "state": "playing", "start": ..., "steps": 0, ...}
+    GET /games/<id>                the game as it stands
+    POST /games/<id>               one action, the reply is the game after it:
+        {"select": "logical_shift"}  {"shift": "left"}  {"mask": "1010"}
+        {"move": ["and_mask", "1010"]}  {"generate": true}
+    DELETE /games/<id>             ends a game
+Unknown games get a 404, malformed ids a 400, moves the game does not allow a 409, and a full store a 503
+Operands are non-negative numbers, or binary strings for masks, anything else is a 400
+
+Solve and apply requests arriving within a few milliseconds of each other are handled as one batch:
+solves go through the solver's closed form as one numpy array pass per width (a plain loop without numpy),
+and only the 1 move pairs need their move looked up, and applies sharing a move list run together,
+through that program's lookup table once there are enough of them to pay for building it (programs.py),
+so a burst of clients costs one pass rather than one per request
+Denary conversion needs no table, so it is answered straight away
+
+Connections are kept alive between requests (HTTP/1.1 default, or Connection: keep-alive on HTTP/1.0)
+until the client closes them or they sit idle too long, and past max_connections new ones get a 503
+'''
+
+MAX_BODY = 1 << 20
+MAX_HEADER = 16 * 1024
+
+# --------------------------------------------------------------------------------------------------
+# Batching
+
+class Batcher:
+    '''
+    Collects items submitted within window seconds of the first one and handles them with one call
+    handle_batch takes a list of items and returns a list of results in the same order
+    '''
+
+    def __init__(self, handle_batch, window=0.002, max_batch=1024):
+        self.handle_batch = handle_batch
+        self.window = window
+        self.max_batch = max_batch
+        self.batches = 0
+        self.items = 0
+        self._pending = []
+        self._timer = None
+
+    async def submit(self, item):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        pending, self._pending = self._pending, []
+        if not pending:
+            return
+        self.batches += 1
+        self.items += len(pending)
+        try:
+            results = self.handle_batch([item for item, _ in pending])
+        except Exception as error: # a broken batch fails every request in it rather than leaving them waiting
+            results = [error] * len(pending)
+        for (_, future), result in zip(pending, results):
+            if future.done(): # the client went away
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+def _move_json(move):
+    operation, operand = move
+    return [operation, operand if isinstance(operand, int) else str(operand)]
+
+def _distances(pairs, width):
+    '''
+    The closed form's distance for every (start, target) pair of one width, as a list
+    '''
+
+    if np is None:
+        return [closed_form_distance(start.value, target.value, width) for start, target in pairs]
+    dtype = next(dtype for bits, dtype in ((8, np.uint8), (16, np.uint16), (32, np.uint32), (64, np.uint64)) if width <= bits)
+    starts = np.fromiter((start.value for start, _ in pairs), dtype, len(pairs))
+    targets = np.fromiter((target.value for _, target in pairs), dtype, len(pairs))
+    return closed_form_distance(starts, targets, width).tolist()
+
+def solve_batch(pairs):
+    '''
+    Solves a list of (start, target) words, the same solutions as solver.solve
+    Distances come from the closed form a width at a time, then 1 move pairs look their move up,
+    and 2 move pairs are always AND 0 then OR target
+    '''
+
+    results = [None] * len(pairs)
+    by_width = {}
+    for i, (start, _) in enumerate(pairs):
+        by_width.setdefault(start.WIDTH, []).append(i)
+
+    for width, indexes in by_width.items():
+        for i, distance in zip(indexes, _distances([pairs[i] for i in indexes], width)):
+            start, target = pairs[i]
+            if distance == 0:
+                moves = []
+            elif distance == 1:
+                moves = [_move_json(move_between(start, target))]
+            else:
+                moves = [['and_mask', str(start.__class__(0))], ['or_mask', str(target)]]
+            results[i] = {'distance': distance, 'moves': moves}
+    return results
+
+def apply_batch(items):
+    '''
+    Runs a list of (program, word) items, words sharing a program are run together
+    '''
+
+    results = [None] * len(items)
+    by_program = {}
+    for i, (program, word) in enumerate(items):
+        by_program.setdefault(program, []).append(i)
+
+    for program, indexes in by_program.items():
+        words = [items[i][1] for i in indexes]
+        values = program.run_many([word.value for word in words]) # only big groups build the lookup table
+        for i, word, value in zip(indexes, words, values):
+            after = word.__class__(value)
+            results[i] = {'binary': str(after), 'denary': after.denary}
+    return results
+
+# --------------------------------------------------------------------------------------------------
+# Requests
+
+def _width(body):
+    width = body.get('width', DEFAULT_WIDTH)
+    if isinstance(width, bool) or not isinstance(width, int) or not 1 <= width <= 64: # json true would be width 1
+        raise ValueError('width must be a whole number from 1 to 64')
+    return width
+
+def _word(body, name, width):
+    binary = body.get(name)
+    if not isinstance(binary, str) or not binary or binary.strip('01'):
+        raise ValueError(f'{name} must be a binary string')
+    if len(binary) > width:
+        raise ValueError(f'{name} is longer than {width} bits')
+    return word_type(width).from_string(binary)
+
+def _moves(body):
+    moves = body.get('moves')
+    if not isinstance(moves, list) or not all(isinstance(move, list) and len(move) == 2 for move in moves):
+        raise ValueError('moves must be a list of [operation, operand] pairs')
+    for operation, operand in moves:
+        if isinstance(operand, bool) or not isinstance(operand, (int, str)):
+            raise ValueError(f'operand {operand!r} must be a number or a binary string')
+        if isinstance(operand, int) and operand < 0: # a mask would wrap into the word, a step count makes no sense
+            raise ValueError(f'operand {operand} must not be negative')
+        if not isinstance(operation, str):
+            raise ValueError(f'operation {operation!r} must be a move name')
+        takes_mask = get_operation(operation).takes_mask
+        if isinstance(operand, str) and (not takes_mask or operand.strip('01')):
+            raise ValueError(f'operand {operand!r} of {operation} is not valid')
+    return moves
+
+def _action(body):
+    '''
+    Turns a game action's json body into a SessionStore.play action
+    '''
+
+    if not isinstance(body, dict) or len(body) != 1:
+        raise ValueError('send exactly one of select, shift, mask, move or generate')
+    (kind, argument), = body.items()
+    if kind == 'move':
+        if not isinstance(argument, list) or len(argument) != 2:
+            raise ValueError('move must be an [operation, operand] pair')
+        argument = Move(*_moves({'moves': [argument]})[0])
+    elif kind == 'mask' and not isinstance(argument, str):
+        raise ValueError('mask must be a binary string')
+    elif kind == 'select' and argument is not None and argument not in MODES:
+        raise ValueError(f'unknown mode {argument!r}')
+    elif kind == 'shift' and argument not in ('left', 'right'):
+        raise ValueError("shift must be 'left' or 'right'")
+    elif kind not in ('select', 'shift', 'mask', 'move', 'generate'):
+        raise ValueError(f'unknown action {kind!r}')
+    return kind, argument
+
+def _game_json(session_id, session):
+    return {
+        'id': f'{session_id:016x}',
+        'state': session.state,
+        'start': str(session.start) if session.start is not None else None,
+        'current': str(session.current) if session.current is not None else None,
+        'target': str(session.target) if session.target is not None else None,
+        'denary': session.denary,
+        'steps': session.steps,
+        'mode': session.mode,
+    }
+
+class SolveService:
+    '''
+    The HTTP server, routing requests to the batchers
+    '''
+
+    def __init__(self, window=0.002, max_connections=256, keep_alive=5.0, store=None):
+        self.max_connections = max_connections
+        self.keep_alive = keep_alive # seconds an idle connection is kept open
+        self.connections = 0
+        self.requests = 0
+        self.solver = Batcher(solve_batch, window)
+        self.applier = Batcher(apply_batch, window)
+        self.store = store if store is not None else SessionStore()
+
+    async def route(self, method, path, body):
+        '''
+        Returns (status, json payload) for a request
+        '''
+
+        if path == '/health':
+            batched = {name: {'batches': batcher.batches, 'items': batcher.items} for name, batcher in (('solve', self.solver), ('apply', self.applier))}
+            games = {'games': len(self.store), 'max_games': self.store.max_sessions, 'memory': self.store.memory}
+            return HTTPStatus.OK, {'status': 'ok', 'connections': self.connections, 'requests': self.requests, 'batched': batched, 'games': games}
+        if path == '/games' or path.startswith('/games/'):
+            return self.route_game(method, path, body)
+        if path not in ('/apply', '/denary', '/solve'):
+            return HTTPStatus.NOT_FOUND, {'error': f'no endpoint {path}'}
+        if method != 'POST':
+            return HTTPStatus.METHOD_NOT_ALLOWED, {'error': f'{path} only takes POST'}
+
+        try:
+            body = json.loads(body or b'{}')
+            if not isinstance(body, dict):
+                raise ValueError('the body must be a json object')
+            width = _width(body)
+            if path == '/denary':
+                return HTTPStatus.OK, {'denary': _word(body, 'binary', width).denary}
+            if path == '/solve':
+                pair = (_word(body, 'start', width), _word(body, 'target', width))
+                return HTTPStatus.OK, await self.solver.submit(pair)
+            item = (Program(_moves(body), width), _word(body, 'binary', width))
+            return HTTPStatus.OK, await self.applier.submit(item)
+        except ValueError as error: # json.JSONDecodeError is a ValueError too
+            return HTTPStatus.BAD_REQUEST, {'error': str(error)}
+
+    def route_game(self, method, path, body):
+        store = self.store
+        if path == '/games':
+            if method != 'POST':
+                return HTTPStatus.METHOD_NOT_ALLOWED, {'error': '/games only takes POST'}
+            try:
+                session_id = store.create()
+            except SessionLimitError as error:
+                return HTTPStatus.SERVICE_UNAVAILABLE, {'error': str(error)}
+            return HTTPStatus.CREATED, _game_json(session_id, store.session(session_id))
+
+        text = path[len('/games/'):]
+        if not 0 < len(text) <= 16 or text.strip(hexdigits): # int() would also take a sign, 0x and underscores
+            return HTTPStatus.BAD_REQUEST, {'error': 'game ids are up to 16 hexadecimal digits'}
+        session_id = int(text, 16)
+        try:
+            if method == 'GET':
+                return HTTPStatus.OK, _game_json(session_id, store.session(session_id))
+            if method == 'DELETE':
+                store.remove(session_id)
+                return HTTPStatus.OK, {'id': f'{session_id:016x}', 'deleted': True}
+            if method != 'POST':
+                return HTTPStatus.METHOD_NOT_ALLOWED, {'error': 'games take GET, POST or DELETE'}
+        except KeyError:
+            return HTTPStatus.NOT_FOUND, {'error': f'no game {text}'}
+
+        try:
+            body = json.loads(body or b'{}')
+            action = _action(body)
+        except ValueError as error:
+            return HTTPStatus.BAD_REQUEST, {'error': str(error)}
+        try:
+            return HTTPStatus.OK, _game_json(session_id, store.play(session_id, action))
+        except KeyError:
+            return HTTPStatus.NOT_FOUND, {'error': f'no game {session_id:016x}'}
+        except ValueError as error:
+            return HTTPStatus.CONFLICT, {'error': str(error)}
+
+    async def evict_idle_games(self):
+        '''
+        Evicts idle games a few times per idle timeout, for as long as the server runs
+        '''
+
+        while True:
+            await asyncio.sleep(max(1.0, self.store.idle_timeout / 4))
+            self.store.evict_idle()
+
+    async def handle_connection(self, reader, writer):
+        if self.connections >= self.max_connections:
+            await self._respond(writer, HTTPStatus.SERVICE_UNAVAILABLE, {'error': 'too many connections'}, False)
+            writer.close()
+            return
+
+        self.connections += 1
+        try:
+            while True:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), self.keep_alive)
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, asyncio.TimeoutError, ConnectionError):
+                    break # closed, idle for too long or sending nonsense
+
+                try:
+                    request_line, *header_lines = head.decode('latin-1').split('\r\n')
+                    method, path, version = request_line.split(' ', 2)
+                    headers = {}
+                    for line in header_lines:
+                        if line:
+                            name, value = line.split(':', 1)
+                            headers[name.strip().lower()] = value.strip()
+                    length = int(headers.get('content-length', 0))
+                    if length < 0:
+                        raise ValueError('negative Content-Length')
+                except ValueError:
+                    await self._respond(writer, HTTPStatus.BAD_REQUEST, {'error': 'malformed request'}, False)
+                    break
+                if length > MAX_BODY:
+                    await self._respond(writer, HTTPStatus.REQUEST_ENTITY_TOO_LARGE, {'error': 'body too large'}, False)
+                    break
+                try:
+                    body = await reader.readexactly(length)
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+
+                connection = headers.get('connection', '').lower()
+                keep_alive = connection != 'close' if version == 'HTTP/1.1' else connection == 'keep-alive'
+                self.requests += 1
+                status, payload = await self.route(method, path.split('?', 1)[0], body)
+                await self._respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        finally:
+            self.connections -= 1
+            writer.close()
+
+    async def _respond(self, writer, status, payload, keep_alive):
+        body = json.dumps(payload).encode()
+        head = (
+            f'HTTP/1.1 {status.value} {status.phrase}\r\n'
+            f'Content-Type: application/json\r\n'
+            f'Content-Length: {len(body)}\r\n'
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+        )
+        if keep_alive:
+            head += f'Keep-Alive: timeout={int(self.keep_alive)}\r\n'
+        writer.write(head.encode('latin-1') + b'\r\n' + body)
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+
+    async def serve(self, host='127.0.0.1', port=8765):
+        server = await asyncio.start_server(self.handle_connection, host, port, limit=MAX_HEADER)
+        evicting = asyncio.create_task(self.evict_idle_games())
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            evicting.cancel()
+
+def _terminate(signum, frame):
+    raise KeyboardInterrupt
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Serves the game logic over HTTP/JSON')
+    parser.add_argument('--host', default='127.0.0.1', help='address to listen on (default 127.0.0.1, this machine only)')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--window-ms', type=float, default=2.0, help='how long to gather requests into one batch (default 2)')
+    parser.add_argument('--max-connections', type=int, default=256)
+    parser.add_argument('--keep-alive', type=float, default=5.0, help='seconds to keep an idle connection open (default 5)')
+    parser.add_argument('--game-timeout', type=float, default=600, help='seconds before an untouched game is evicted (default 600)')
+    parser.add_argument('--game-memory-mb', type=float, default=64, help='memory cap for hosted games (default 64)')
+    parser.add_argument('--snapshot', metavar='FILE', help='restore games from FILE at start and save them to it on exit')
+    args = parser.parse_args(argv)
+
+    store = SessionStore(idle_timeout=args.game_timeout, max_bytes=int(args.game_memory_mb * (1 << 20)))
+    if args.snapshot and os.path.exists(args.snapshot):
+        store.restore(args.snapshot)
+        print(f'restored {len(store)} games from {args.snapshot}')
+    service = SolveService(args.window_ms / 1000, args.max_connections, args.keep_alive, store)
+    signal.signal(signal.SIGTERM, _terminate) # stops the way ctrl+c does, so games are still saved
+    print(f'serving on http://{args.host}:{args.port}')
+    try:
+        asyncio.run(service.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if args.snapshot:
+            store.snapshot(args.snapshot)
+            print(f'saved {len(store)} games to {args.snapshot}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,255 @@
+# Compact storage for many concurrent game sessions
+
+# --------------------------------------------------------------------------------------------------
+# Imports
+
+import random
+import time
+from array import array
+from engine import IDLE, MODES, PLAYING, SOLVED, GameSession
+from operations import DEFAULT_WIDTH
+from tables import read_tables, write_tables
+
+# --------------------------------------------------------------------------------------------------
+# Logic Rules
+
+'''
+A SessionStore keeps thousands of games without a GameSession object each:
+every field is a column in an array and a game is one slot across all of them
+    ids, starts, currents, targets, steps, states, modes, last_used
+so a game costs a few dozen bytes, and a freed slot is reused by the next new game
+
+Moves go through the engine's own rules: the slot is loaded into a GameSession, the move is applied,
+and the result is written back, so the server allows exactly what the gui allows
+
+Limits:
+    idle_timeout   games untouched for this many seconds are evicted by evict_idle()
+    max_bytes      cap on the memory the store uses, creating a game past it first evicts idle games,
+                   then fails with SessionLimitError
+snapshot() writes every game to a table file (see tables.py) and restore() reads them back,
+keeping how long each game had been idle
+'''
+
+STATES = (IDLE, PLAYING, SOLVED)
+MODE_CODES = (None,) + MODES
+ENTRY_BYTES = 112 # the id -> slot dict entry, with its int key and value
+_WORD_TYPES = ((8, 'B'), (16, 'H'), (32, 'I'), (64, 'Q'))
+
+class SessionLimitError(Exception):
+    '''
+    Raised when a new game would take the store past its memory cap
+    '''
+
+# --------------------------------------------------------------------------------------------------
+# Session Store
+
+class SessionStore:
+    '''
+    Array backed store of game sessions of one width, looked up by a random 64 bit id
+    '''
+
+    def __init__(self, width=DEFAULT_WIDTH, difficulty=None, idle_timeout=600, max_bytes=64 << 20, rng=None):
+        self.width = width
+        self.difficulty = difficulty
+        self.idle_timeout = idle_timeout
+        self.max_bytes = max_bytes
+        self.rng = rng or random.Random()
+        self._id_rng = random.SystemRandom() # ids must not be guessable from the puzzles
+        self._word_item = next(item for bits, item in _WORD_TYPES if width <= bits) if width <= 64 else None
+        if self._word_item is None:
+            raise ValueError(f'sessions store words of up to 64 bits, got {width}')
+        self._clear()
+
+    def _clear(self):
+        item = self._word_item
+        self._ids = array('Q')
+        self._starts = array(item)
+        self._currents = array(item)
+        self._targets = array(item)
+        self._steps = array('I')
+        self._states = array('B')
+        self._modes = array('B')
+        self._last_used = array('d')
+        self._slots = {} # id -> slot
+        self._free = [] # slots of evicted games, reused first
+
+    def _columns(self):
+        return (self._ids, self._starts, self._currents, self._targets, self._steps, self._states, self._modes, self._last_used)
+
+    def __len__(self):
+        return len(self._slots)
+
+    def __contains__(self, session_id):
+        return session_id in self._slots
+
+    @property
+    def slot_bytes(self):
+        return sum(column.itemsize for column in self._columns()) + ENTRY_BYTES
+
+    @property
+    def memory(self):
+        '''
+        Bytes used by every slot, free ones included
+        '''
+
+        return len(self._ids) * self.slot_bytes
+
+    @property
+    def max_sessions(self):
+        return self.max_bytes // self.slot_bytes
+
+    # ----------------------------------------------------------------------------------------------
+    # Sessions In and Out of Slots
+
+    def _load(self, slot):
+        '''
+        Returns a GameSession holding the game in slot
+        '''
+
+        session = GameSession(self.width, self.difficulty, self.rng)
+        session.state = STATES[self._states[slot]]
+        if session.state != IDLE:
+            word = session.word
+            session.start = word(self._starts[slot])
+            session.current = word(self._currents[slot])
+            session.target = word(self._targets[slot])
+        session.steps = self._steps[slot]
+        session.mode = MODE_CODES[self._modes[slot]]
+        return session
+
+    def _save(self, slot, session):
+        if session.state != IDLE:
+            self._starts[slot] = session.start.value
+            self._currents[slot] = session.current.value
+            self._targets[slot] = session.target.value
+        self._steps[slot] = session.steps
+        self._states[slot] = STATES.index(session.state)
+        self._modes[slot] = MODE_CODES.index(session.mode)
+        self._last_used[slot] = time.monotonic()
+
+    def _slot(self, session_id):
+        slot = self._slots.get(session_id)
+        if slot is None:
+            raise KeyError(f'no game {session_id:016x}')
+        return slot
+
+    # ----------------------------------------------------------------------------------------------
+    # Games
+
+    def create(self):
+        '''
+        Starts a new game and returns its id
+        '''
+
+        if len(self._slots) >= self.max_sessions:
+            self.evict_idle()
+            if len(self._slots) >= self.max_sessions:
+                raise SessionLimitError(f'the store is full at {len(self._slots)} games')
+
+        session_id = self._id_rng.getrandbits(64)
+        while session_id in self._slots:
+            session_id = self._id_rng.getrandbits(64)
+        if self._free:
+            slot = self._free.pop()
+            self._ids[slot] = session_id
+        else:
+            slot = len(self._ids)
+            for column in self._columns():
+                column.append(0)
+            self._ids[slot] = session_id
+        self._slots[session_id] = slot
+
+        session = GameSession(self.width, self.difficulty, self.rng)
+        session.generate()
+        self._save(slot, session)
+        return session_id
+
+    def session(self, session_id):
+        '''
+        Returns a GameSession copy of a game, changes to it are not stored
+        '''
+
+        return self._load(self._slot(session_id))
+
+    def play(self, session_id, action):
+        '''
+        Applies one gui action to a game, stores the result and returns the game
+        action is one of:
+            ('select', mode)        a mode button, or None to clear it
+            ('shift', direction)    an arrow, 'left' or 'right'
+            ('mask', mask)          the mask box, invalid masks are ignored like in the gui
+            ('move', move)          any single move the gui could make, e.g. Move('and_mask', '1010')
+            ('generate', None)      the generate button
+        Raises KeyError for an unknown game and ValueError for an action the game does not allow
+        '''
+
+        slot = self._slot(session_id)
+        session = self._load(slot)
+        kind, argument = action
+        if kind == 'select':
+            session.select(argument)
+        elif kind == 'shift':
+            session.shift(argument)
+        elif kind == 'mask':
+            session.submit_mask(argument)
+        elif kind == 'move':
+            session.apply(argument)
+        elif kind == 'generate':
+            session.generate()
+        else:
+            raise ValueError(f'unknown action {kind!r}')
+        self._save(slot, session)
+        return session
+
+    def remove(self, session_id):
+        slot = self._slots.pop(session_id)
+        self._ids[slot] = 0
+        self._free.append(slot)
+
+    def evict_idle(self, now=None):
+        '''
+        Removes every game untouched for idle_timeout seconds, returns how many went
+        '''
+
+        now = time.monotonic() if now is None else now
+        cutoff = now - self.idle_timeout
+        last_used = self._last_used
+        idle = [session_id for session_id, slot in self._slots.items() if last_used[slot] < cutoff]
+        for session_id in idle:
+            self.remove(session_id)
+        return len(idle)
+
+    # ----------------------------------------------------------------------------------------------
+    # Snapshots
+
+    def snapshot(self, path):
+        '''
+        Writes every game to path, packed with no free slots
+        '''
+
+        slots = sorted(self._slots.values())
+        now = time.monotonic()
+        tables = {}
+        for name, column in zip(('ids', 'starts', 'currents', 'targets', 'steps', 'states', 'modes'), self._columns()):
+            tables[name] = array(column.typecode, [column[slot] for slot in slots])
+        tables['idle'] = array('I', [min(0xFFFFFFFF, int(now - self._last_used[slot])) for slot in slots]) # seconds
+        write_tables(path, self.width, tables)
+
+    def restore(self, path):
+        '''
+        Replaces every game with the ones in a snapshot
+        Raises OSError if it can't be read and ValueError if it is for another width or damaged
+        '''
+
+        tables = read_tables(path, self.width)
+        now = time.monotonic()
+        self._clear()
+        self._ids = array('Q', tables['ids'])
+        self._starts = array(self._word_item, tables['starts'])
+        self._currents = array(self._word_item, tables['currents'])
+        self._targets = array(self._word_item, tables['targets'])
+        self._steps = array('I', tables['steps'])
+        self._states = array('B', tables['states'])
+        self._modes = array('B', tables['modes'])
+        self._last_used = array('d', [now - idle for idle in tables['idle']])
+        self._slots = {session_id: slot for slot, session_id in enumerate(self._ids)}
@@ -0,0 +1,267 @@
+# Shortest path solving for the Bitwise Manipulation Game
+
+# --------------------------------------------------------------------------------------------------
+# Imports
+
+from array import array
+from collections import namedtuple
+from operations import DEFAULT_WIDTH, word_type
+from registry import CLASSIC, OPERATIONS, move_set_key, on_register
+from tables import load_or_build
+
+# --------------------------------------------------------------------------------------------------
+# Logic Rules
+
+'''
+Every word is a state, every move in the move set (see registry.py) is an edge, for the classic game:
+    logical shift <== by 1, logical shift ==> by 1, arithmetic shift ==> by 1
+    AND mask with any mask, OR mask with any mask
+
+Closed form, for any move set with AND and OR (the classic game) or with XOR, at any width:
+    AND with 0 followed by OR with the target reaches any target from any start, XOR with start ^ target in one move
+so no solution is ever longer than 2 moves, and which of 0, 1 or 2 it is takes a few word operations:
+    0  start == target
+    1  any single move reaches target: AND when target only has 1s start has, OR when it has every 1 start has,
+       a shift when shifting start gives target - each one operation's reaches() in registry.py
+    2  anything else, solved as AND with 0 then OR with target
+Breadth first search picks that same 2 move path, 0 is the lowest word one move away from every other,
+so the closed form gives exactly the solutions the tables below do, batch.cross_check() compares every pair
+
+Move sets with neither can't use the closed form, so for small widths a breadth first search from every start
+builds two tables, once per width and move set
+    distances[start * states + target] - fewest moves from start to target
+    next_hops[start * states + target] - the word reached after the first of those moves
+Following next_hops from start to target gives an optimal move sequence without any searching
+Tables are cached on disk by tables.py and memory mapped, so they are only ever built once
+A move set without the masks may leave some targets unreachable, their distance is UNREACHABLE
+The puzzle difficulty index (puzzles.py) is built from the tables of every move set
+'''
+
+Move = namedtuple('Move', ['operation', 'operand'])
+
+TABLE_WIDTH_LIMIT = 10 # widest words that get exhaustive tables, 2**20 entries each
+UNREACHABLE = 0xFF
+
+# --------------------------------------------------------------------------------------------------
+# Move Graph
+
+def _neighbours(state, width, move_set=CLASSIC):
+    '''
+    Returns the set of words reachable from state in one move, as a 2**width bit integer
+    '''
+
+    bits = 0
+    for name in move_set:
+        bits |= OPERATIONS[name].reachable(state, width)
+    return bits & ~(1 << state) # staying put is not a move
+
+def _build_tables(width, move_set=CLASSIC):
+    '''
+    Breadth first search from every start, filling the distance and next hop tables
+    '''
+
+    states = 1 << width
+    neighbours = [_neighbours(state, width, move_set) for state in range(states)]
+    distances = bytearray([UNREACHABLE]) * (states * states)
+    next_hops = array('H', bytes(2 * states * states)) if width > 8 else bytearray(states * states)
+
+    for start in range(states):
+        row = start * states
+        distances[row + start] = 0
+        next_hops[row + start] = start
+        seen = 1 << start
+        frontier = [start]
+        depth = 0
+        while frontier:
+            depth += 1
+            new_frontier = []
+            for state in frontier:
+                fresh = neighbours[state] & ~seen
+                if not fresh:
+                    continue
+                seen |= fresh
+                hop = next_hops[row + state] # first move on the way to state
+                while fresh:
+                    low = fresh & -fresh # pops the lowest new word
+                    fresh ^= low
+                    target = low.bit_length() - 1
+                    distances[row + target] = depth
+                    next_hops[row + target] = target if depth == 1 else hop
+                    new_frontier.append(target)
+            frontier = new_frontier
+
+    return distances, next_hops
+
+def _build_file(width, move_set):
+    distances, next_hops = _build_tables(width, move_set)
+    return {'distances': distances, 'next_hops': next_hops}
+
+_TABLES = {}
+on_register(_TABLES.clear)
+
+def _cached_tables(width, move_set):
+    key = move_set_key(move_set)
+    tables = _TABLES.get((width, key))
+    if tables is None:
+        kind = f'solver-{key}' if key else 'solver'
+        tables = load_or_build(kind, width, lambda: _build_file(width, move_set)) # memory maps the cached copy
+        _TABLES[width, key] = tables
+    return tables
+
+def solver_tables(width=DEFAULT_WIDTH, move_set=CLASSIC):
+    '''
+    Returns the (distances, next_hops) tables for a width and move set, loading or building them on first use
+    Returns None for widths too wide to tabulate
+    '''
+
+    if width > TABLE_WIDTH_LIMIT:
+        return None
+    tables = _cached_tables(width, move_set)
+    return tables['distances'], tables['next_hops']
+
+# --------------------------------------------------------------------------------------------------
+# Closed Form
+
+def has_closed_form(move_set=CLASSIC):
+    '''
+    True if every puzzle is at most 2 moves with this move set, so it is solved without tables
+    '''
+
+    return ('and_mask' in move_set and 'or_mask' in move_set) or 'xor_mask' in move_set
+
+def closed_form_distance(start, target, width, move_set=CLASSIC):
+    '''
+    Fewest moves from start to target, ints or numpy arrays of words (numpy words can't be mixed with plain ints)
+    Only right for move sets with a closed form
+    '''
+
+    one_move = target != target # False, or an array of them
+    for name in move_set:
+        one_move = one_move | OPERATIONS[name].reaches(start, target, width)
+    return (start != target) * (2 - one_move)
+
+def _closed_form_path(start, target, move_set):
+    if start == target:
+        return [start]
+    if move_between(start, target, move_set) is not None:
+        return [start, target]
+    return [start, start.__class__(0), target]
+
+# --------------------------------------------------------------------------------------------------
+# Solving
+
+def move_between(start, after, move_set=CLASSIC):
+    '''
+    Returns the move that takes word start to word after in one step, or None if there isn't one
+    Prefers moves in move set order, for the classic game OR, then AND, then the shifts
+    '''
+
+    cls = start.__class__
+    for name in move_set:
+        operation = OPERATIONS[name]
+        operand = operation.operand_between(start.value, after.value, cls.WIDTH)
+        if operand is not None:
+            return Move(name, cls(operand) if operation.takes_mask else operand)
+    return None
+
+def _path(start, target, move_set=CLASSIC):
+    '''
+    Returns the list of words visited on an optimal path from start to target, including both ends
+    Raises ValueError if the move set can't reach target
+    '''
+
+    cls = start.__class__
+    if target.__class__ is not cls:
+        raise ValueError(f'cannot solve between {cls.__name__} and {target.__class__.__name__}')
+    if has_closed_form(move_set):
+        return _closed_form_path(start, target, move_set)
+
+    tables = solver_tables(cls.WIDTH, move_set)
+    if tables is None:
+        raise ValueError(f'no {cls.WIDTH} bit solver for these moves, they need AND and OR or XOR this wide')
+
+    distances, next_hops = tables
+    states = cls.MASK + 1
+    state = start.value
+    target = target.value
+    if distances[state * states + target] == UNREACHABLE:
+        raise ValueError(f'{start} cannot be turned into {cls(target)} with these moves')
+    path = [start]
+    while state != target:
+        state = next_hops[state * states + target]
+        path.append(cls(state))
+    return path
+
+def distance(start, target, move_set=CLASSIC):
+    '''
+    Fewest moves needed to turn word start into word target
+    '''
+
+    if has_closed_form(move_set) and start.__class__ is target.__class__:
+        return closed_form_distance(start.value, target.value, start.WIDTH, move_set)
+    return len(_path(start, target, move_set)) - 1
+
+def solve(start, target, move_set=CLASSIC):
+    '''
+    Returns an optimal list of moves turning word start into word target
+        e.g. solve(Byte(0b10111000), Byte(0b01011100)) ==> [Move('logical_shift_div', 1)]
+    '''
+
+    path = _path(start, target, move_set)
+    return [move_between(before, after, move_set) for before, after in zip(path, path[1:])]
+
+def move_message(move):
+    '''
+    Describes a move the way the solution panel shows it
+    '''
+
+    return OPERATIONS[move.operation].label.format(move.operand)
+
+def solution_messages(start, target, move_set=CLASSIC):
+    '''
+    Describes the optimal solution as lines of text, two per move
+    '''
+
+    messages = []
+    path = _path(start, target, move_set)
+    for before, after in zip(path, path[1:]):
+        messages.append(move_message(move_between(before, after, move_set)))
+        messages.append(f'{before} ==> {after}')
+    if not messages:
+        messages.append('Already solved')
+    return messages
+
+def next_move(start, target, move_set=CLASSIC):
+    '''
+    Returns the first move of an optimal solution, or None if start is already target
+    A few move checks with a closed form, one table lookup without
+    '''
+
+    if start == target:
+        return None
+    cls = start.__class__
+    if has_closed_form(move_set):
+        return move_between(start, _path(start, target, move_set)[1], move_set)
+    tables = solver_tables(cls.WIDTH, move_set)
+    if tables is None:
+        raise ValueError(f'no {cls.WIDTH} bit solver for these moves, they need AND and OR or XOR this wide')
+    distances, next_hops = tables
+    index = start.value * (cls.MASK + 1) + target.value
+    if distances[index] == UNREACHABLE:
+        raise ValueError(f'{start} cannot be turned into {target} with these moves')
+    return move_between(start, cls(next_hops[index]), move_set)
+
+def hint(start, target, move_set=CLASSIC):
+    '''
+    Returns (moves left, best next move) from start to target
+    '''
+
+    return distance(start, target, move_set), next_move(start, target, move_set)
+
+def solve_binary(start_binary, target_binary, width=DEFAULT_WIDTH, move_set=CLASSIC):
+    '''
+    Solves between two binary strings of the given width
+    '''
+
+    cls = word_type(width)
+    return solve(cls.from_string(start_binary), cls.from_string(target_binary), move_set)
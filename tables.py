@@ -0,0 +1,124 @@
+# On-disk storage for the precomputed lookup tables
+
+# --------------------------------------------------------------------------------------------------
+# Imports
+
+import mmap
+import os
+import struct
+import sys
+import zlib
+
+# --------------------------------------------------------------------------------------------------
+# File Format
+
+'''
+Tables that never change between runs are built once, written to a cache file and memory mapped after that,
+so starting the gui or a short lived worker only costs a page-in instead of a rebuild
+
+Layout (little endian):
+    header      magic b'BMGT', format version, word width, table count, crc32 of everything after the header
+    directory   one entry per table: name (32 bytes), item size (1, 2, 4 or 8 bytes), offset, item count
+    data        each table's items, starting on an 8 byte boundary
+
+A file with the wrong magic, version, width or checksum is treated as missing and rebuilt
+'''
+
+MAGIC = b'BMGT'
+FORMAT_VERSION = 1
+_HEADER = struct.Struct('<4sHBBI')
+_ENTRY = struct.Struct('<32sB7xQQ')
+_ITEM_FORMATS = {1: 'B', 2: 'H', 4: 'I', 8: 'Q'}
+
+CACHE_DIR = os.environ.get('BMG_TABLE_CACHE', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tables'))
+
+# --------------------------------------------------------------------------------------------------
+# Reading and Writing
+
+def cache_path(kind, width):
+    '''
+    Returns where the tables of a given kind and width are cached
+    '''
+
+    return os.path.join(CACHE_DIR, f'{kind}-{width}.bmgt')
+
+def write_tables(path, width, tables):
+    '''
+    Writes a dict of name -> table (bytearray, bytes or array.array) to path
+    The file is written to a temporary name first, so readers never see half a file
+    '''
+
+    names = list(tables)
+    offset = _HEADER.size + _ENTRY.size * len(names)
+    entries = []
+    chunks = []
+    for name in names:
+        if len(name) > 32:
+            raise ValueError(f'table name {name!r} is longer than 32 characters')
+        table = memoryview(tables[name]).cast('B')
+        itemsize = memoryview(tables[name]).itemsize
+        padding = -offset % 8
+        offset += padding
+        entries.append(_ENTRY.pack(name.encode('ascii'), itemsize, offset, len(table) // itemsize))
+        chunks.append(bytes(padding))
+        chunks.append(table)
+        offset += len(table)
+
+    body = b''.join(entries) + b''.join(chunks)
+    header = _HEADER.pack(MAGIC, FORMAT_VERSION, width, len(names), zlib.crc32(body))
+
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    temp_path = f'{path}.{os.getpid()}.tmp'
+    with open(temp_path, 'wb') as file:
+        file.write(header)
+        file.write(body)
+    os.replace(temp_path, path) # atomic swap into place
+
+def read_tables(path, width, verify=True):
+    '''
+    Memory maps a table file and returns a dict of name -> memoryview
+    Raises OSError if the file can't be read and ValueError if it is stale or corrupt
+    '''
+
+    if sys.byteorder != 'little':
+        raise ValueError('table files are little endian')
+
+    with open(path, 'rb') as file:
+        mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) # the map stays open after the file closes
+    view = memoryview(mapped)
+    if len(view) < _HEADER.size:
+        raise ValueError(f'{path} is too short to be a table file')
+
+    magic, version, file_width, count, checksum = _HEADER.unpack_from(view)
+    if magic != MAGIC or version != FORMAT_VERSION or file_width != width:
+        raise ValueError(f'{path} is not a version {FORMAT_VERSION}, {width} bit table file')
+    if verify and zlib.crc32(view[_HEADER.size:]) != checksum:
+        raise ValueError(f'{path} failed its checksum')
+
+    tables = {}
+    for index in range(count):
+        name, itemsize, offset, length = _ENTRY.unpack_from(view, _HEADER.size + index * _ENTRY.size)
+        end = offset + length * itemsize
+        if itemsize not in _ITEM_FORMATS or end > len(view):
+            raise ValueError(f'{path} has a damaged directory')
+        tables[name.rstrip(b'\0').decode('ascii')] = view[offset:end].cast(_ITEM_FORMATS[itemsize])
+    return tables
+
+def load_or_build(kind, width, build):
+    '''
+    Returns the cached tables for kind and width, calling build() and caching its result on a miss
+    If the cache can't be written (e.g. a read-only install) the freshly built tables are still returned
+    '''
+
+    path = cache_path(kind, width)
+    try:
+        return read_tables(path, width)
+    except (OSError, ValueError):
+        pass
+
+    tables = build()
+    try:
+        write_tables(path, width, tables)
+    except OSError:
+        pass
+    return tables
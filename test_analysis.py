@@ -0,0 +1,65 @@
+# Tests for the exhaustive puzzle-space analysis
+
+# --------------------------------------------------------------------------------------------------
+# Imports
+
+import json
+import os
+from collections import Counter
+import pytest
+from registry import CLASSIC
+from solver import UNREACHABLE, solver_tables
+
+np = pytest.importorskip('numpy') # analysis.py needs numpy
+from analysis import _shard_path, analyse
+
+# --------------------------------------------------------------------------------------------------
+# Logic Rules
+
+'''
+A small width's analysis must agree with the solver's tables, and a run stopped part way must carry on
+from its shard files to the same summary, redoing only the shards that are missing or damaged
+    python -m pytest test_analysis.py
+'''
+
+WIDTH = 6
+SHARDS = 8
+NO_CLOSED_FORM = ('arithmetic_shift_div', 'logical_shift_div', 'and_mask')
+
+def _analyse(output, move_set=CLASSIC):
+    calls = []
+    summary = analyse(WIDTH, move_set, str(output), workers=2, shards=SHARDS, progress=lambda done, total: calls.append((done, total)))
+    return summary, calls
+
+# --------------------------------------------------------------------------------------------------
+# Tests
+
+@pytest.mark.parametrize('move_set', [CLASSIC, NO_CLOSED_FORM], ids=['classic', 'no closed form'])
+def test_summary_matches_the_solver(tmp_path, move_set):
+    summary, calls = _analyse(tmp_path, move_set)
+    distances = solver_tables(WIDTH, move_set)[0]
+    counts = Counter(distances)
+    assert summary['pairs'] == 1 << (2 * WIDTH)
+    assert summary['unreachable'] == counts.pop(UNREACHABLE, 0)
+    assert summary['distribution'] == {str(moves): count for moves, count in sorted(counts.items())}
+    hardest = max(counts)
+    assert summary['hardest']['moves'] == hardest and summary['hardest']['pairs'] == counts[hardest]
+    for start, target in summary['hardest']['examples']:
+        assert distances[int(start, 2) * (1 << WIDTH) + int(target, 2)] == hardest
+    assert calls[0] == (0, SHARDS) and calls[-1] == (SHARDS, SHARDS)
+    with open(tmp_path / 'summary.json') as file:
+        assert json.load(file) == summary
+
+def test_resume(tmp_path):
+    summary, _ = _analyse(tmp_path)
+    os.remove(_shard_path(str(tmp_path), 2))
+    os.remove(_shard_path(str(tmp_path), 5))
+    with open(_shard_path(str(tmp_path), 7), 'r+b') as file: # a shard cut short by the interrupt
+        file.truncate(40)
+    resumed, calls = _analyse(tmp_path)
+    assert resumed == summary
+    assert calls[0] == (SHARDS - 3, SHARDS) and len(calls) == 4 # only the three missing shards were redone
+
+    assert _analyse(tmp_path)[1] == [(SHARDS, SHARDS)] # nothing left to do
+    with pytest.raises(ValueError):
+        analyse(WIDTH, NO_CLOSED_FORM, str(tmp_path), shards=SHARDS) # another analysis's directory
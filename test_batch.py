@@ -0,0 +1,68 @@
+# Tests for the numpy batch operations against the string functions
+
+# --------------------------------------------------------------------------------------------------
+# Imports
+
+from array import array
+import pytest
+import operations
+from registry import EXTENDED, OPERATIONS
+
+np = pytest.importorskip('numpy') # batch.py needs numpy
+import batch
+
+# --------------------------------------------------------------------------------------------------
+# Logic Rules
+
+'''
+Each batch function must give, for every word of an array, what its operations.py string function gives for that word
+Signed arrays come back signed and plain buffers are read as bytes, or as words of a given width
+    python -m pytest test_batch.py
+'''
+
+SHIFT_COUNTS = range(10)
+BYTES = np.arange(256, dtype=np.uint8)
+STRINGS = [format(value, '08b') for value in range(256)]
+
+# --------------------------------------------------------------------------------------------------
+# Tests
+
+@pytest.mark.parametrize('name', ['logical_shift_mul', 'logical_shift_div', 'arithmetic_shift_div'])
+def test_shifts_match_the_string_functions(name):
+    for shift in SHIFT_COUNTS:
+        expected = [getattr(operations, name)(binary, shift) for binary in STRINGS]
+        assert batch.to_binary_strings(getattr(batch, name)(BYTES, shift)) == expected, f'{name} by {shift}'
+
+@pytest.mark.parametrize('name', ['and_mask', 'or_mask'])
+def test_masks_match_the_string_functions(name):
+    for mask in ('0', '1011', '10110010', '11111111'):
+        expected = [getattr(operations, name)(binary, mask) for binary in STRINGS]
+        assert batch.to_binary_strings(getattr(batch, name)(BYTES, mask)) == expected, f'{name} with {mask}'
+    masks = BYTES[::-1] # one mask per word
+    expected = [getattr(operations, name)(binary, format(int(mask), '08b')) for binary, mask in zip(STRINGS, masks)]
+    assert batch.to_binary_strings(getattr(batch, name)(BYTES, masks)) == expected
+
+def test_denary_matches_the_string_function():
+    assert batch.byte_to_denary(BYTES).tolist() == [operations.byte_to_denary(binary) for binary in STRINGS]
+
+def test_input_types():
+    signed = BYTES.view(np.int8)
+    assert batch.logical_shift_div(signed, 1).dtype == np.int8 # signed in, signed out
+    assert batch.logical_shift_div(bytes(BYTES), 1).tolist() == (BYTES >> 1).tolist()
+    assert batch.logical_shift_div(array('B', range(256)), 1).tolist() == (BYTES >> 1).tolist()
+    assert batch.as_words(array('H', [1, 2]).tobytes(), 16).tolist() == [1, 2]
+    assert batch.as_words([1, 2, 300], 8).tolist() == [1, 2, 44] # wraps like the scalar functions
+    with pytest.raises(ValueError):
+        batch.as_words(BYTES, 12)
+    with pytest.raises(TypeError):
+        batch.as_words(np.zeros(2))
+
+@pytest.mark.parametrize('width', [8, 16, 64])
+def test_apply_operation_matches_the_registry(width):
+    rng = np.random.default_rng(width)
+    words = rng.integers(0, 1 << width, 512, dtype=batch._UNSIGNED[width], endpoint=False)
+    for name in EXTENDED:
+        operation = OPERATIONS[name]
+        operand = int(rng.integers(0, 1 << 8)) if operation.takes_mask else 3
+        expected = [operation(word, operand, width) for word in words.tolist()]
+        assert batch.apply_operation(name, words, operand).tolist() == expected, name
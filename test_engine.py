@@ -0,0 +1,110 @@
+# Tests for the headless game engine
+
+# --------------------------------------------------------------------------------------------------
+# Imports
+
+import random
+import pytest
+from engine import AND_MASK, ARITHMETIC_SHIFT, IDLE, LOGICAL_SHIFT, OR_MASK, PLAYING, SOLVED, XOR_MASK, GameSession
+from operations import Byte
+from puzzles import max_difficulty
+from registry import EXTENDED
+from solver import Move, distance
+
+# --------------------------------------------------------------------------------------------------
+# Logic Rules
+
+'''
+A GameSession must only allow what its state allows, IDLE -> PLAYING -> SOLVED -> PLAYING,
+count every move, and move to SOLVED the moment the current word is the target
+    python -m pytest test_engine.py
+'''
+
+# --------------------------------------------------------------------------------------------------
+# Tests
+
+def test_idle_session():
+    session = GameSession(rng=random.Random(1))
+    assert session.state == IDLE and session.denary == ''
+    with pytest.raises(ValueError):
+        session.apply(Move('or_mask', 1))
+    with pytest.raises(ValueError):
+        session.select(OR_MASK)
+    with pytest.raises(ValueError):
+        session.hint()
+    session.select(None) # clearing is always fine
+
+def test_playing_to_solved():
+    session = GameSession()
+    session.new_game(Byte(0b10111000), Byte(0b01011100))
+    assert session.state == PLAYING and session.denary == -72
+    session.select(ARITHMETIC_SHIFT)
+    assert session.shift('right') == Byte(0b11011100) # keeps the sign bit
+    assert session.state == PLAYING
+    session.select(LOGICAL_SHIFT)
+    session.shift('right')
+    assert session.current == Byte(0b01101110) and session.steps == 2
+    session.select(AND_MASK)
+    assert session.submit_mask('2') is False # not binary, ignored like the gui does
+    assert session.steps == 2
+    session.submit_mask('00001100')
+    session.select(OR_MASK)
+    session.submit_mask('01011100')
+    assert session.state == SOLVED and session.solved and session.mode is None
+    assert session.steps == 4
+    assert [move.operation for move in session.history] == ['arithmetic_shift_div', 'logical_shift_div', 'and_mask', 'or_mask']
+    assert session.hint() == (0, None) and session.hint_messages() == ['Already solved']
+    with pytest.raises(ValueError):
+        session.shift('left')
+    with pytest.raises(ValueError):
+        session.select(OR_MASK)
+
+def test_moves_are_checked():
+    session = GameSession()
+    session.new_game(Byte(1), Byte(2))
+    with pytest.raises(ValueError):
+        session.apply(Move('xor_mask', 3)) # not a classic move
+    with pytest.raises(ValueError):
+        session.apply(Move('logical_shift_mul', 2)) # shifts are one place per move
+    with pytest.raises(ValueError):
+        session.select(XOR_MASK)
+    with pytest.raises(ValueError):
+        session.select('sideways')
+    with pytest.raises(ValueError):
+        session.shift('left') # no shift mode selected
+    with pytest.raises(ValueError):
+        session.submit_mask('1') # no mask mode selected
+    assert session.steps == 0 and session.state == PLAYING
+
+def test_new_game_that_is_already_solved():
+    session = GameSession()
+    session.new_game(Byte(7), Byte(7))
+    assert session.state == SOLVED and session.solution_messages() == ['Already solved']
+
+def test_extended_moves():
+    session = GameSession(move_set=EXTENDED)
+    session.new_game(Byte(0b10000001), Byte(0b10000010))
+    session.select(ARITHMETIC_SHIFT)
+    assert session.shift('left') == Byte(0b10000010) # arithmetic left shift keeps the sign bit
+    assert session.solved
+    session.new_game(Byte(0b1100), Byte(0b0110))
+    session.select(XOR_MASK)
+    session.submit_mask('1010')
+    assert session.solved
+
+def test_generated_games_and_hints():
+    rng = random.Random(8)
+    for difficulty in (None, 1, max_difficulty(8)):
+        session = GameSession(difficulty=difficulty, rng=rng)
+        for _ in range(20):
+            session.generate()
+            assert session.state == PLAYING and session.steps == 0 and session.mode is None
+            moves_left = distance(session.start, session.target)
+            assert difficulty is None or moves_left == difficulty
+            while not session.solved: # following the hints solves it in the fewest moves
+                left, move = session.hint()
+                assert left == moves_left
+                session.apply(move)
+                moves_left -= 1
+            assert session.steps == distance(session.start, session.target)
+            assert len(session.solution_messages()) == 2 * session.steps
@@ -0,0 +1,181 @@
+# Tests for the word types and string functions against the original string functions
+
+# --------------------------------------------------------------------------------------------------
+# Imports
+
+import pickle
+import random
+import pytest
+import operations
+from operations import Byte, word_type
+from programs import Program
+from solver import solve
+
+# --------------------------------------------------------------------------------------------------
+# Logic Rules
+
+'''
+The string functions are backed by integer words now, and must give exactly what the original string
+bit-twiddling did for every byte, every shift count and every mask, short inputs included
+The original functions are kept below, as they were, as the reference
+Other widths have no original, so there the string functions and words are checked against plain int arithmetic
+    python -m pytest test_operations.py
+'''
+
+SHIFT_COUNTS = range(10) # past the byte too
+WIDTHS = (1, 4, 16, 32, 64)
+BINARIES = [format(value, f'0{length}b') for length in range(1, 9) for value in range(1 << length)] # 1 to 8 bits long
+
+# --------------------------------------------------------------------------------------------------
+# Original String Functions
+
+def zero_packing(binary, length):
+    binary = binary[::-1]
+    if len(binary) % length:
+        binary += '0' * (length - len(binary))
+    return binary[::-1]
+
+def one_packing(binary, length):
+    binary = binary[::-1]
+    if len(binary) % length:
+        binary += '1' * (length - len(binary))
+    return binary[::-1]
+
+def packing_check(binary):
+    if binary[0] == '1':
+        binary = one_packing(binary, 8)
+    if binary[0] == '0':
+        binary = zero_packing(binary, 8)
+    return binary
+
+def byte_to_denary(binary):
+    if not binary:
+        return ''
+    denary = -128 if binary[0] == '1' else 0
+    for power, bit in enumerate(binary[1:][::-1]):
+        if bit == '1':
+            denary += 2 ** power
+    return denary
+
+def logical_shift_mul(binary, shift_num):
+    binary = zero_packing(bin(int(packing_check(binary), 2) << shift_num)[2:], 8)
+    return binary[abs(len(binary) - 8):]
+
+def logical_shift_div(binary, shift_num):
+    binary = zero_packing(bin(int(packing_check(binary), 2) >> shift_num)[2:], 8)
+    return binary[abs(len(binary) - 8):]
+
+def arithmetic_shift_div(binary, shift_num):
+    binary = packing_check(binary)
+    sign = binary[0]
+    binary = zero_packing(bin(int(binary, 2) >> shift_num)[2:], 8)
+    return sign + binary[abs(len(binary) - 8):][1:]
+
+def and_mask(binary, mask):
+    binary = packing_check(binary)
+    mask = zero_packing(mask, 8)
+    return zero_packing(''.join('1' if bit == '1' and mask[i] == '1' else '0' for i, bit in enumerate(binary)), 8)
+
+def or_mask(binary, mask):
+    binary = packing_check(binary)
+    mask = zero_packing(mask, 8)
+    return zero_packing(''.join('1' if bit == '1' or mask[i] == '1' else '0' for i, bit in enumerate(binary)), 8)
+
+def solve_in_one(target_binary, start_binary):
+    solve_code = 5
+    if logical_shift_mul(start_binary, 1) == target_binary:
+        solve_code = 0
+    if logical_shift_div(start_binary, 1) == target_binary:
+        solve_code = 1
+    if arithmetic_shift_div(start_binary, 1) == target_binary:
+        solve_code = 2
+    if and_mask(start_binary, target_binary) == target_binary:
+        solve_code = 3
+    if or_mask(start_binary, target_binary) == target_binary:
+        solve_code = 4
+    return solve_code
+
+# --------------------------------------------------------------------------------------------------
+# Tests
+
+def test_packing_and_denary_match_the_original():
+    for binary in BINARIES:
+        assert operations.zero_packing(binary, 8) == zero_packing(binary, 8)
+        assert operations.one_packing(binary, 8) == one_packing(binary, 8)
+        assert operations.packing_check(binary) == packing_check(binary)
+        assert operations.byte_to_denary(binary) == byte_to_denary(binary), binary
+    assert operations.byte_to_denary('') == byte_to_denary('')
+
+@pytest.mark.parametrize('name', ['logical_shift_mul', 'logical_shift_div', 'arithmetic_shift_div'])
+def test_shifts_match_the_original(name):
+    new, original = getattr(operations, name), globals()[name]
+    for binary in BINARIES:
+        for shift in SHIFT_COUNTS:
+            assert new(binary, shift) == original(binary, shift), f'{name}({binary!r}, {shift})'
+
+@pytest.mark.parametrize('name', ['and_mask', 'or_mask'])
+def test_masks_match_the_original(name):
+    new, original = getattr(operations, name), globals()[name]
+    masks = random.Random(1).sample(BINARIES, 64)
+    for binary in BINARIES:
+        for mask in masks:
+            assert new(binary, mask) == original(binary, mask), f'{name}({binary!r}, {mask!r})'
+
+def test_solve_in_one_matches_the_original():
+    bytes_ = BINARIES[-256:]
+    for start in bytes_:
+        for target in bytes_:
+            assert operations.solve_in_one(target, start) == solve_in_one(target, start), f'{start} to {target}'
+
+def test_bytes_match_the_string_functions():
+    for binary in BINARIES[-256:]:
+        byte = Byte.from_string(binary)
+        assert str(byte) == binary
+        assert byte.denary == byte_to_denary(binary)
+        for shift in SHIFT_COUNTS:
+            assert str(byte << shift) == logical_shift_mul(binary, shift)
+            assert str(byte >> shift) == logical_shift_div(binary, shift)
+            assert str(byte.arithmetic_shift_div(shift)) == arithmetic_shift_div(binary, shift)
+        mask = Byte.from_mask(binary[3:] or '0')
+        assert str(byte & mask) == and_mask(binary, binary[3:] or '0')
+        assert str(byte | mask) == or_mask(binary, binary[3:] or '0')
+
+def test_bytes_are_shared_and_immutable():
+    assert Byte(0b1011) is Byte.from_string('00001011')
+    assert Byte(256 + 7) is Byte(7) # wraps into the byte
+    assert pickle.loads(pickle.dumps(Byte(200))) is Byte(200)
+    assert Byte(1) != word_type(16)(1)
+    with pytest.raises(AttributeError):
+        Byte(1).value = 2
+
+@pytest.mark.parametrize('width', WIDTHS)
+def test_other_widths_match_int_arithmetic(width):
+    rng = random.Random(width)
+    Word = word_type(width)
+    mask = (1 << width) - 1
+    sign = 1 << (width - 1)
+    for _ in range(500):
+        value, other = rng.getrandbits(width), rng.getrandbits(width)
+        binary, mask_binary = format(value, f'0{width}b'), format(other, f'0{width}b')
+        word = Word.from_string(binary)
+        assert word.value == value and str(word) == binary
+        assert operations.byte_to_denary(binary, width) == word.denary == (value - (1 << width) if value & sign else value)
+        for shift in (0, 1, rng.randrange(width + 2), width + 1):
+            assert operations.logical_shift_mul(binary, shift, width) == str(word << shift) == format((value << shift) & mask, f'0{width}b')
+            assert operations.logical_shift_div(binary, shift, width) == str(word >> shift) == format(value >> shift, f'0{width}b')
+            kept_sign = (value >> shift) & (sign - 1) | value & sign # the sign bit stays put, as the original's did
+            assert operations.arithmetic_shift_div(binary, shift, width) == str(word.arithmetic_shift_div(shift)) == format(kept_sign, f'0{width}b')
+        assert operations.and_mask(binary, mask_binary, width) == str(word & Word(other)) == format(value & other, f'0{width}b')
+        assert operations.or_mask(binary, mask_binary, width) == str(word | Word(other)) == format(value | other, f'0{width}b')
+    assert len(operations.binary_generator(width)) == width
+    assert Word.from_string('1').value == mask # short strings are sign extended
+
+@pytest.mark.parametrize('width', WIDTHS)
+def test_other_widths_solve(width):
+    rng = random.Random(width)
+    Word = word_type(width)
+    for _ in range(200):
+        start, target = rng.getrandbits(width), rng.getrandbits(width)
+        moves = solve(Word(start), Word(target))
+        assert len(moves) <= 2
+        assert Program(moves, width)(start) == target
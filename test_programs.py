@@ -0,0 +1,62 @@
+# Tests for the move programs' peephole optimiser
+
+# --------------------------------------------------------------------------------------------------
+# Imports
+
+import random
+from programs import Program, compile_moves
+from registry import EXTENDED, OPERATIONS
+from solver import Move
+
+# --------------------------------------------------------------------------------------------------
+# Logic Rules
+
+'''
+optimise() must give a program with the same result as the original for every input word
+Random programs of every registered move are run over all words of small widths, where that is cheap,
+and through the optimiser, and both must agree everywhere
+    python -m pytest test_programs.py
+'''
+
+WIDTHS = (1, 2, 3, 4, 5, 8)
+PROGRAMS = 4000 # random programs checked per run, seeded so a failure always comes back
+
+# --------------------------------------------------------------------------------------------------
+# Helpers
+
+def _random_move(rng, width):
+    name = rng.choice(EXTENDED)
+    if OPERATIONS[name].takes_mask:
+        return Move(name, rng.choice((0, (1 << width) - 1, rng.getrandbits(width)))) # all 0s and all 1s are special cases
+    return Move(name, rng.randrange(width + 2)) # past the width too
+
+def _outputs(program):
+    return [program(value) for value in range(1 << program.width)]
+
+# --------------------------------------------------------------------------------------------------
+# Tests
+
+def test_optimised_programs_match_every_word():
+    rng = random.Random(17)
+    for _ in range(PROGRAMS):
+        width = rng.choice(WIDTHS)
+        program = Program([_random_move(rng, width) for _ in range(rng.randrange(8))], width)
+        optimised = program.optimise()
+        assert _outputs(optimised) == _outputs(program), f'{program} optimised to {optimised}'
+        assert len(optimised) <= len(program)
+        assert optimised.optimise() == optimised, f'{optimised} optimises further'
+
+def test_lookup_tables_match_running_the_moves():
+    rng = random.Random(18)
+    for width in WIDTHS:
+        program = Program([_random_move(rng, width) for _ in range(6)], width)
+        assert list(program.run_many(range(1 << width))) == _outputs(program)
+        assert list(program.table()[:1 << width]) == _outputs(program)
+
+def test_documented_rewrites():
+    assert compile_moves([Move('or_mask', '1100'), Move('and_mask', '0101')], 4).moves == (Move('and_mask', 0b0001), Move('or_mask', 0b0100))
+    assert compile_moves([Move('xor_mask', '1100'), Move('not', 1)], 4).moves == (Move('xor_mask', 0b0011),)
+    assert compile_moves([Move('rotate_left', 3), Move('rotate_right', 1)], 8).moves == (Move('rotate_left', 2),)
+    assert compile_moves([Move('logical_shift_mul', 2), Move('logical_shift_mul', 3)], 8).moves == (Move('logical_shift_mul', 5),)
+    assert compile_moves([Move('logical_shift_mul', 3), Move('logical_shift_div', 3)], 8).moves == (Move('and_mask', 0b00011111),)
+    assert compile_moves([Move('arithmetic_shift_div', 1), Move('arithmetic_shift_div', 1)], 8).redundant == 0 # never fused
@@ -0,0 +1,91 @@
+# Tests for puzzle generation by difficulty
+
+# --------------------------------------------------------------------------------------------------
+# Imports
+
+import random
+import pytest
+import puzzles
+from operations import word_type
+from puzzles import PuzzleGenerator, difficulty_index, max_difficulty, puzzle_count, puzzle_of_difficulty, random_puzzle, starts_at_distance
+from registry import CLASSIC
+from solver import UNREACHABLE, distance, solver_tables
+
+# --------------------------------------------------------------------------------------------------
+# Logic Rules
+
+'''
+Every pair in difficulty k's pool must be exactly k moves apart, and every solvable pair must be in exactly one pool
+The puzzle functions must only ever give pairs of the difficulty asked for
+A PuzzleGenerator's seed must always give the same puzzles, with or without numpy
+    python -m pytest test_puzzles.py
+'''
+
+WIDTH = 4
+NO_CLOSED_FORM = ('arithmetic_shift_div', 'logical_shift_div', 'and_mask')
+MOVE_SETS = pytest.mark.parametrize('move_set', [CLASSIC, NO_CLOSED_FORM], ids=['classic', 'no closed form'])
+
+# --------------------------------------------------------------------------------------------------
+# Tests
+
+@MOVE_SETS
+def test_pools_hold_every_pair_once_at_its_distance(move_set):
+    distances = solver_tables(WIDTH, move_set)[0]
+    index = difficulty_index(WIDTH, move_set)
+    seen = set()
+    for k in range(max_difficulty(WIDTH, move_set) + 1):
+        starts, targets, offsets = index[f'starts_{k}'], index[f'targets_{k}'], index[f'offsets_{k}']
+        assert puzzle_count(k, WIDTH, move_set) == len(starts)
+        for i, (start, target) in enumerate(zip(starts, targets)):
+            assert distances[start * 16 + target] == k
+            assert offsets[target] <= i < offsets[target + 1] # grouped by target
+            seen.add((start, target))
+    assert seen == {(start, target) for start in range(16) for target in range(16) if distances[start * 16 + target] != UNREACHABLE}
+
+@MOVE_SETS
+def test_puzzles_have_the_difficulty_asked_for(move_set):
+    Word = word_type(WIDTH)
+    rng = random.Random(6)
+    for k in range(1, max_difficulty(WIDTH, move_set) + 1):
+        for _ in range(50):
+            start, target = puzzle_of_difficulty(k, WIDTH, rng, move_set)
+            assert distance(start, target, move_set) == k
+        for start in starts_at_distance(Word(5), k, WIDTH, move_set):
+            assert distance(start, Word(5), move_set) == k
+    for _ in range(200):
+        start, target = random_puzzle(WIDTH, rng, move_set)
+        assert start != target and distance(start, target, move_set) >= 1
+
+def test_impossible_difficulties():
+    assert puzzle_count(max_difficulty(WIDTH) + 1, WIDTH) == 0
+    with pytest.raises(ValueError):
+        puzzle_of_difficulty(max_difficulty(WIDTH) + 1, WIDTH)
+    with pytest.raises(ValueError):
+        difficulty_index(64)
+
+@pytest.mark.parametrize('width, difficulty, move_set', [(4, None, CLASSIC), (4, 2, CLASSIC), (4, None, NO_CLOSED_FORM), (4, 3, NO_CLOSED_FORM), (33, None, CLASSIC)])
+def test_batches(width, difficulty, move_set):
+    Word = word_type(width)
+    starts, targets = PuzzleGenerator(16, width, difficulty, move_set).batch(2000)
+    assert len(starts) == len(targets) == 2000
+    for start, target in zip(starts, targets):
+        moves = distance(Word(start), Word(target), move_set)
+        assert moves == difficulty if difficulty is not None else moves >= 1
+
+def test_seeds_give_the_same_puzzles(monkeypatch):
+    generator = PuzzleGenerator(16, WIDTH, 2)
+    first, second = PuzzleGenerator(16, WIDTH), PuzzleGenerator(16, WIDTH)
+    assert [first.puzzle() for _ in range(20)] == [second.puzzle() for _ in range(20)]
+    assert generator.stream(1).batch(100) == PuzzleGenerator(16, WIDTH, 2).stream(1).batch(100)
+    assert generator.stream(1).batch(100) != generator.stream(2).batch(100)
+    for width, difficulty in ((WIDTH, None), (WIDTH, 2), (12, None)):
+        monkeypatch.setattr(puzzles, 'np', None)
+        plain = PuzzleGenerator(16, width, difficulty).batch(1000)
+        monkeypatch.undo()
+        assert PuzzleGenerator(16, width, difficulty).batch(1000) == plain
+
+def test_generator_checks_the_difficulty():
+    with pytest.raises(ValueError):
+        PuzzleGenerator(width=WIDTH, difficulty=0)
+    with pytest.raises(ValueError):
+        PuzzleGenerator(width=WIDTH, difficulty=max_difficulty(WIDTH, NO_CLOSED_FORM) + 1, move_set=NO_CLOSED_FORM)
@@ -0,0 +1,83 @@
+# Tests for the operation registry
+
+# --------------------------------------------------------------------------------------------------
+# Imports
+
+import pytest
+import registry
+import solver
+from operations import word_type
+from programs import Program
+from registry import CLASSIC, EXTENDED, OPERATIONS, Operation, get_operation, move_set_key, move_table, on_register, register, run_moves
+
+# --------------------------------------------------------------------------------------------------
+# Logic Rules
+
+'''
+Every operation's quicker rules (reachable, reaches, mask_for) must agree with trying every operand,
+a move set's key must change when an operation is replaced with different code and come back when it is restored,
+and registering must clear every cache hooked up to it
+    python -m pytest test_registry.py
+'''
+
+WIDTH = 4
+
+@pytest.fixture
+def restore_registry():
+    saved = dict(OPERATIONS)
+    yield
+    for operation in saved.values():
+        register(operation)
+
+# --------------------------------------------------------------------------------------------------
+# Tests
+
+@pytest.mark.parametrize('name', EXTENDED)
+def test_rules_match_trying_every_operand(name):
+    operation = OPERATIONS[name]
+    operands = range(1 << WIDTH) if operation.takes_mask else (1,)
+    for start in range(1 << WIDTH):
+        reached = {operation(start, operand, WIDTH) for operand in operands}
+        assert operation.reachable(start, WIDTH) == sum(1 << after for after in reached)
+        for after in range(1 << WIDTH):
+            assert bool(operation.reaches(start, after, WIDTH)) == (after in reached)
+            operand = operation.operand_between(start, after, WIDTH)
+            assert (operand is not None) == (after in reached)
+            if operand is not None:
+                assert operation(start, operand, WIDTH) == after
+
+def test_move_tables():
+    moves = (('logical_shift_mul', 1), ('xor_mask', 0b1010), ('rotate_right', 3))
+    for width in (4, 8, 12):
+        table = move_table(moves, width)
+        assert list(table[:1 << width]) == [run_moves(moves, value, width) for value in range(1 << width)]
+    assert len(move_table(moves, 8)) == 256 and isinstance(move_table(moves, 8), bytes) # ready for bytes.translate
+    with pytest.raises(ValueError):
+        OPERATIONS['not'].table(17)
+    with pytest.raises(ValueError):
+        get_operation('sideways')
+
+def test_keys_follow_the_operations(restore_registry):
+    assert move_set_key(CLASSIC) == '' and move_set_key(reversed(CLASSIC)) == ''
+    extended = move_set_key(EXTENDED)
+    assert len(extended) == 8
+
+    cleared = []
+
+    def clear():
+        cleared.append(True)
+
+    on_register(clear)
+    solver.solver_tables(WIDTH, ('and_mask', 'logical_shift_div'))
+    assert solver._TABLES
+    original = OPERATIONS['and_mask']
+    register(Operation('and_mask', lambda value, mask, width: value & ~mask, 'AND NOT mask with {}', takes_mask=True))
+    registry._CACHE_CLEARERS.remove(clear)
+    assert cleared and not solver._TABLES # caches built from the old AND are gone
+    assert move_set_key(CLASSIC) != '' and move_set_key(EXTENDED) != extended
+    Word = word_type(WIDTH)
+    for start, target in ((0b1111, 0b0011), (0b0101, 0b1010)): # solved with the new AND
+        assert Program(solver.solve(Word(start), Word(target), CLASSIC), WIDTH)(start) == target
+
+    register(original)
+    assert move_set_key(CLASSIC) == '' and move_set_key(EXTENDED) == extended
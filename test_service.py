@@ -0,0 +1,53 @@
+# Tests for the service's request handling
+
+# --------------------------------------------------------------------------------------------------
+# Imports
+
+import asyncio
+import json
+import random
+from http import HTTPStatus
+import pytest
+from service import SolveService
+from sessions import SessionStore
+
+# --------------------------------------------------------------------------------------------------
+# Logic Rules
+
+'''
+Requests are routed straight through SolveService.route(), no sockets, and bad input must be a 400 before it reaches
+the words or the session store
+    python -m pytest test_service.py
+'''
+
+def _request(service, method, path, body=None):
+    return asyncio.run(service.route(method, path, json.dumps(body).encode() if body is not None else b''))
+
+# --------------------------------------------------------------------------------------------------
+# Tests
+
+def test_apply_and_solve():
+    service = SolveService(store=SessionStore(rng=random.Random(18)))
+    assert _request(service, 'POST', '/apply', {'binary': '10111000', 'moves': [['logical_shift_div', 1], ['and_mask', '1111']]}) == (HTTPStatus.OK, {'binary': '00001100', 'denary': 12})
+    assert _request(service, 'POST', '/solve', {'start': '10111000', 'target': '01011100'}) == (HTTPStatus.OK, {'distance': 1, 'moves': [['logical_shift_div', 1]]})
+
+@pytest.mark.parametrize('moves', [[['and_mask', -1]], [['or_mask', -255]], [['logical_shift_div', -1]], [['and_mask', '12']], [['logical_shift_div', '1']]])
+def test_bad_operands_are_refused(moves):
+    service = SolveService(store=SessionStore(rng=random.Random(18)))
+    status, payload = _request(service, 'POST', '/apply', {'binary': '10111000', 'moves': moves})
+    assert status == HTTPStatus.BAD_REQUEST and 'error' in payload
+
+def test_games():
+    service = SolveService(store=SessionStore(rng=random.Random(19)))
+    status, game = _request(service, 'POST', '/games')
+    assert status == HTTPStatus.CREATED
+    path = f"/games/{game['id']}"
+    assert _request(service, 'GET', path) == (HTTPStatus.OK, game)
+    assert _request(service, 'POST', path, {'move': ['and_mask', -1]})[0] == HTTPStatus.BAD_REQUEST
+    assert _request(service, 'POST', path, {'shift': 'left'})[0] == HTTPStatus.CONFLICT # no shift mode selected
+    assert _request(service, 'POST', path, {'move': ['and_mask', 0]})[1]['current'] == '00000000'
+    for bad_id in ('-' + game['id'][1:], '+1', '0x1f', '1_f', '', 'f' * 17, 'zz'):
+        assert _request(service, 'GET', f'/games/{bad_id}')[0] == HTTPStatus.BAD_REQUEST, bad_id
+    assert _request(service, 'GET', '/games/0')[0] == HTTPStatus.NOT_FOUND
+    assert _request(service, 'DELETE', path)[0] == HTTPStatus.OK
+    assert _request(service, 'GET', path)[0] == HTTPStatus.NOT_FOUND
@@ -0,0 +1,89 @@
+# Tests for the array backed session store
+
+# --------------------------------------------------------------------------------------------------
+# Imports
+
+import random
+import pytest
+from engine import AND_MASK, LOGICAL_SHIFT, OR_MASK, PLAYING, SOLVED
+from sessions import SessionLimitError, SessionStore
+
+# --------------------------------------------------------------------------------------------------
+# Logic Rules
+
+'''
+A game stored in slots must play exactly like a GameSession, and come back from a snapshot as it was,
+so each test plays games through the store and checks what comes back out
+    python -m pytest test_sessions.py
+'''
+
+# --------------------------------------------------------------------------------------------------
+# Tests
+
+def test_games_keep_their_state():
+    store = SessionStore(rng=random.Random(19))
+    session_id = store.create()
+    game = store.session(session_id)
+    assert session_id in store and len(store) == 1 and game.state == PLAYING
+
+    store.play(session_id, ('select', LOGICAL_SHIFT))
+    store.play(session_id, ('shift', 'left'))
+    game = store.session(session_id)
+    assert game.mode == LOGICAL_SHIFT and game.steps == 1
+    assert game.current.value == (game.start.value << 1) & 0xFF
+
+    store.play(session_id, ('select', AND_MASK))
+    store.play(session_id, ('mask', '00000000'))
+    store.play(session_id, ('select', OR_MASK))
+    game = store.play(session_id, ('mask', str(game.target)))
+    assert game.state == SOLVED and store.session(session_id).state == SOLVED and store.session(session_id).steps == 3
+
+    with pytest.raises(ValueError):
+        store.play(session_id, ('shift', 'left')) # solved
+    with pytest.raises(ValueError):
+        store.play(session_id, ('jump', None))
+    with pytest.raises(KeyError):
+        store.play(session_id + 1, ('generate', None))
+
+def test_freed_slots_are_reused():
+    store = SessionStore(rng=random.Random(19))
+    ids = [store.create() for _ in range(5)]
+    memory = store.memory
+    store.remove(ids[2])
+    assert ids[2] not in store and len(store) == 4
+    store.create()
+    assert store.memory == memory
+
+def test_idle_games_are_evicted_and_the_cap_holds():
+    store = SessionStore(rng=random.Random(19), idle_timeout=60)
+    store.max_bytes = 3 * store.slot_bytes
+    ids = [store.create() for _ in range(3)]
+    with pytest.raises(SessionLimitError):
+        store.create() # nothing idle to make room
+    store._last_used[store._slots[ids[0]]] -= 120
+    assert store.create() not in ids and ids[0] not in store and len(store) == 3
+    assert store.evict_idle(now=store._last_used[store._slots[ids[1]]] + 61) >= 1
+
+@pytest.mark.parametrize('width', [8, 16, 64])
+def test_snapshot_round_trip(tmp_path, width):
+    store = SessionStore(width, rng=random.Random(width))
+    ids = [store.create() for _ in range(20)]
+    store.remove(ids.pop(3)) # a free slot, left out of the snapshot
+    store.play(ids[0], ('select', LOGICAL_SHIFT))
+    store.play(ids[0], ('shift', 'right'))
+    before = {session_id: store.session(session_id) for session_id in ids}
+    path = str(tmp_path / 'games.bmgt')
+    store.snapshot(path)
+
+    restored = SessionStore(width)
+    restored.restore(path)
+    assert len(restored) == len(ids)
+    for session_id, game in before.items():
+        after = restored.session(session_id)
+        assert (after.start, after.current, after.target, after.steps, after.state, after.mode) == (game.start, game.current, game.target, game.steps, game.state, game.mode)
+    restored.play(ids[0], ('shift', 'right')) # restored games carry on
+    assert restored.session(ids[0]).steps == 2
+    assert restored.memory < store.memory # packed with no free slots
+
+    with pytest.raises(ValueError):
+        SessionStore(width * 2 if width < 64 else 8).restore(path) # another width's snapshot
@@ -0,0 +1,108 @@
+# Tests for the solver's closed form
+
+# --------------------------------------------------------------------------------------------------
+# Imports
+
+import pytest
+from operations import SOLVE_CODES, SOLVE_NO_SINGLE_MOVE, SOLVE_TWO_MOVES, SOLVE_UNREACHABLE, solve_in_one, word_type
+from programs import Program
+from registry import CLASSIC, EXTENDED, OPERATIONS
+from solver import UNREACHABLE, closed_form_distance, has_closed_form, move_between, solve, solver_tables
+
+np = pytest.importorskip('numpy') # batch.py needs numpy, like the cross check it runs
+from batch import cross_check
+
+# --------------------------------------------------------------------------------------------------
+# Logic Rules
+
+'''
+The closed form must give what breadth first search over every move gives, distances and next hops both,
+so batch.cross_check() compares them for every (start, target) pair of a width
+the breadth first search tables must match a plain search that tries every operand, unreachable targets included,
+and the solver's moves must really turn start into target, and solve_in_one must give the code of the move it picks
+    python -m pytest test_solver.py
+Every 16 bit pair is 2**32 of them and takes minutes, so that check is marked slow (see conftest.py)
+    python -m pytest test_solver.py --slow
+'''
+
+WIDTHS = (1, 2, 3, 4, 8)
+NO_CLOSED_FORM = ('arithmetic_shift_div', 'logical_shift_div', 'and_mask')
+
+# --------------------------------------------------------------------------------------------------
+# Helpers
+
+def _search_distances(start, width, move_set):
+    '''
+    Plain breadth first search from start, trying every operand of every move
+    '''
+
+    distances = {start: 0}
+    frontier = [start]
+    while frontier:
+        new_frontier = []
+        for state in frontier:
+            for name in move_set:
+                operation = OPERATIONS[name]
+                for operand in range(1 << width) if operation.takes_mask else (1,):
+                    after = operation(state, operand, width)
+                    if after not in distances:
+                        distances[after] = distances[state] + 1
+                        new_frontier.append(after)
+        frontier = new_frontier
+    return distances
+
+# --------------------------------------------------------------------------------------------------
+# Tests
+
+@pytest.mark.parametrize('move_set', [CLASSIC, EXTENDED], ids=['classic', 'extended'])
+@pytest.mark.parametrize('width', WIDTHS)
+def test_closed_form_matches_search(width, move_set):
+    assert cross_check(width, move_set) == 1 << (2 * width)
+
+@pytest.mark.slow
+def test_closed_form_matches_search_16_bits():
+    assert cross_check(16) == 1 << 32
+
+@pytest.mark.parametrize('move_set', [CLASSIC, EXTENDED], ids=['classic', 'extended'])
+def test_solutions_reach_the_target(move_set):
+    Word = word_type(4)
+    for start in range(16):
+        for target in range(16):
+            moves = solve(Word(start), Word(target), move_set)
+            assert len(moves) == closed_form_distance(start, target, 4, move_set)
+            assert Program(moves, 4)(start) == target
+            if len(moves) == 2:
+                assert Program(moves[:1], 4)(start) == 0 # the next hop the search finds, as cross_check checks
+
+@pytest.mark.parametrize('move_set', [CLASSIC, NO_CLOSED_FORM], ids=['classic', 'no closed form'])
+def test_tables_match_a_plain_search(move_set):
+    width = 4
+    Word = word_type(width)
+    distances, next_hops = solver_tables(width, move_set)
+    for start in range(16):
+        searched = _search_distances(start, width, move_set)
+        for target in range(16):
+            distance = distances[start * 16 + target]
+            assert distance == searched.get(target, UNREACHABLE), f'{start:04b} to {target:04b}'
+            if distance != UNREACHABLE:
+                moves = solve(Word(start), Word(target), move_set)
+                assert len(moves) == distance and Program(moves, width)(start) == target
+                assert distance == 0 or searched[next_hops[start * 16 + target]] == 1
+
+@pytest.mark.parametrize('move_set', [CLASSIC, EXTENDED, NO_CLOSED_FORM], ids=['classic', 'extended', 'no closed form'])
+def test_solve_in_one_codes_match_the_solver(move_set):
+    Word = word_type(4)
+    for start in range(16):
+        for target in range(16):
+            code = solve_in_one(format(target, '04b'), format(start, '04b'), 4, move_set)
+            try:
+                moves = solve(Word(start), Word(target), move_set)
+            except ValueError:
+                assert code == SOLVE_UNREACHABLE
+                continue
+            if len(moves) == 1:
+                assert code == SOLVE_CODES[moves[0].operation]
+            elif has_closed_form(move_set):
+                assert code == (SOLVE_TWO_MOVES if moves else SOLVE_CODES[move_between(Word(start), Word(target), move_set).operation])
+            else:
+                assert code == SOLVE_NO_SINGLE_MOVE
@@ -0,0 +1,92 @@
+# Tests for the on-disk table cache
+
+# --------------------------------------------------------------------------------------------------
+# Imports
+
+import os
+import struct
+from array import array
+import pytest
+import tables
+from tables import load_or_build, read_tables, write_tables
+
+# --------------------------------------------------------------------------------------------------
+# Logic Rules
+
+'''
+Tables written to a file must come back item for item, whatever their item size
+A file that is damaged in any way must be refused with ValueError, and load_or_build must then rebuild and rewrite it
+    python -m pytest test_tables.py
+'''
+
+def _tables():
+    return {
+        'bytes': bytearray(range(256)),
+        'words': array('H', range(0, 65536, 7)),
+        'longs': array('I', [0, 1, 2 ** 32 - 1]),
+        'quads': array('Q', [2 ** 64 - 1, 5]),
+        'empty': bytearray(),
+    }
+
+def _damage(path, offset, data):
+    with open(path, 'r+b') as file:
+        file.seek(offset)
+        file.write(data)
+
+# --------------------------------------------------------------------------------------------------
+# Tests
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / 'round-8.bmgt')
+    write_tables(path, 8, _tables())
+    loaded = read_tables(path, 8)
+    assert list(loaded) == list(_tables())
+    for name, table in _tables().items():
+        assert list(loaded[name]) == list(table), name
+        assert loaded[name].itemsize == memoryview(table).itemsize
+        assert loaded[name].readonly # straight from the read only map
+    assert os.listdir(tmp_path) == ['round-8.bmgt'] # no temporary file left behind
+
+@pytest.mark.parametrize('damage', ['magic', 'version', 'width', 'checksum', 'truncated', 'directory'])
+def test_damaged_files_are_refused(tmp_path, damage):
+    path = str(tmp_path / 'damaged-8.bmgt')
+    write_tables(path, 8, _tables())
+    header = tables._HEADER.size
+    if damage == 'magic':
+        _damage(path, 0, b'XXXX')
+    elif damage == 'version':
+        _damage(path, 4, struct.pack('<H', tables.FORMAT_VERSION + 1))
+    elif damage == 'width':
+        write_tables(path, 9, _tables())
+    elif damage == 'checksum':
+        _damage(path, os.path.getsize(path) - 1, b'\xff')
+    elif damage == 'truncated':
+        with open(path, 'r+b') as file:
+            file.truncate(header - 1)
+    else:
+        _damage(path, header + 32, b'\x03') # an item size there is no format for
+    with pytest.raises(ValueError):
+        read_tables(path, 8, verify=damage != 'directory') # the checksum would catch the directory first
+
+def test_load_or_build_rebuilds_damaged_files(tmp_path, monkeypatch):
+    monkeypatch.setattr(tables, 'CACHE_DIR', str(tmp_path))
+    builds = []
+
+    def build():
+        builds.append(1)
+        return _tables()
+
+    assert list(load_or_build('test', 8, build)['words']) == list(_tables()['words'])
+    assert list(load_or_build('test', 8, build)['words']) == list(_tables()['words'])
+    assert len(builds) == 1 # the second call read the cache
+
+    _damage(tables.cache_path('test', 8), os.path.getsize(tables.cache_path('test', 8)) - 1, b'\xff')
+    load_or_build('test', 8, build)
+    assert len(builds) == 2
+    assert list(read_tables(tables.cache_path('test', 8), 8)['quads']) == list(_tables()['quads']) # rewritten
+
+def test_load_or_build_without_a_writable_cache(tmp_path, monkeypatch):
+    blocker = tmp_path / 'not-a-directory'
+    blocker.write_bytes(b'')
+    monkeypatch.setattr(tables, 'CACHE_DIR', str(blocker / 'tables'))
+    assert list(load_or_build('test', 8, _tables)['bytes']) == list(range(256))
@@ -0,0 +1,85 @@
+# Tests for the streaming byte-transform tool
+
+# --------------------------------------------------------------------------------------------------
+# Imports
+
+import io
+import os
+import pytest
+from registry import run_moves
+from solver import Move
+from transform import compile_pipeline, main, parse_pipeline, transform_in_place, transform_stream
+
+# --------------------------------------------------------------------------------------------------
+# Logic Rules
+
+'''
+Pipelines must read every way the docs write them and refuse anything else with ValueError,
+and every way of streaming a file (mapped, piped, in place, in small chunks) must give each byte what its moves give it
+    python -m pytest test_transform.py
+'''
+
+PIPELINE = 'arithmetic right shift 2, AND 11110000, OR 00000011, rotate left 3, NOT'
+DATA = bytes(range(256)) * 5 + b'\x80\x01' # not a whole number of chunks
+
+def _expected(data, pipeline=PIPELINE):
+    moves = [(name, int(operand, 2) if isinstance(operand, str) else operand) for name, operand in parse_pipeline(pipeline)]
+    return bytes(run_moves(moves, byte, 8) for byte in data)
+
+# --------------------------------------------------------------------------------------------------
+# Tests
+
+def test_parse_pipeline():
+    assert parse_pipeline('logical left shift 2, or 1') == [Move('logical_shift_mul', 2), Move('or_mask', '1')]
+    assert parse_pipeline('Arithmetic right shift, AND mask 1010, xor_mask 1, not') == [Move('arithmetic_shift_div', 1), Move('and_mask', '1010'), Move('xor_mask', '1'), Move('not', 1)]
+    assert parse_pipeline('LOGICAL_SHIFT_DIV 3') == [Move('logical_shift_div', 3)]
+
+@pytest.mark.parametrize('text', ['', 'not,', 'sideways 2', 'and', 'and 102', 'or 111100001', 'logical left shift two', 'rotate left -1'])
+def test_bad_pipelines(text):
+    with pytest.raises(ValueError):
+        parse_pipeline(text)
+
+def test_table_matches_the_moves():
+    assert compile_pipeline(PIPELINE) == _expected(range(256))
+
+@pytest.mark.parametrize('chunk_bytes', [1, 100, 1 << 20])
+def test_stream_mapped_file(tmp_path, chunk_bytes):
+    path = tmp_path / 'data.bin'
+    path.write_bytes(DATA)
+    destination = io.BytesIO()
+    with open(path, 'rb') as source:
+        assert transform_stream(compile_pipeline(PIPELINE), source, destination, chunk_bytes) == len(DATA)
+    assert destination.getvalue() == _expected(DATA)
+
+def test_stream_unmappable_sources(tmp_path):
+    destination = io.BytesIO()
+    assert transform_stream(compile_pipeline(PIPELINE), io.BytesIO(DATA), destination, 100) == len(DATA) # no fileno
+    assert destination.getvalue() == _expected(DATA)
+    read, write = os.pipe()
+    os.write(write, DATA)
+    os.close(write)
+    destination = io.BytesIO()
+    with open(read, 'rb') as source:
+        assert transform_stream(compile_pipeline(PIPELINE), source, destination, 100) == len(DATA)
+    assert destination.getvalue() == _expected(DATA)
+    empty = tmp_path / 'empty.bin'
+    empty.write_bytes(b'')
+    with open(empty, 'rb') as source:
+        assert transform_stream(compile_pipeline(PIPELINE), source, io.BytesIO()) == 0
+
+def test_in_place_and_command_line(tmp_path):
+    path = tmp_path / 'data.bin'
+    path.write_bytes(DATA)
+    assert transform_in_place(compile_pipeline(PIPELINE), str(path), 100) == len(DATA)
+    assert path.read_bytes() == _expected(DATA)
+
+    path.write_bytes(DATA)
+    output = tmp_path / 'out.bin'
+    assert main([PIPELINE, str(path), '-o', str(output), '--chunk-mb', '1']) == 0
+    assert output.read_bytes() == _expected(DATA) and path.read_bytes() == DATA
+    assert main([PIPELINE, str(path), '--in-place']) == 0
+    assert path.read_bytes() == _expected(DATA)
+    with pytest.raises(SystemExit):
+        main([PIPELINE, str(path), '-o', str(path)]) # would truncate its own input
+    with pytest.raises(SystemExit):
+        main(['sideways', str(path)])
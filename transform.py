@@ -0,0 +1,188 @@
+# Streams whole files through a pipeline of Bitwise Manipulation Game moves
+
+# --------------------------------------------------------------------------------------------------
+# Imports
+
+import argparse
+import mmap
+import os
+import sys
+from programs import compile_moves
+from registry import OPERATIONS
+from solver import Move
+
+# --------------------------------------------------------------------------------------------------
+# Logic Rules
+
+'''
+A pipeline is moves separated by commas, each one a move's name followed by its operand:
+    "arithmetic right shift 2, AND 11110000, OR 00000011"
+Names are the registry's (arithmetic_shift_div) or the solution panel's (Arithmetic right shift, AND mask, AND), in any case
+    step moves take how many times to do it, 1 if it is left out
+    mask moves take a binary mask of up to 8 bits, packed with zeros like the gui's mask box
+
+Every byte is treated as one 8 bit word with the same rules as operations.py
+The pipeline is compiled by programs.py into a single 256 byte table, every input byte's output byte,
+and the input goes through bytes.translate a chunk at a time, so no python object is ever made per byte:
+    files are memory mapped and translated CHUNK_BYTES at a time
+    stdin and other streams that can't be mapped are read in chunks of the same size
+    --in-place maps the file writable and translates it where it is, so a huge file needs no second copy
+
+    python transform.py "logical right shift 1, XOR 00001111" data.bin -o out.bin
+    cat data.bin | python transform.py "NOT" > out.bin
+'''
+
+WIDTH = 8
+CHUNK_BYTES = 16 << 20 # 16 MB, big enough that the per chunk cost disappears
+
+# --------------------------------------------------------------------------------------------------
+# Pipelines
+
+def _aliases():
+    '''
+    Every name a move can be given in a pipeline, lower case -> registry name
+    '''
+
+    aliases = {}
+    for name, operation in OPERATIONS.items():
+        label = operation.label.replace(' with {}', '').lower()
+        for alias in (name, name.replace('_', ' '), label, label.replace(' mask', '')):
+            aliases.setdefault(alias, name)
+    return aliases
+
+def parse_pipeline(text):
+    '''
+    Turns a pipeline string into a list of moves
+        e.g. parse_pipeline('logical left shift 2, or 1') ==> [Move('logical_shift_mul', 2), Move('or_mask', '1')]
+    Raises ValueError for anything it can't read
+    '''
+
+    aliases = _aliases()
+    moves = []
+    for step in text.split(','):
+        words = step.lower().split()
+        if not words:
+            raise ValueError('the pipeline has an empty move')
+        name = aliases.get(' '.join(words))
+        operand = None
+        if name is None and len(words) > 1:
+            name = aliases.get(' '.join(words[:-1]))
+            operand = words[-1]
+        if name is None:
+            raise ValueError(f'unknown move {step.strip()!r}')
+
+        if OPERATIONS[name].takes_mask:
+            if operand is None or not operand or operand.strip('01') or len(operand) > WIDTH:
+                raise ValueError(f'{step.strip()!r} needs a binary mask of up to {WIDTH} bits')
+            moves.append(Move(name, operand))
+        else:
+            if operand is not None and not operand.isdigit():
+                raise ValueError(f'{step.strip()!r} needs a whole number of times')
+            moves.append(Move(name, int(operand or 1)))
+    return moves
+
+def compile_pipeline(text):
+    '''
+    Returns the 256 byte translation table for a pipeline string
+    '''
+
+    return compile_moves(parse_pipeline(text), WIDTH).table()
+
+# --------------------------------------------------------------------------------------------------
+# Streaming
+
+def _map(file, access):
+    '''
+    Memory maps a whole file, None for pipes, terminals and empty files, which can't be mapped
+    '''
+
+    try:
+        mapped = mmap.mmap(file.fileno(), 0, access=access)
+    except (OSError, ValueError):
+        return None
+    if hasattr(mmap, 'MADV_SEQUENTIAL'):
+        mapped.madvise(mmap.MADV_SEQUENTIAL) # lets the kernel read ahead and drop pages behind us
+    return mapped
+
+def transform_stream(table, source, destination, chunk_bytes=CHUNK_BYTES):
+    '''
+    Writes every byte of binary file source to destination through a translation table, returns the byte count
+    '''
+
+    mapped = _map(source, mmap.ACCESS_READ)
+    if mapped is None:
+        total = 0
+        while True:
+            chunk = source.read(chunk_bytes)
+            if not chunk:
+                return total
+            destination.write(chunk.translate(table))
+            total += len(chunk)
+
+    with mapped:
+        for offset in range(0, len(mapped), chunk_bytes):
+            destination.write(mapped[offset:offset + chunk_bytes].translate(table))
+        return len(mapped)
+
+def transform_in_place(table, path, chunk_bytes=CHUNK_BYTES):
+    '''
+    Translates a file where it is, returns the byte count
+    '''
+
+    with open(path, 'r+b') as file:
+        mapped = _map(file, mmap.ACCESS_WRITE)
+        if mapped is None:
+            if os.fstat(file.fileno()).st_size:
+                raise OSError(f'{path} cannot be memory mapped, so cannot be changed in place')
+            return 0
+        with mapped:
+            for offset in range(0, len(mapped), chunk_bytes):
+                end = offset + chunk_bytes
+                mapped[offset:end] = mapped[offset:end].translate(table)
+            mapped.flush()
+            return len(mapped)
+
+# --------------------------------------------------------------------------------------------------
+# Command Line
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Runs every byte of a file through a pipeline of moves')
+    parser.add_argument('pipeline', help='moves separated by commas, e.g. "arithmetic right shift 2, AND 11110000, OR 00000011"')
+    parser.add_argument('input', nargs='?', default='-', help='file to read, stdin by default')
+    parser.add_argument('-o', '--output', default='-', help='file to write, stdout by default')
+    parser.add_argument('--in-place', action='store_true', help='change the input file itself')
+    parser.add_argument('--chunk-mb', type=int, default=CHUNK_BYTES >> 20, help=f'megabytes translated at a time (default {CHUNK_BYTES >> 20})')
+    parser.add_argument('--show', action='store_true', help='print the compiled moves to stderr')
+    args = parser.parse_args(argv)
+
+    try:
+        moves = parse_pipeline(args.pipeline)
+    except ValueError as error:
+        parser.error(str(error))
+    program = compile_moves(moves, WIDTH)
+    table = program.table()
+    chunk_bytes = max(1, args.chunk_mb) << 20
+    if args.show:
+        print(f'{len(moves)} moves compile to {list(program.moves)}', file=sys.stderr)
+
+    if args.in_place:
+        if args.input == '-' or args.output != '-':
+            parser.error('--in-place needs an input file and no --output')
+        transform_in_place(table, args.input, chunk_bytes)
+        return 0
+
+    if args.input != '-' and args.output != '-' and os.path.exists(args.output) and os.path.samefile(args.input, args.output):
+        parser.error('the output is the input, use --in-place to change it')
+    source = sys.stdin.buffer if args.input == '-' else open(args.input, 'rb')
+    destination = sys.stdout.buffer if args.output == '-' else open(args.output, 'wb')
+    try:
+        transform_stream(table, source, destination, chunk_bytes)
+    finally:
+        if source is not sys.stdin.buffer:
+            source.close()
+        if destination is not sys.stdout.buffer:
+            destination.close()
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
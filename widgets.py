@@ -0,0 +1,262 @@
+# Retained widgets for the Bitwise Manipulation Game's screens
+
+# --------------------------------------------------------------------------------------------------
+# Imports
+
+import pygame
+
+# --------------------------------------------------------------------------------------------------
+# Logic Rules
+
+'''
+The buttons, arrows and boxes are drawn in the background image, so the widgets only know where they are
+and what text they show on top of it:
+    Button     a clickable area, a rect or a polygon (the arrows are triangles), calls on_click(x, y)
+    Label      text shown at a spot, one line or several
+    TextField  a Label that takes typing while it has focus, calls on_submit(text) on RETURN
+
+Widgets are kept by a WidgetLayer, created once and changed, never rebuilt every frame:
+    hit tests   every clickable widget's bounding rect is filed in the cells of a grid (GRID_CELL pixels square) it covers,
+                so a click only looks at the one or two widgets in its cell, however many widgets the screen has,
+                then checks the exact area, point in polygon for polygons
+    drawing     setting a label's text to what it already shows does nothing, setting anything else marks it dirty,
+                and draw() only hands dirty widgets to the DirtyRenderer (rendering.py), which redraws just their region
+So a frame where nothing changed costs nothing per widget, and adding widgets adds no per frame cost
+invalidate() marks every label dirty, for when the renderer has redrawn the whole background
+remove() takes a widget out of the grid at once and has the renderer put the background back over it at the next draw
+'''
+
+GRID_CELL = 64
+
+# --------------------------------------------------------------------------------------------------
+# Widgets
+
+class Widget:
+    '''
+    Something on screen with a name and an area, a rect or a list of polygon corners
+    '''
+
+    clickable = False # only clickable widgets go in the hit test grid, so labels never hide a button
+
+    def __init__(self, name, area):
+        self.name = name
+        self.layer = None
+        if isinstance(area, pygame.Rect):
+            self.rect = area
+            self.polygon = None
+        else:
+            self.polygon = [tuple(point) for point in area]
+            xs = [x for x, _ in self.polygon]
+            ys = [y for _, y in self.polygon]
+            self.rect = pygame.Rect(min(xs), min(ys), max(xs) - min(xs) + 1, max(ys) - min(ys) + 1)
+
+    def contains(self, x, y):
+        '''
+        True if (x, y) is in the widget's area, polygons use the even-odd rule
+        '''
+
+        if not self.rect.collidepoint(x, y):
+            return False
+        if self.polygon is None:
+            return True
+        inside = False
+        corners = self.polygon
+        for (x1, y1), (x2, y2) in zip(corners, corners[1:] + corners[:1]):
+            if (y1 > y) != (y2 > y) and x < x1 + (y - y1) * (x2 - x1) / (y2 - y1):
+                inside = not inside # the ray to the right of (x, y) crosses this edge
+        return inside
+
+    def click(self, x, y):
+        pass
+
+    def draw(self, renderer, get_font):
+        pass
+
+class Button(Widget):
+    '''
+    Invisible clickable area over the background's art
+    '''
+
+    clickable = True
+
+    def __init__(self, name, area, on_click):
+        super().__init__(name, area)
+        self.on_click = on_click
+
+    def click(self, x, y):
+        self.on_click(x, y)
+
+class Label(Widget):
+    '''
+    Lines of text, the first centred on center (the rect's centre by default) and each next one spacing pixels lower
+    '''
+
+    def __init__(self, name, rect, font, colour=(0, 0, 0), center=None, spacing=0):
+        super().__init__(name, rect)
+        self.font = font # a font name for the layer's get_font
+        self.colour = colour
+        self.center = center or rect.center
+        self.spacing = spacing
+        self.lines = ('',)
+
+    @property
+    def text(self):
+        return self.lines[0] if self.lines else ''
+
+    def set(self, text):
+        self.set_lines((text,))
+
+    def set_lines(self, lines):
+        lines = tuple(lines)
+        if lines != self.lines:
+            self.lines = lines
+            if self.layer is not None:
+                self.layer.invalidate_widget(self)
+
+    def draw(self, renderer, get_font):
+        renderer.lines(self.name, self.lines, get_font(self.font), self.colour, self.center, self.spacing)
+
+class TextField(Label):
+    '''
+    Label that takes typed text while it has focus, clicking it gives it focus and clears it
+    '''
+
+    clickable = True
+
+    def __init__(self, name, rect, font, on_submit, colour=(0, 0, 0)):
+        super().__init__(name, rect, font, colour)
+        self.on_submit = on_submit
+        self.focused = False
+
+    def click(self, x, y):
+        self.focus()
+
+    def focus(self):
+        self.focused = True
+        self.set('')
+
+    def key(self, event):
+        '''
+        Handles a KEYDOWN while focused: BACKSPACE deletes, RETURN submits, clears and drops focus, anything else is typed
+        '''
+
+        if event.key == pygame.K_BACKSPACE:
+            self.set(self.text[:-1])
+        elif event.key == pygame.K_RETURN:
+            self.focused = False
+            text = self.text
+            self.set('')
+            self.on_submit(text)
+        else:
+            self.set(self.text + event.unicode)
+
+# --------------------------------------------------------------------------------------------------
+# Spatial Index
+
+class SpatialGrid:
+    '''
+    Widgets filed by the grid cells their bounding rects cover
+    '''
+
+    def __init__(self, cell=GRID_CELL):
+        self.cell = cell
+        self._cells = {} # (column, row) -> widgets, the last added on top
+
+    def _covered(self, rect):
+        cell = self.cell
+        for column in range(rect.left // cell, (rect.right - 1) // cell + 1):
+            for row in range(rect.top // cell, (rect.bottom - 1) // cell + 1):
+                yield column, row
+
+    def add(self, widget):
+        for key in self._covered(widget.rect):
+            self._cells.setdefault(key, []).append(widget)
+
+    def remove(self, widget):
+        for key in self._covered(widget.rect):
+            widgets = self._cells.get(key)
+            if widgets and widget in widgets:
+                widgets.remove(widget)
+
+    def at(self, x, y):
+        '''
+        Returns the topmost widget whose area holds (x, y), or None
+        '''
+
+        for widget in reversed(self._cells.get((x // self.cell, y // self.cell), ())):
+            if widget.contains(x, y):
+                return widget
+        return None
+
+# --------------------------------------------------------------------------------------------------
+# Widget Layer
+
+class WidgetLayer:
+    '''
+    A screen's widgets, with their hit test grid and the ones waiting to be drawn
+    '''
+
+    def __init__(self, get_font):
+        self.get_font = get_font # font name -> font
+        self.widgets = {}
+        self.grid = SpatialGrid()
+        self._dirty = {} # name -> widget, drawn in the order they changed
+        self._removed = [] # names of removed widgets still on screen
+
+    def __getitem__(self, name):
+        return self.widgets[name]
+
+    def add(self, widget):
+        if widget.name in self.widgets:
+            raise ValueError(f'there is already a widget called {widget.name!r}')
+        widget.layer = self
+        self.widgets[widget.name] = widget
+        if widget.clickable:
+            self.grid.add(widget)
+        self.invalidate_widget(widget)
+        return widget
+
+    def remove(self, name):
+        widget = self.widgets.pop(name)
+        if widget.clickable:
+            self.grid.remove(widget)
+        self._dirty.pop(name, None)
+        self._removed.append(name) # its text is cleared off the screen at the next draw
+        widget.layer = None
+
+    def widget_at(self, x, y):
+        return self.grid.at(x, y)
+
+    def click(self, x, y):
+        '''
+        Clicks the widget at (x, y), returns it, or None if there isn't one
+        '''
+
+        widget = self.grid.at(x, y)
+        if widget is not None:
+            widget.click(x, y)
+        return widget
+
+    def invalidate_widget(self, widget):
+        self._dirty[widget.name] = widget
+
+    def invalidate(self):
+        '''
+        Marks every widget dirty, for after the whole screen has been redrawn
+        '''
+
+        self._dirty = dict(self.widgets)
+
+    def draw(self, renderer):
+        '''
+        Draws only the widgets that changed since the last draw, after clearing any removed since then
+        '''
+
+        if self._removed:
+            removed, self._removed = self._removed, []
+            for name in removed:
+                renderer.clear(name)
+        if self._dirty:
+            dirty, self._dirty = self._dirty, {}
+            for widget in dirty.values():
+                widget.draw(renderer, self.get_font)